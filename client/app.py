@@ -5,7 +5,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import traceback
 from config import CORES
-from server.database import BancoDadosFisioterapia
+from server.database import BancoDadosFisioterapia, fechar_pools
 import threading
 
 # Importar o sistema de login
@@ -147,9 +147,8 @@ def main():
                             if hasattr(aba_clientes, 'fechar_threads'):
                                 aba_clientes.fechar_threads()
                             
-                            # Fechar conexão com banco de dados imediatamente
-                            if hasattr(db, 'fechar_conexao'):
-                                db.fechar_conexao()
+                            # Gravar escritas pendentes e fechar as conexões com o banco
+                            fechar_pools()
                             
                             # Desativar o integrador de login para evitar que ele reabra a tela de login
                             if 'integrador_login' in globals():
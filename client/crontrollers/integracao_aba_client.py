@@ -191,8 +191,10 @@ class IntegradorSistema:
                 if nome_var in dados:
                     variavel.set(dados[nome_var])
         
-        # Marcar como não modificado inicialmente
-        formulario.modificado = False
+        # A partir daqui o formulário edita esta avaliação: salvar regrava
+        # apenas os campos que diferirem dos valores carregados
+        formulario.avaliacao_id = avaliacao_id
+        formulario.redefinir_alteracoes()
 
 
 def iniciar_sistema():
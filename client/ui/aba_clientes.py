@@ -4,23 +4,23 @@ import os
 import json
 import datetime
 import threading
-import queue  # Adicione esta importação
 from PIL import Image, ImageTk
 from tkcalendar import DateEntry
 import sys
 import os
-import time
 # Adiciona o diretório raiz do projeto ao path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import concurrent.futures
 
 # Importar o banco de dados
 from server.database import BancoDadosFisioterapia
+from server.banco_async import AsyncBancoDados
+from server.notificacoes import INSERIDA, EXCLUIDA, RECARREGAR
 
 # Importar as configurações
 from config import CORES, FONTES, TAMANHOS
 
 from client.ui.detalhes_paciente import DetalhesPacienteWindow
+from client.ui.ponte_asyncio import PonteTkAsyncio
 from client.styles.treeview_style import configurar_estilo_treeview, alternar_cores_linhas
 
 
@@ -36,12 +36,9 @@ class AbaClientes:
         self.frame = tk.Frame(parent, bg=CORES["fundo"])
         parent.add(self.frame, text="Clientes")
         
-        # Instanciar o banco de dados
+        # Instanciar o banco de dados (as migrações de esquema e índices são aplicadas aqui)
         self.db = BancoDadosFisioterapia()
         
-        # Otimizar o banco de dados com índices
-        self.otimizar_banco_dados()
-        
         # Configurações
         self.cores = CORES
 
@@ -55,77 +52,33 @@ class AbaClientes:
         self.avaliacao_id = None
         
         # Flags para otimização
-        self.ultima_atualizacao = 0
         self.pacientes_carregados = False
         self._scroll_timer = None
         
-        # Fila para comunicação entre threads
-        self.queue = queue.Queue()
         self.executando = True  # Flag para controlar loops e threads
+        self._barra_progresso = None
         
-        # Adicionar pool de threads
-        self.thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=3)
+        # Leituras em segundo plano (pool fixo de threads); a ponte entrega os
+        # resultados na thread da interface e descarta os de pedidos substituídos
+        self.adb = AsyncBancoDados(self.db)
+        self.ponte = PonteTkAsyncio(self.frame)
         
         # Configurar o layout da aba
         self.configurar_aba()
         
-        # Iniciar o verificador de fila
-        self.verificar_fila()
-        
         # Carregar dados iniciais
         self.carregar_pacientes()
         
+        # Avaliações inseridas, alteradas ou excluídas (aqui ou em outra estação que
+        # usa o mesmo banco) atualizam só as linhas afetadas. O aviso chega na thread
+        # do monitor e é repassado pela ponte para a thread da interface
+        self._cancelar_alteracoes = self.db.inscrever_alteracoes(
+            lambda alteracoes: self.ponte.chamar_na_interface(self._aplicar_alteracoes, alteracoes)
+        )
+        
         # Configurar evento para quando a aba for destruída
         self.frame.bind("<Destroy>", self._ao_destruir)
 
-    def verificar_fila(self):
-        """Verifica periodicamente a fila de tarefas"""
-        if not self.executando:
-            return
-        
-        try:
-            # Verificar se há tarefas na fila (non-blocking)
-            tarefa, args = self.queue.get(block=False)
-            # Executar a tarefa
-            tarefa(*args)
-        except queue.Empty:
-            # Se não houver tarefas, verificar novamente depois
-            pass
-        
-        # Reagendar a verificação
-        if self.executando:
-            self.frame.after(100, self.verificar_fila)
-    
-    def otimizar_banco_dados(self):
-        """Adiciona índices para melhorar o desempenho do banco de dados"""
-        try:
-            # Verifica se o método existe no objeto db
-            if hasattr(self.db, "otimizar_banco_dados"):
-                self.db.otimizar_banco_dados()
-            else:
-                conn, cursor = self.db._conectar()
-                
-                # Adicionar índices para busca por nome e data
-                cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_pacientes_nome ON pacientes (nome);
-                ''')
-                
-                cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_avaliacoes_data ON avaliacoes (data_avaliacao);
-                ''')
-                
-                cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_avaliacoes_paciente ON avaliacoes (paciente_id);
-                ''')
-                
-                conn.commit()
-                conn.close()
-            
-            return True
-        except Exception as e:
-            print(f"Erro ao otimizar banco de dados: {e}")
-            return False
-    
     def configurar_aba(self):
         """Configura o layout da aba de clientes com apenas a lista de pacientes"""
         # Frame principal com uma única coluna
@@ -210,7 +163,7 @@ class AbaClientes:
         # Criar Treeview (tabela)
         self.treeview = ttk.Treeview(
             frame_treeview,
-            columns=('id', 'nome', 'idade', 'genero', 'data', 'proxima_avaliacao'),
+            columns=('id', 'nome', 'idade', 'genero', 'data', 'proxima_avaliacao', 'trecho'),
             show='headings',
             yscrollcommand=scrollbar.set,
             selectmode='browse',
@@ -225,6 +178,7 @@ class AbaClientes:
         self.treeview.heading('genero', text='Gênero')
         self.treeview.heading('data', text='Data Cadastro')
         self.treeview.heading('proxima_avaliacao', text='Próxima Avaliação')
+        self.treeview.heading('trecho', text='Coincidência')
 
         # Ajustar largura das colunas
         self.treeview.column('id', width=50, minwidth=50)
@@ -233,6 +187,7 @@ class AbaClientes:
         self.treeview.column('genero', width=60, minwidth=50)
         self.treeview.column('data', width=90, minwidth=80)
         self.treeview.column('proxima_avaliacao', width=110, minwidth=100)
+        self.treeview.column('trecho', width=220, minwidth=100)
         
         # Empacotar Treeview
         self.treeview.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -249,7 +204,7 @@ class AbaClientes:
 
         # Adicionar variáveis de controle para paginação
         self._carregando_mais_itens = False
-        self._pagina_atual = 1
+        self._token_paginacao = None  # Continuação da página atual (None = fim da lista)
 
         # Botões de ação para a lista
         frame_botoes_lista = tk.Frame(self.frame_lista, bg=self.cores["secao_bg"], padx=10, pady=10)
@@ -319,12 +274,13 @@ class AbaClientes:
         btn_excluir.pack(side=tk.RIGHT, padx=5, pady=5)
 
     def carregar_pacientes(self, forcar=False):
-        """Carrega a lista de pacientes do banco de dados com otimização"""
-        # Verificar se já carregamos recentemente (dentro de 5 segundos)
-        tempo_atual = time.time()
+        """
+        Carrega a lista de pacientes do banco de dados.
         
-        if not forcar and self.pacientes_carregados and (tempo_atual - self.ultima_atualizacao < 5):
-            # Pular o recarregamento se já carregamos recentemente
+        Depois da primeira carga, a lista é mantida em dia pelos avisos de alteração
+        (_aplicar_alteracoes), então só recarrega com forcar=True.
+        """
+        if not forcar and self.pacientes_carregados:
             return
         
         # Limpar Treeview
@@ -334,66 +290,50 @@ class AbaClientes:
         # Exibir indicador de carregamento
         self.treeview.insert('', 'end', values=('', 'Carregando...', '', '', '', ''))
         
-        # Adicionar barra de progresso
-        progresso = ttk.Progressbar(self.frame_lista, mode='indeterminate')
-        progresso.pack(fill=tk.X, padx=5, pady=5)
-        progresso.start(10)
+        # Adicionar barra de progresso (uma só, mesmo que o carregamento seja repetido)
+        self._remover_barra_progresso()
+        self._barra_progresso = ttk.Progressbar(self.frame_lista, mode='indeterminate')
+        self._barra_progresso.pack(fill=tk.X, padx=5, pady=5)
+        self._barra_progresso.start(10)
         
         self.treeview.update()
         
-        # Usar thread para carregar dados
-        thread = threading.Thread(
-            target=lambda: self._thread_carregar_pacientes_com_progresso(progresso, limite=20), 
-            daemon=True
-        )
-        thread.start()
+        # Carregar a primeira página em segundo plano; substitui uma carga ou
+        # pesquisa anterior que ainda não terminou
+        self._carregar_lista(self.adb.listar_avaliacoes_cursor(tamanho=20), "Erro ao carregar pacientes")
 
-    def _thread_carregar_pacientes_com_progresso(self, barra_progresso, limite=20):
-        """Thread otimizada para carregar dados com menos registros iniciais"""
-        try:
-            # Criar instância local do banco
-            db_thread = BancoDadosFisioterapia(self.db.nome_db)
-            avaliacoes = db_thread.listar_avaliacoes(limite=limite)
-            
-            # Liberar recursos do banco IMEDIATAMENTE após uso
-            db_thread.fechar_conexao()
-            
-            if self.executando:
-                self.queue.put((self._atualizar_lista_pacientes, [avaliacoes]))
-                self.queue.put((self._remover_barra_progresso, [barra_progresso]))
-        except Exception as e:
-            print(f"Erro ao carregar pacientes: {e}")
-            if self.executando:
-                self.queue.put((messagebox.showerror, ["Erro", f"Erro ao carregar pacientes: {e}"]))
-                self.queue.put((self._remover_barra_progresso, [barra_progresso]))
+    def _carregar_lista(self, corrotina, mensagem_erro):
+        """
+        Executa a leitura de uma nova lista de pacientes e a exibe ao terminar.
+        
+        Args:
+            corrotina (coroutine): Leitura que retorna {'avaliacoes': [...], 'token': ...}.
+            mensagem_erro (str): Início da mensagem exibida se a leitura falhar.
+        """
+        # Páginas da lista anterior não devem ser acrescentadas à nova
+        self.ponte.cancelar('mais_itens')
+        
+        def ao_concluir(pagina):
+            self._remover_barra_progresso()
+            self._atualizar_lista_pacientes(pagina['avaliacoes'], pagina['token'])
+        
+        def ao_falhar(erro):
+            print(f"{mensagem_erro}: {erro}")
+            self._remover_barra_progresso()
+            self._mostrar_erro_seguro(f"{mensagem_erro}: {erro}")
+        
+        self.ponte.executar(corrotina, ao_concluir=ao_concluir, ao_falhar=ao_falhar, chave='lista')
 
-    def _remover_barra_progresso(self, barra):
-        """Remove a barra de progresso"""
+    def _remover_barra_progresso(self):
+        """Remove a barra de progresso, se houver"""
+        barra, self._barra_progresso = self._barra_progresso, None
+        if barra is None:
+            return
         try:
             barra.stop()
             barra.destroy()
         except:
             pass
-
-    def _thread_carregar_pacientes(self):
-        """Realiza o carregamento em uma thread separada"""
-        try:
-            # Criar nova instância do banco para esta thread
-            db_thread = BancoDadosFisioterapia(self.db.nome_db)
-            
-            # Limitar o número de registros iniciais
-            avaliacoes = db_thread.listar_avaliacoes(limite=30)
-            
-            # Verificar se o aplicativo ainda está executando antes de atualizar a interface
-            if not self.executando:
-                return
-                
-            self.queue.put((self._atualizar_lista_pacientes, [avaliacoes]), block=False)
-            
-        except Exception as e:
-            print(f"Erro ao carregar pacientes: {e}")
-            if self.executando:
-                self.queue.put((messagebox.showerror, ["Erro", f"Erro ao carregar pacientes: {e}"]), block=False)
     
     def _atualizar_lista_pacientes_seguro(self):
         """Versão thread-safe para atualizar a lista de pacientes"""
@@ -409,6 +349,10 @@ class AbaClientes:
     
     def _formatar_data(self, data_str):
         """Formata a data para exibição"""
+        # Caminho rápido: a listagem já entrega as datas como 'YYYY-MM-DD'
+        if data_str and len(data_str) == 10 and data_str[4] == '-' and data_str[7] == '-':
+            return f"{data_str[8:10]}/{data_str[5:7]}/{data_str[0:4]}"
+        
         try:
             # Converter string para datetime
             if '-' in data_str:  # Formato SQL: 2025-03-30 17:56:02
@@ -436,31 +380,18 @@ class AbaClientes:
         self.treeview.insert('', 'end', values=('', 'Pesquisando...', '', '', '', ''))
         self.treeview.update()
         
-        # Usar pool de threads
-        self.thread_pool.submit(self._thread_pesquisar_pacientes, texto_pesquisa)
+        # Cada tecla substitui a pesquisa anterior: só o resultado do texto atual é exibido
+        self._carregar_lista(self._pesquisar(texto_pesquisa), "Erro ao pesquisar pacientes")
     
-    def _thread_pesquisar_pacientes(self, texto_pesquisa):
-        """Realiza a pesquisa em uma thread separada"""
-        try:
-            # Criar nova instância do banco para esta thread
-            db_thread = BancoDadosFisioterapia(self.db.nome_db)
-            
-            if not texto_pesquisa:
-                # Se não houver texto de pesquisa, mostrar todos
-                avaliacoes = db_thread.listar_avaliacoes(limite=100)
-            else:
-                # Realizar a pesquisa filtrada
-                avaliacoes = db_thread.listar_avaliacoes(filtro=texto_pesquisa)
-            
-            # Verificamos se a aplicação ainda está em execução antes de atualizar a interface
-            if self.frame.winfo_exists():
-                # Adicionar à fila para atualizar na thread principal
-                self.queue.put((self._atualizar_lista_pacientes, [avaliacoes]))
-            
-        except Exception as e:
-            print(f"Erro ao pesquisar pacientes: {e}")
-            if self.frame.winfo_exists():
-                self.queue.put((self._mostrar_erro_seguro, [f"Erro ao pesquisar pacientes: {e}"]))
+    async def _pesquisar(self, texto_pesquisa):
+        """Lê a lista correspondente ao texto de pesquisa"""
+        if not texto_pesquisa:
+            # Se não houver texto de pesquisa, mostrar todos
+            return await self.adb.listar_avaliacoes_cursor(tamanho=100)
+        
+        # Busca textual no nome, contato e texto clínico, por relevância
+        # (sem rolagem infinita: os melhores resultados vêm primeiro)
+        return {'avaliacoes': await self.adb.buscar_texto(texto_pesquisa, limite=100), 'token': None}
     
     def ao_selecionar_paciente(self, evento=None):
         """Chamado quando um paciente é selecionado na lista"""
@@ -479,48 +410,37 @@ class AbaClientes:
         # Armazenar ID da avaliação selecionada
         self.avaliacao_id = avaliacao_id
         
-        # Usar thread para carregar os dados sem travar a interface
-        thread = threading.Thread(target=self._carregar_dados_paciente, args=(avaliacao_id,))
-        thread.daemon = True
-        thread.start()
+        # Carregar os dados sem travar a interface; ao percorrer a lista com o
+        # teclado, só a última seleção é aplicada
+        self.ponte.executar(
+            self.adb.obter_avaliacao(avaliacao_id),
+            ao_concluir=self._definir_paciente_selecionado,
+            chave='selecao'
+        )
 
-    def _carregar_dados_paciente(self, avaliacao_id):
-        """Carrega os dados do paciente em uma thread separada"""
-        # Obter dados completos da avaliação
-        dados = self.db.obter_avaliacao(avaliacao_id)
-        
-        # Verificamos se a aplicação ainda está em execução antes de atualizar a interface
-        if self.frame.winfo_exists():
-            # Armazenar os dados do paciente para uso posterior
-            self.paciente_selecionado = dados
+    def _definir_paciente_selecionado(self, dados):
+        """Armazena os dados do paciente selecionado para uso posterior"""
+        self.paciente_selecionado = dados
 
-    def _atualizar_lista_pacientes(self, avaliacoes):
-        """Atualiza a lista de pacientes na thread principal"""
+    def _atualizar_lista_pacientes(self, avaliacoes, token=None):
+        """
+        Atualiza a lista de pacientes na thread principal
+        
+        Args:
+            avaliacoes (list): Primeira página de avaliações a exibir.
+            token (str, opcional): Token de continuação para a rolagem infinita.
+        """
         # Limpar lista
         for item in self.treeview.get_children():
             self.treeview.delete(item)
         
         # Preencher Treeview
         for avaliacao in avaliacoes:
-            data_formatada = self._formatar_data(avaliacao.get('data', ''))
-            proxima_avaliacao = self._formatar_data(avaliacao.get('fecha_evaluacion', ''))
-            
-            self.treeview.insert(
-                '', 
-                'end', 
-                values=(
-                    avaliacao.get('id', ''),
-                    avaliacao.get('nome', ''),
-                    avaliacao.get('idade', ''),
-                    avaliacao.get('genero', ''),
-                    data_formatada,
-                    proxima_avaliacao
-                )
-            )
+            self.treeview.insert('', 'end', values=self._valores_linha(avaliacao))
         
         # Atualizar flags
-        self.ultima_atualizacao = time.time()
         self.pacientes_carregados = True
+        self._token_paginacao = token
 
         if hasattr(self, 'atualizar_cores_linhas') and self.atualizar_cores_linhas:
             self.atualizar_cores_linhas()
@@ -549,13 +469,10 @@ class AbaClientes:
                 if sucesso:
                     messagebox.showinfo("Sucesso", f"Paciente {nome_paciente} excluído com sucesso.")
                     
-                    # Resetar seleção
+                    # Resetar seleção (o aviso de alteração tira a linha da lista)
                     self.paciente_selecionado = None
                     self.avaliacao_id = None
                     
-                    # Atualizar lista
-                    self.carregar_pacientes(forcar=True)
-                    
                 else:
                     messagebox.showerror("Erro", "Não foi possível excluir o paciente.")
             except Exception as e:
@@ -637,16 +554,13 @@ class AbaClientes:
         self.janela_detalhes = None
         self.paciente_selecionado = None
         
-        # Esvaziar a fila
-        while not self.queue.empty():
-            try:
-                self.queue.get_nowait()
-            except:
-                pass
+        # Parar de receber avisos de alteração
+        if hasattr(self, '_cancelar_alteracoes'):
+            self._cancelar_alteracoes()
         
-        # Encerrar pool de threads
-        if hasattr(self, 'thread_pool'):
-            self.thread_pool.shutdown(wait=False)
+        # Cancelar leituras pendentes e encerrar o loop da ponte
+        if hasattr(self, 'ponte'):
+            self.ponte.fechar()
         
         # Interromper qualquer thread em execução
         for thread in threading.enumerate():
@@ -683,7 +597,9 @@ class AbaClientes:
             self.frame, 
             self.paciente_selecionado, 
             self.cores, 
-            FONTES
+            FONTES,
+            adb=self.adb,
+            ponte=self.ponte
         )
 
     def _debounce(self, func, delay=300):
@@ -708,74 +624,149 @@ class AbaClientes:
     def _carregar_mais_itens(self):
         """Carrega mais itens quando o usuário rolar até o final"""
         try:
-            # Calculamos a página atual
-            itens_por_pagina = 30
-            pagina_atual = (len(self.treeview.get_children()) // itens_por_pagina) + 1
+            # Sem token não há mais páginas para a lista atual
+            if not self._token_paginacao:
+                return
             
-            # Inicia thread para carregar a próxima página
-            threading.Thread(
-                target=self._thread_carregar_mais_itens, 
-                args=(pagina_atual,), 
-                daemon=True
-            ).start()
+            # O token já carrega o filtro e o último ID exibido, então a página
+            # seguinte nunca repete itens e não depende do tamanho da lista
+            token = self._token_paginacao
+            self.ponte.executar(
+                self.adb.listar_avaliacoes_cursor(token=token),
+                ao_concluir=lambda pagina: self._adicionar_itens_treeview(
+                    pagina['avaliacoes'], token, pagina['token']),
+                ao_falhar=lambda erro: print(f"Erro ao carregar mais itens: {erro}"),
+                chave='mais_itens'
+            )
         except Exception as e:
             print(f"Erro ao iniciar carregamento de mais itens: {e}")
         finally:
             self._carregando_mais_itens = False
 
-    def _thread_carregar_mais_itens(self, pagina):
-        """Thread para carregar mais itens"""
-        try:
-            # Criar nova instância do banco para esta thread
-            db_thread = BancoDadosFisioterapia(self.db.nome_db)
-            
-            filtro = self.entry_pesquisa.get().strip().lower() if hasattr(self, 'entry_pesquisa') else ""
-            
-            # Modificar para usar paginação corretamente
-            # e evitar duplicação dos mesmos pacientes
-            avaliacoes = db_thread.listar_avaliacoes(filtro=filtro, pagina=pagina)
-            
-            # Verificar se já temos essas avaliações
-            ids_existentes = set()
-            if hasattr(self, 'treeview') and self.treeview.winfo_exists():
-                for item in self.treeview.get_children():
-                    item_values = self.treeview.item(item, 'values')
-                    if item_values and item_values[0]:
-                        ids_existentes.add(str(item_values[0]))
-            
-            # Filtrar apenas avaliações novas
-            avaliacoes_novas = [av for av in avaliacoes if str(av.get('id', '')) not in ids_existentes]
-            
-            if not self.executando or not avaliacoes_novas:
+    def _adicionar_itens_treeview(self, avaliacoes, token_origem=None, proximo_token=None):
+        """
+        Adiciona itens ao treeview sem limpar os existentes
+        
+        Args:
+            avaliacoes (list): Avaliações da página carregada.
+            token_origem (str, opcional): Token usado para buscar a página.
+            proximo_token (str, opcional): Token da página seguinte.
+        """
+        # Descartar páginas de uma lista que já foi recarregada ou já estendida
+        if token_origem is not None:
+            if token_origem != self._token_paginacao:
                 return
-                
-            # Adiciona somente os novos itens
-            self.queue.put((self._adicionar_itens_treeview, [avaliacoes_novas]), block=False)
-        except Exception as e:
-            print(f"Erro ao carregar mais itens: {e}")
-
-    def _adicionar_itens_treeview(self, avaliacoes):
-        """Adiciona itens ao treeview sem limpar os existentes"""
+            self._token_paginacao = proximo_token
+        
         for avaliacao in avaliacoes:
-            data_formatada = self._formatar_data(avaliacao.get('data', ''))
-            proxima_avaliacao = self._formatar_data(avaliacao.get('fecha_evaluacion', ''))
-            
-            self.treeview.insert(
-                '', 
-                'end', 
-                values=(
-                    avaliacao.get('id', ''),
-                    avaliacao.get('nome', ''),
-                    avaliacao.get('idade', ''),
-                    avaliacao.get('genero', ''),
-                    data_formatada,
-                    proxima_avaliacao
-                )
-            )
+            self.treeview.insert('', 'end', values=self._valores_linha(avaliacao))
         
         if hasattr(self, 'atualizar_cores_linhas') and self.atualizar_cores_linhas:
             self.atualizar_cores_linhas()
 
+    def _valores_linha(self, avaliacao):
+        """Valores das colunas do Treeview para um resumo de avaliação"""
+        return (
+            avaliacao.get('id', ''),
+            avaliacao.get('nome', ''),
+            avaliacao.get('idade', ''),
+            avaliacao.get('genero', ''),
+            self._formatar_data(avaliacao.get('data', '')),
+            self._formatar_data(avaliacao.get('fecha_evaluacion', '')),
+            avaliacao.get('trecho', '')
+        )
+
+    def _linhas_exibidas(self):
+        """Retorna {id da avaliação: item do Treeview} das linhas exibidas"""
+        linhas = {}
+        for item in self.treeview.get_children():
+            valores = self.treeview.item(item, 'values')
+            if valores and valores[0] != '':
+                linhas[int(valores[0])] = item
+        return linhas
+
+    def _aplicar_alteracoes(self, alteracoes):
+        """
+        Aplica à lista os avisos do monitor de alterações (na thread do Tk).
+        
+        Linhas excluídas saem da lista; as alteradas são relidas do banco. Avaliações
+        novas só entram na lista completa (sem pesquisa), no topo, que é onde a
+        ordenação por ID as colocaria.
+        
+        Args:
+            alteracoes (list): notificacoes.Alteracao consolidadas por avaliação.
+        """
+        if not self.executando or not self.pacientes_carregados:
+            return
+        
+        pesquisa = self.entry_pesquisa.get().strip()
+        if any(alteracao.operacao == RECARREGAR for alteracao in alteracoes):
+            if pesquisa:
+                self.pesquisar_pacientes()
+            else:
+                self.carregar_pacientes(forcar=True)
+            return
+        
+        linhas = self._linhas_exibidas()
+        reler = []
+        novas = set()
+        for operacao, avaliacao_id in alteracoes:
+            if operacao == EXCLUIDA:
+                if avaliacao_id in linhas:
+                    self.treeview.delete(linhas.pop(avaliacao_id))
+                if self.avaliacao_id is not None and int(self.avaliacao_id) == avaliacao_id:
+                    self.avaliacao_id = None
+                    self.paciente_selecionado = None
+            elif avaliacao_id in linhas:
+                reler.append(avaliacao_id)
+            elif operacao == INSERIDA and not pesquisa:
+                reler.append(avaliacao_id)
+                novas.add(avaliacao_id)
+        
+        if self.atualizar_cores_linhas:
+            self.atualizar_cores_linhas()
+        if not reler:
+            return
+        
+        self.ponte.executar(
+            self.adb.obter_resumos(reler),
+            ao_concluir=lambda resumos: self._atualizar_linhas(resumos, novas),
+            ao_falhar=lambda erro: print(f"Erro ao atualizar linhas da lista: {erro}")
+        )
+        
+        # Os dados guardados da seleção (detalhes, exportação) também mudaram
+        if self.avaliacao_id is not None and int(self.avaliacao_id) in reler:
+            self.ponte.executar(
+                self.adb.obter_avaliacao(self.avaliacao_id),
+                ao_concluir=self._definir_paciente_selecionado,
+                chave='selecao'
+            )
+
+    def _atualizar_linhas(self, resumos, novas):
+        """
+        Regrava as linhas relidas após um aviso de alteração.
+        
+        Args:
+            resumos (dict): ID -> resumo, de obter_resumos.
+            novas (set): IDs de avaliações inseridas, acrescentadas no topo se a
+                lista ainda não as tiver (ela pode ter sido recarregada nesse meio tempo).
+        """
+        linhas = self._linhas_exibidas()
+        # Em ordem crescente, cada avaliação nova é inserida acima da anterior
+        for avaliacao_id in sorted(resumos):
+            avaliacao = resumos[avaliacao_id]
+            item = linhas.get(avaliacao_id)
+            if item is None:
+                if avaliacao_id in novas:
+                    self.treeview.insert('', 0, values=self._valores_linha(avaliacao))
+                continue
+            # O trecho da pesquisa textual não vem no resumo
+            trecho = self.treeview.item(item, 'values')[-1]
+            self.treeview.item(item, values=self._valores_linha({**avaliacao, 'trecho': trecho}))
+        
+        if self.atualizar_cores_linhas:
+            self.atualizar_cores_linhas()
+
     def fechar_threads(self):
         """Método específico para forçar o encerramento de todas as threads"""
         self.executando = False
@@ -795,20 +786,17 @@ class AbaClientes:
             except:
                 pass
         
-        # Encerrar thread pool
-        if hasattr(self, 'thread_pool'):
+        # Parar de receber avisos de alteração
+        if hasattr(self, '_cancelar_alteracoes'):
+            self._cancelar_alteracoes()
+        
+        # Cancelar leituras pendentes e encerrar o loop da ponte
+        if hasattr(self, 'ponte'):
             try:
-                self.thread_pool.shutdown(wait=False)
+                self.ponte.fechar()
             except:
                 pass
         
-        # Limpar fila
-        try:
-            while not self.queue.empty():
-                self.queue.get_nowait()
-        except:
-            pass
-        
         # Fechar janela de detalhes se estiver aberta
         if hasattr(self, 'janela_detalhes') and self.janela_detalhes:
             try:
@@ -1,9 +1,14 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
 import hashlib
 import datetime
 import os
+import sys
+
+# Adiciona o diretório raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from server.database import BancoDadosFisioterapia
 
 class AdminUsuarios:
     """Interface simplificada para gerenciar usuários no banco de dados SQLite."""
@@ -14,8 +19,9 @@ class AdminUsuarios:
         self.window.title("Gerenciamento de Usuários")
         self.window.geometry("800x500")
         
-        # Caminho do banco de dados
+        # Caminho do banco de dados (escritas passam pelo escritor único do banco)
         self.db_path = db_path
+        self.db = BancoDadosFisioterapia(db_path)
         
         # Verificar e criar tabela de usuários se necessário
         self.verificar_tabela_usuarios()
@@ -27,55 +33,78 @@ class AdminUsuarios:
         self.carregar_usuarios()
     
     def verificar_tabela_usuarios(self):
-        """Verifica se a tabela de usuários existe e cria se necessário."""
+        """Garante que existam usuários para o primeiro acesso (a tabela é criada pelas migrações)."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Verificar se a tabela existe
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='usuarios'")
-            if not cursor.fetchone():
-                # Criar tabela de usuários
-                cursor.execute('''
-                CREATE TABLE IF NOT EXISTS usuarios (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    senha TEXT NOT NULL,
-                    perfil TEXT NOT NULL,
-                    ultimo_acesso TEXT,
-                    data_criacao TEXT
-                )
-                ''')
-                
-                # Criar usuários padrão
-                data_atual = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                
-                # Administrador
-                cursor.execute(
-                    "INSERT INTO usuarios (username, senha, perfil, data_criacao) VALUES (?, ?, ?, ?)",
-                    ('admin', self.hash_senha('admin123'), 'medico', data_atual)
-                )
-                
-                # Médico
-                cursor.execute(
-                    "INSERT INTO usuarios (username, senha, perfil, data_criacao) VALUES (?, ?, ?, ?)",
-                    ('medico', self.hash_senha('medico123'), 'medico', data_atual)
-                )
-                
-                # Recepcionista
-                cursor.execute(
-                    "INSERT INTO usuarios (username, senha, perfil, data_criacao) VALUES (?, ?, ?, ?)",
-                    ('recepcao', self.hash_senha('recepcao123'), 'recepcionista', data_atual)
-                )
-                
-                conn.commit()
-                print("Tabela de usuários criada com sucesso!")
-            
-            conn.close()
+            self.db.executar_escrita(self._criar_usuarios_padrao)
         
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao verificar tabela de usuários: {str(e)}")
     
+    def _criar_usuarios_padrao(self, conn):
+        """Trabalho de escrita: cria os usuários padrão se a tabela de usuários estiver vazia."""
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM usuarios")
+        if cursor.fetchone()[0] > 0:
+            return
+        
+        # Criar usuários padrão
+        data_atual = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        cursor.executemany(
+            "INSERT INTO usuarios (username, senha, perfil, data_criacao) VALUES (?, ?, ?, ?)",
+            [
+                ('admin', self.hash_senha('admin123'), 'medico', data_atual),          # Administrador
+                ('medico', self.hash_senha('medico123'), 'medico', data_atual),        # Médico
+                ('recepcao', self.hash_senha('recepcao123'), 'recepcionista', data_atual),  # Recepcionista
+            ]
+        )
+        print("Usuários padrão criados com sucesso!")
+    
+    def _contar_medicos(self, cursor):
+        """Número de usuários com perfil médico."""
+        cursor.execute("SELECT COUNT(*) FROM usuarios WHERE perfil = 'medico'")
+        return cursor.fetchone()[0]
+    
+    def _inserir_usuario(self, conn, username, senha_hash, perfil):
+        """Trabalho de escrita: insere um usuário. Retorna False se o nome já existe."""
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM usuarios WHERE username = ?", (username,))
+        if cursor.fetchone()[0] > 0:
+            return False
+        
+        data_atual = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        cursor.execute(
+            "INSERT INTO usuarios (username, senha, perfil, data_criacao) VALUES (?, ?, ?, ?)",
+            (username, senha_hash, perfil, data_atual)
+        )
+        return True
+    
+    def _atualizar_usuario(self, conn, user_id, perfil, senha_hash=None):
+        """Trabalho de escrita: altera perfil/senha. Retorna False se for o último médico."""
+        cursor = conn.cursor()
+        cursor.execute("SELECT perfil FROM usuarios WHERE id = ?", (user_id,))
+        if cursor.fetchone()['perfil'] == 'medico' and perfil != 'medico':
+            if self._contar_medicos(cursor) <= 1:
+                return False
+        
+        if senha_hash:  # Se forneceu nova senha
+            cursor.execute(
+                "UPDATE usuarios SET perfil = ?, senha = ? WHERE id = ?",
+                (perfil, senha_hash, user_id)
+            )
+        else:  # Sem alteração de senha
+            cursor.execute("UPDATE usuarios SET perfil = ? WHERE id = ?", (perfil, user_id))
+        return True
+    
+    def _remover_usuario(self, conn, user_id):
+        """Trabalho de escrita: exclui um usuário. Retorna False se for o último médico."""
+        cursor = conn.cursor()
+        cursor.execute("SELECT perfil FROM usuarios WHERE id = ?", (user_id,))
+        if cursor.fetchone()['perfil'] == 'medico' and self._contar_medicos(cursor) <= 1:
+            return False
+        
+        cursor.execute("DELETE FROM usuarios WHERE id = ?", (user_id,))
+        return True
+    
     def hash_senha(self, senha):
         """Cria um hash da senha usando SHA-256."""
         return hashlib.sha256(senha.encode()).hexdigest()
@@ -184,14 +213,9 @@ class AdminUsuarios:
             self.tabela.delete(item)
         
         try:
-            # Conectar ao banco
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
             # Buscar usuários
-            cursor.execute("SELECT * FROM usuarios ORDER BY username")
-            usuarios = cursor.fetchall()
+            with self.db.conexao() as conn:
+                usuarios = conn.execute("SELECT * FROM usuarios ORDER BY username").fetchall()
             
             # Adicionar à tabela
             for usuario in usuarios:
@@ -209,8 +233,6 @@ class AdminUsuarios:
                     ultimo_acesso
                 ))
             
-            conn.close()
-            
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao carregar usuários: {str(e)}")
     
@@ -250,29 +272,14 @@ class AdminUsuarios:
                 return
             
             try:
-                # Conectar ao banco
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                # Verificar se usuário já existe
-                cursor.execute("SELECT COUNT(*) FROM usuarios WHERE username = ?", (nome_usuario.get(),))
-                if cursor.fetchone()[0] > 0:
+                # Inserir usuário (a verificação de nome repetido é feita na mesma transação)
+                inserido = self.db.executar_escrita(
+                    self._inserir_usuario, nome_usuario.get(), self.hash_senha(senha.get()), perfil.get()
+                )
+                if not inserido:
                     messagebox.showerror("Erro", "Nome de usuário já existe.")
-                    conn.close()
                     return
                 
-                # Data atual
-                data_atual = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                
-                # Inserir usuário
-                cursor.execute(
-                    "INSERT INTO usuarios (username, senha, perfil, data_criacao) VALUES (?, ?, ?, ?)",
-                    (nome_usuario.get(), self.hash_senha(senha.get()), perfil.get(), data_atual)
-                )
-                
-                conn.commit()
-                conn.close()
-                
                 messagebox.showinfo("Sucesso", "Usuário adicionado com sucesso!")
                 dialog.destroy()
                 self.carregar_usuarios()
@@ -297,16 +304,11 @@ class AdminUsuarios:
         
         try:
             # Buscar dados do usuário
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT * FROM usuarios WHERE id = ?", (user_id,))
-            usuario = cursor.fetchone()
+            with self.db.conexao() as conn:
+                usuario = conn.execute("SELECT * FROM usuarios WHERE id = ?", (user_id,)).fetchone()
             
             if not usuario:
                 messagebox.showerror("Erro", "Usuário não encontrado.")
-                conn.close()
                 return
             
             # Janela de diálogo
@@ -337,26 +339,15 @@ class AdminUsuarios:
             # Função para salvar
             def salvar():
                 try:
-                    # Verificar se está alterando o perfil do último médico
-                    if usuario['perfil'] == 'medico' and perfil.get() != 'medico':
-                        cursor.execute("SELECT COUNT(*) FROM usuarios WHERE perfil = 'medico'")
-                        if cursor.fetchone()[0] <= 1:
-                            messagebox.showerror("Erro", "Não é possível alterar o perfil do último médico.")
-                            return
-                    
-                    # Atualizar usuário
-                    if senha.get():  # Se forneceu nova senha
-                        cursor.execute(
-                            "UPDATE usuarios SET perfil = ?, senha = ? WHERE id = ?",
-                            (perfil.get(), self.hash_senha(senha.get()), user_id)
-                        )
-                    else:  # Sem alteração de senha
-                        cursor.execute(
-                            "UPDATE usuarios SET perfil = ? WHERE id = ?",
-                            (perfil.get(), user_id)
-                        )
+                    # Atualizar usuário (sem deixar o sistema sem nenhum médico)
+                    senha_hash = self.hash_senha(senha.get()) if senha.get() else None
+                    atualizado = self.db.executar_escrita(
+                        self._atualizar_usuario, user_id, perfil.get(), senha_hash
+                    )
+                    if not atualizado:
+                        messagebox.showerror("Erro", "Não é possível alterar o perfil do último médico.")
+                        return
                     
-                    conn.commit()
                     messagebox.showinfo("Sucesso", "Usuário atualizado com sucesso!")
                     dialog.destroy()
                     self.carregar_usuarios()
@@ -368,8 +359,6 @@ class AdminUsuarios:
             tk.Button(frame_botoes, text="Cancelar", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
             tk.Button(frame_botoes, text="Salvar", command=salvar, bg="#2196F3", fg="white").pack(side=tk.LEFT, padx=5)
             
-            conn.close()
-            
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao buscar dados do usuário: {str(e)}")
     
@@ -390,31 +379,14 @@ class AdminUsuarios:
             return
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            # Verificar perfil do usuário
-            cursor.execute("SELECT perfil FROM usuarios WHERE id = ?", (user_id,))
-            perfil = cursor.fetchone()['perfil']
-            
-            # Verificar se é o último médico
-            if perfil == 'medico':
-                cursor.execute("SELECT COUNT(*) FROM usuarios WHERE perfil = 'medico'")
-                if cursor.fetchone()[0] <= 1:
-                    messagebox.showerror("Erro", "Não é possível excluir o último usuário médico.")
-                    conn.close()
-                    return
-            
-            # Excluir usuário
-            cursor.execute("DELETE FROM usuarios WHERE id = ?", (user_id,))
-            conn.commit()
+            # Excluir usuário (sem deixar o sistema sem nenhum médico)
+            if not self.db.executar_escrita(self._remover_usuario, user_id):
+                messagebox.showerror("Erro", "Não é possível excluir o último usuário médico.")
+                return
             
             messagebox.showinfo("Sucesso", f"Usuário '{username}' excluído com sucesso!")
             self.carregar_usuarios()
             
-            conn.close()
-            
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao excluir usuário: {str(e)}")
     
@@ -1,14 +1,31 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import datetime
+import re
 import threading
 
+from server.database import ROTULOS_CAMPOS
+
 class DetalhesPacienteWindow:
     """
     Janela separada (Toplevel) para mostrar os detalhes do paciente de forma organizada.
     """
-    def __init__(self, parent, dados, cores, fontes):
-        """Inicializa a janela de detalhes do paciente"""
+    # Chave dos pedidos de histórico na PonteTkAsyncio (um pedido novo substitui o anterior)
+    CHAVE_HISTORICO = 'historico_paciente'
+    
+    def __init__(self, parent, dados, cores, fontes, adb=None, ponte=None):
+        """
+        Inicializa a janela de detalhes do paciente.
+        
+        Args:
+            parent (tk.Widget): Widget pai da janela.
+            dados (dict): Avaliação no formato de obter_avaliacao.
+            cores (dict): Paleta de cores da interface.
+            fontes (dict): Fontes da interface.
+            adb (AsyncBancoDados, opcional): Banco usado para carregar a evolução do paciente.
+            ponte (PonteTkAsyncio, opcional): Ponte que executa a carga; sem adb e ponte,
+                a evolução não é exibida.
+        """
         # Criar janela
         self.window = tk.Toplevel(parent)
         self.window.title(f"Detalhes - {dados.get('Nombre Completo', 'Paciente')}")
@@ -39,6 +56,15 @@ class DetalhesPacienteWindow:
         # Criar sistema de rolagem
         self.criar_sistema_rolagem()
         
+        # Evolução do paciente (antes das seções da avaliação), carregada em segundo plano
+        self.adb = adb
+        self.ponte = ponte
+        self.avaliacao_id = dados.get('id')
+        self.frame_historico = None
+        if adb is not None and ponte is not None and dados.get('paciente_id'):
+            self._criar_area_historico()
+            self.carregar_historico(dados['paciente_id'])
+        
         # Preencher com os dados do paciente em uma thread
         threading.Thread(target=self.exibir_dados_paciente, daemon=True).start()
         
@@ -99,6 +125,146 @@ class DetalhesPacienteWindow:
         except:
             return data_str
     
+    def _criar_area_historico(self):
+        """Cria a seção da evolução do paciente, com um aviso até os dados chegarem"""
+        self.frame_historico = tk.Frame(
+            self.frame_conteudo,
+            bg=self.cores["secao_bg"],
+            bd=1,
+            relief=tk.RIDGE,
+            borderwidth=2
+        )
+        self.frame_historico.pack(fill=tk.X, expand=False, padx=10, pady=8)
+        
+        self.label_carregando_historico = tk.Label(
+            self.frame_historico,
+            text="Carregando evolução do paciente...",
+            bg=self.cores["secao_bg"],
+            fg=self.cores["texto_rotulo"],
+            font=self.fontes["campo"],
+            pady=10
+        )
+        self.label_carregando_historico.pack(anchor="w", padx=15)
+    
+    def carregar_historico(self, paciente_id):
+        """Pede ao banco, em segundo plano, todas as avaliações do paciente (uma consulta)"""
+        self.ponte.executar(
+            self.adb.historico_paciente(paciente_id),
+            ao_concluir=self.exibir_historico,
+            ao_falhar=self._falha_historico,
+            chave=self.CHAVE_HISTORICO
+        )
+    
+    def _janela_aberta(self):
+        """Indica se a janela e a área de evolução ainda existem"""
+        try:
+            return self.frame_historico is not None and bool(self.window.winfo_exists())
+        except tk.TclError:
+            return False
+    
+    def _falha_historico(self, erro):
+        """Mostra o erro de carga no lugar da evolução"""
+        print(f"Erro ao carregar o histórico do paciente: {erro}")
+        if self._janela_aberta():
+            self.label_carregando_historico.config(text="Não foi possível carregar a evolução do paciente.")
+    
+    @staticmethod
+    def _grau_forca(valor):
+        """Extrai o grau da força muscular ('Grado 3: ...' -> '3') para a tabela"""
+        if isinstance(valor, list):
+            valor = ", ".join(str(item) for item in valor)
+        if not valor:
+            return ""
+        graus = re.findall(r'Grado\s*(\d)', str(valor))
+        return ", ".join(graus) if graus else str(valor)
+    
+    def exibir_historico(self, historico):
+        """Exibe a evolução: gráfico da EVA e tabela com uma linha por avaliação"""
+        if not self._janela_aberta():
+            return
+        
+        # Com uma só avaliação não há evolução a mostrar
+        if len(historico) < 2:
+            self.frame_historico.pack_forget()
+            return
+        
+        self.label_carregando_historico.destroy()
+        
+        # Título da seção
+        frame_titulo = tk.Frame(self.frame_historico, bg=self.cores["titulo_bg"])
+        frame_titulo.pack(fill=tk.X)
+        tk.Label(
+            frame_titulo,
+            text=f"EVOLUÇÃO DO PACIENTE ({len(historico)} avaliações)",
+            bg=self.cores["titulo_bg"],
+            fg=self.cores["texto_destaque"],
+            font=self.fontes["subtitulo_secao"],
+            padx=15,
+            pady=10
+        ).pack(side=tk.LEFT, padx=5)
+        
+        self._desenhar_grafico_eva(historico)
+        
+        # Tabela com os campos acompanhados em cada avaliação
+        colunas = ("data", "eva", "forca", "sessoes", "criterio")
+        tabela = ttk.Treeview(
+            self.frame_historico,
+            columns=colunas,
+            show="headings",
+            height=min(len(historico), 10),
+            selectmode="none"
+        )
+        for coluna, titulo, largura in (
+                ("data", "Data", 100), ("eva", "EVA", 60), ("forca", "Grau de Força", 110),
+                ("sessoes", "Sessões/Semana", 120), ("criterio", "Critério de Revisão", 300)):
+            tabela.heading(coluna, text=titulo)
+            tabela.column(coluna, width=largura, stretch=(coluna == "criterio"),
+                          anchor=tk.W if coluna == "criterio" else tk.CENTER)
+        tabela.tag_configure("atual", background=self.cores["titulo_bg"],
+                             foreground=self.cores["texto_destaque"])
+        
+        for item in historico:
+            tabela.insert("", tk.END, values=(
+                self._formatar_data(item.get("data_avaliacao") or ""),
+                "" if item.get("escala_eva") is None else item["escala_eva"],
+                self._grau_forca(item.get("Fuerza Muscular")),
+                item.get("sesiones_semana") or "",
+                item.get("criterio_revision") or ""
+            ), tags=("atual",) if item["id"] == self.avaliacao_id else ())
+        tabela.pack(fill=tk.X, padx=20, pady=(5, 15))
+    
+    def _desenhar_grafico_eva(self, historico):
+        """Desenha a EVA de cada avaliação em um único Canvas (linha com um ponto por avaliação)"""
+        pontos = [(i, item["escala_eva"]) for i, item in enumerate(historico)
+                  if isinstance(item.get("escala_eva"), (int, float))]
+        if not pontos:
+            return
+        
+        largura, altura = 600, 160
+        margem_x, margem_y = 40, 20
+        canvas = tk.Canvas(self.frame_historico, width=largura, height=altura,
+                           bg=self.cores["secao_bg"], highlightthickness=0)
+        canvas.pack(anchor="w", padx=20, pady=(10, 0))
+        
+        # Eixo da escala (0 a 10) com linhas de referência
+        for nivel in (0, 5, 10):
+            y = altura - margem_y - (altura - 2 * margem_y) * nivel / 10
+            canvas.create_line(margem_x, y, largura - 10, y, fill=self.cores["separador"], dash=(2, 4))
+            canvas.create_text(margem_x - 8, y, text=str(nivel), anchor="e",
+                               fill=self.cores["texto_rotulo"], font=self.fontes["campo"])
+        
+        passo = (largura - margem_x - 20) / max(1, len(historico) - 1)
+        coordenadas = [
+            (margem_x + 10 + i * passo, altura - margem_y - (altura - 2 * margem_y) * min(max(eva, 0), 10) / 10, eva)
+            for i, eva in pontos
+        ]
+        if len(coordenadas) > 1:
+            canvas.create_line(*[valor for x, y, _ in coordenadas for valor in (x, y)],
+                               fill=self.cores["primaria"], width=2)
+        for x, y, eva in coordenadas:
+            cor = "#4CAF50" if eva < 4 else "#FF9800" if eva < 7 else "#F44336"
+            canvas.create_oval(x - 4, y - 4, x + 4, y + 4, fill=cor, outline=cor)
+    
     def exibir_dados_paciente(self):
         """"Exibe os dados do paciente de forma organizada"""
         # Verificar a flag e se a janela ainda existe
@@ -108,69 +274,6 @@ class DetalhesPacienteWindow:
         except:
             return
         
-        # Mapeamento de campos para nomes mais amigáveis em português
-        mapeamento_campos = {
-            "Nombre Completo": "Nome Completo",
-            "Edad": "Idade",
-            "Genero": "Gênero",
-            "Contacto": "Contato",
-            "Fecha Nasc.": "Data de Nascimento",
-            "Área de consulta": "Área de Consulta",
-            "Alergias": "Alergias",
-            "data_avaliacao": "Data da Avaliação",
-            "Motivo de consulta": "Motivo da Consulta",
-            "Antecedentes": "Antecedentes",
-            "Efermedad actual": "Doença Atual",
-            "Cirurgías previas": "Cirurgias Prévias",
-            "Medicamentos actuales": "Medicamentos Atuais",
-            "PA": "Pressão Arterial",
-            "Pulso": "Pulso",
-            "Talla": "Altura",
-            "Peso": "Peso",
-            "T": "Temperatura",
-            "FR": "Frequência Respiratória",
-            "Sat.O2": "Saturação de O2",
-            "IDx": "Diagnóstico",
-            "Conducta": "Conduta",
-            "Postura": "Postura",
-            "Simetría corporal": "Simetria Corporal",
-            "Deformidades aparentes": "Deformidades Aparentes",
-            "Puntos dolorosos": "Pontos Dolorosos",
-            "Tensión muscular": "Tensão Muscular",
-            "Curvas Fisiológicas": "Curvas Fisiológicas",
-            "Presencia de Escoliosis": "Presença de Escoliose",
-            "Cifosis o Lordosis": "Cifose ou Lordose",
-            "Movimiento Activo": "Movimento Ativo",
-            "Movimiento Pasivo": "Movimento Passivo",
-            "Evaluación de articulaciones": "Avaliação de Articulações",
-            "Fuerza Muscular": "Força Muscular",
-            "Evaluación de grupos musculares": "Avaliação de Grupos Musculares",
-            "Reflejos": "Reflexos",
-            "Coordinación motora": "Coordenação Motora",
-            "Equilibrio": "Equilíbrio",
-            "Capacidad para realizar actividades diarias": "Capacidade para Atividades Diárias",
-            "Limitaciones y dificultades": "Limitações e Dificuldades",
-            "Ejercicios con dedos": "Exercícios com Dedos",
-            "Precisión en movimientos": "Precisão nos Movimentos",
-            "Marcha": "Marcha",
-            "Equilibrio Dinámico": "Equilíbrio Dinâmico",
-            "Pruebas ortopédicas": "Testes Ortopédicos",
-            "Pruebas neurológicas": "Testes Neurológicos",
-            "Pruebas de estabilidad": "Testes de Estabilidade",
-            "escala_eva": "Escala de Dor (EVA)",
-            "observaciones_dolor": "Observações sobre a Dor",
-            "Resumen del problema": "Resumo do Problema",
-            "Objetivos del tratamiento": "Objetivos do Tratamento",
-            "sesiones_semana": "Sessões por Semana",
-            "duracion_sesion": "Duração da Sessão",
-            "obs_frecuencia": "Observações de Frequência",
-            "Ejercicios recomendados": "Exercícios Recomendados",
-            "programacion_seguimiento": "Programação de Seguimento",
-            "fecha_evaluacion": "Data da Próxima Avaliação",
-            "criterio_revision": "Critério de Revisão",
-            "criterios_adicionales": "Critérios Adicionais"
-        }
-        
         # Criar uma lista ordenada de todas as seções e seus campos
         secoes = [
             {
@@ -316,7 +419,7 @@ class DetalhesPacienteWindow:
                     for j, campo in enumerate(subsecao['campos']):
                         if self.dados.get(campo):
                             # Usar o nome traduzido se disponível
-                            nome_campo = mapeamento_campos.get(campo, campo)
+                            nome_campo = ROTULOS_CAMPOS.get(campo, campo)
                             
                             # Label do campo
                             label_campo = tk.Label(
@@ -479,7 +582,7 @@ class DetalhesPacienteWindow:
                             # Para campos normais
                             elif campo != 'duracion_sesion':  # Evitando duplicação do campo duração
                                 # Usar o nome traduzido se disponível
-                                nome_campo = mapeamento_campos.get(campo, campo)
+                                nome_campo = ROTULOS_CAMPOS.get(campo, campo)
                                 
                                 # Label do campo
                                 label_campo = tk.Label(
@@ -630,6 +733,11 @@ class DetalhesPacienteWindow:
         # Indicar à thread que deve parar
         self._thread_running = False 
         
+        # Descartar a carga da evolução, se ainda estiver pendente
+        if self.ponte is not None:
+            self.ponte.cancelar(self.CHAVE_HISTORICO)
+        self.frame_historico = None
+        
         # Desvincular eventos de rolagem
         try:
             self.window.unbind("<MouseWheel>")
@@ -485,13 +485,20 @@ class FormularioFisioterapia:
         self.checkbuttons = []
         self.radio_buttons = {}
         
-        # Rastrear alterações para perguntar antes de sair
-        self.modificado = False
+        # Rastrear alterações por campo: valores da última carga/gravação,
+        # comparados com os atuais para saber o que perguntar antes de sair
+        # e o que regravar ao editar uma avaliação existente
+        self.avaliacao_id = None  # Avaliação em edição (None = avaliação nova)
+        self.valores_salvos = {}
+        self.editado = False
         
         # Configurar o formulário
         self.configurar_formulario()
 
         self.aplicar_ajustes_todos_campos()
+        
+        # Valores iniciais dos campos são o ponto de comparação das alterações
+        self.redefinir_alteracoes()
 
     def criar_sistema_rolagem(self):
         """Cria o sistema de rolagem para o formulário"""
@@ -685,6 +692,9 @@ class FormularioFisioterapia:
                     if frame.winfo_exists():
                         frame.after(10, lambda: label_carregando.destroy())
                         
+                    # Campos criados agora partem do valor inicial, não contam como alterados
+                    self.registrar_valores_iniciais()
+                    
                     # Marcar como carregado
                     self.frames_avaliacao[key]['carregado'] = True
                     self.aplicar_ajustes_todos_campos()
@@ -2548,8 +2558,106 @@ class FormularioFisioterapia:
         return campo
     
     def marcar_modificado(self, evento=None):
-        """Marca o formulário como modificado"""
-        self.modificado = True
+        """Registra que algum campo foi editado (os campos são apurados em campos_modificados)"""
+        self.editado = True
+    
+    @property
+    def modificado(self):
+        """True se algum campo difere da última carga ou gravação."""
+        return self.editado and bool(self.campos_modificados())
+    
+    @modificado.setter
+    def modificado(self, valor):
+        # "modificado = False" passa a ser o novo ponto de comparação
+        if valor:
+            self.editado = True
+        else:
+            self.redefinir_alteracoes()
+    
+    def coletar_dados(self):
+        """
+        Lê o valor atual de todos os campos já criados.
+        
+        Returns:
+            dict: Valores por etiqueta do campo.
+        """
+        dados = {}
+        
+        # Processar os campos de texto
+        for etiqueta, campo in self.campos.items():
+            if hasattr(campo, 'obter'):
+                dados[etiqueta] = campo.obter()
+            elif isinstance(campo, DateEntry):
+                dados[etiqueta] = campo.get_date().strftime('%d/%m/%Y')
+            elif isinstance(campo, tk.Scale):
+                dados[etiqueta] = int(campo.get())
+            elif isinstance(campo, tk.StringVar):
+                dados[etiqueta] = campo.get()
+        
+        # Processar radio button para força muscular (aba carregada sob demanda)
+        if "grado_fuerza" in self.radio_buttons:
+            dados['Fuerza Muscular'] = self.radio_buttons["grado_fuerza"].get()
+        
+        # Processar radio buttons
+        for var_name, var in self.radio_buttons.items():
+            dados[var_name] = var.get()
+        
+        return dados
+    
+    def campos_modificados(self, dados=None):
+        """
+        Campos cujo valor difere da última carga ou gravação.
+        
+        Args:
+            dados (dict): Valores atuais; coletados do formulário se omitidos.
+            
+        Returns:
+            set: Etiquetas dos campos alterados.
+        """
+        if dados is None:
+            dados = self.coletar_dados()
+        return {
+            etiqueta for etiqueta, valor in dados.items()
+            if etiqueta not in self.valores_salvos or self.valores_salvos[etiqueta] != valor
+        }
+    
+    def redefinir_alteracoes(self, dados=None):
+        """
+        Marca os valores atuais como gravados (nenhum campo alterado).
+        
+        Args:
+            dados (dict): Valores atuais; coletados do formulário se omitidos.
+        """
+        self.valores_salvos = dict(dados) if dados is not None else self.coletar_dados()
+        self.editado = False
+    
+    def registrar_valores_iniciais(self):
+        """Guarda o valor inicial dos campos criados depois da última carga (abas sob demanda)."""
+        for etiqueta, valor in self.coletar_dados().items():
+            self.valores_salvos.setdefault(etiqueta, valor)
+    
+    def gravar_avaliacao(self, db, dados):
+        """
+        Grava os dados no banco: cria uma avaliação nova ou, se uma avaliação
+        existente estiver em edição, regrava apenas os campos alterados.
+        
+        Args:
+            db (BancoDadosFisioterapia): Banco de dados.
+            dados (dict): Valores atuais do formulário.
+            
+        Returns:
+            int: ID da avaliação gravada.
+        """
+        if self.avaliacao_id is None:
+            avaliacao_id = db.salvar_avaliacao(dados)
+        else:
+            alteracoes = {etiqueta: dados[etiqueta] for etiqueta in self.campos_modificados(dados)}
+            if not db.atualizar_avaliacao(self.avaliacao_id, alteracoes, parcial=True):
+                raise RuntimeError(f"No se pudo actualizar la evaluación {self.avaliacao_id}")
+            avaliacao_id = self.avaliacao_id
+        
+        self.redefinir_alteracoes(dados)
+        return avaliacao_id
     
     def confirmar_limpar_formulario(self):
         """Confirma antes de limpar o formulário"""
@@ -2594,8 +2702,9 @@ class FormularioFisioterapia:
             else:
                 var.set("")
         
-        # Resetar flag de modificação
-        self.modificado = False
+        # Formulário limpo é uma avaliação nova, sem alterações
+        self.avaliacao_id = None
+        self.redefinir_alteracoes()
         
         # Feedback visual com estilo melhorado
         messagebox.showinfo(
@@ -2608,64 +2717,20 @@ class FormularioFisioterapia:
         """Salva os dados do formulário e atualiza a aba de clientes"""
         try:
             # Coletar todos os dados
-            dados = {}
-            
-            # Processar os campos de texto
-            for etiqueta, campo in self.campos.items():
-                if hasattr(campo, 'obter'):
-                    dados[etiqueta] = campo.obter()
-                elif isinstance(campo, DateEntry):
-                    dados[etiqueta] = campo.get_date().strftime('%d/%m/%Y')
-                elif isinstance(campo, tk.Scale):
-                    dados[etiqueta] = int(campo.get())
-                elif isinstance(campo, tk.StringVar):
-                    dados[etiqueta] = campo.get()
-            
-            # Processar os checkbuttons
-            forca_muscular = []
-            for (check, var) in self.checkbuttons:
-                if var.get():
-                    forca_muscular.append(check.cget('text'))
-            
-            # Processar radio button para força muscular
-            dados['Fuerza Muscular'] = self.radio_buttons["grado_fuerza"].get()
-            
-            # Processar radio buttons
-            for var_name, var in self.radio_buttons.items():
-                dados[var_name] = var.get()
+            dados = self.coletar_dados()
             
             # Inicializar banco de dados
             db = BancoDadosFisioterapia()
             
-            # Salvar no banco de dados
-            avaliacao_id = db.salvar_avaliacao(dados)
-            
-            # Resetar flag de modificação
-            self.modificado = False
+            # Salvar no banco de dados (em edição, só os campos alterados)
+            avaliacao_id = self.gravar_avaliacao(db, dados)
             
-            # Se estivermos no contexto de uma aplicação integrada, atualizar a aba de clientes
+            # A aba de clientes atualiza a própria lista pelo aviso de alteração do
+            # banco; no contexto de uma aplicação integrada, basta exibi-la
             try:
-                # Obter acesso ao notebook
-                parent = self.frame.master
-                
-                # Procurar a aba de clientes
-                for index in range(parent.index('end')):
-                    tab_name = parent.tab(index, "text")
-                    if tab_name == "Clientes":
-                        # Encontrar a instância da AbaClientes
-                        aba_clientes_frame = parent.winfo_children()[index]
-                        if hasattr(aba_clientes_frame, 'winfo_children') and aba_clientes_frame.winfo_children():
-                            for widget in aba_clientes_frame.winfo_children():
-                                if hasattr(widget, 'carregar_pacientes'):
-                                    # Se encontrarmos o método carregar_pacientes, chamamos ele
-                                    widget.carregar_pacientes()
-                                    break
-                            
-                # Alterar para a aba de clientes
-                parent.select(0)  # Assumindo que a aba de clientes é a primeira
-                
+                self.frame.master.select(0)  # Assumindo que a aba de clientes é a primeira
             except Exception as e:
-                print(f"Aviso: Não foi possível atualizar a aba de clientes: {e}")
+                print(f"Aviso: Não foi possível exibir a aba de clientes: {e}")
             
             # Mostrar mensagem de sucesso
             messagebox.showinfo(
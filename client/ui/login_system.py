@@ -1,9 +1,14 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
 import hashlib
 import datetime
 import os
+import sys
+
+# Adiciona o diretório raiz do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from server.database import BancoDadosFisioterapia
 
 class LoginSystem:
     """Sistema de login simples usando banco de dados SQLite."""
@@ -14,6 +19,7 @@ class LoginSystem:
         self.root = root
         self.callback_sucesso = callback_sucesso
         self.db_path = db_path
+        self.db = BancoDadosFisioterapia(db_path)
         
         # Esconder janela principal
         if hasattr(self.root, 'withdraw'):
@@ -43,56 +49,31 @@ class LoginSystem:
         self.janela_login.focus_force()
     
     def verificar_banco_dados(self):
-        """Verifica se o banco de dados e a tabela de usuários existem."""
+        """Garante que existam usuários para o primeiro acesso (a tabela é criada pelas migrações)."""
         try:
-            # Verificar se o banco existe
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Verificar se a tabela de usuários existe
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='usuarios'")
-            if not cursor.fetchone():
-                # Criar tabela
-                cursor.execute('''
-                CREATE TABLE IF NOT EXISTS usuarios (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    senha TEXT NOT NULL,
-                    perfil TEXT NOT NULL,
-                    ultimo_acesso TEXT,
-                    data_criacao TEXT
-                )
-                ''')
-                
-                # Criar usuários padrão
-                data_atual = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                
-                # Admin
-                cursor.execute(
-                    "INSERT INTO usuarios (username, senha, perfil, data_criacao) VALUES (?, ?, ?, ?)",
-                    ('admin', self.hash_senha('admin123'), 'medico', data_atual)
-                )
-                
-                # Médico
-                cursor.execute(
-                    "INSERT INTO usuarios (username, senha, perfil, data_criacao) VALUES (?, ?, ?, ?)",
-                    ('medico', self.hash_senha('medico123'), 'medico', data_atual)
-                )
-                
-                # Recepcionista
-                cursor.execute(
-                    "INSERT INTO usuarios (username, senha, perfil, data_criacao) VALUES (?, ?, ?, ?)",
-                    ('recepcao', self.hash_senha('recepcao123'), 'recepcionista', data_atual)
-                )
-                
-                conn.commit()
-                print("Tabela de usuários criada com sucesso!")
-            
-            conn.close()
-            
+            self.db.executar_escrita(self._criar_usuarios_padrao)
         except Exception as e:
             print(f"Erro ao verificar banco de dados: {e}")
     
+    def _criar_usuarios_padrao(self, conn):
+        """Trabalho de escrita: cria os usuários padrão se a tabela de usuários estiver vazia."""
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM usuarios")
+        if cursor.fetchone()[0] > 0:
+            return
+        
+        # Criar usuários padrão
+        data_atual = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        cursor.executemany(
+            "INSERT INTO usuarios (username, senha, perfil, data_criacao) VALUES (?, ?, ?, ?)",
+            [
+                ('admin', self.hash_senha('admin123'), 'medico', data_atual),          # Admin
+                ('medico', self.hash_senha('medico123'), 'medico', data_atual),        # Médico
+                ('recepcao', self.hash_senha('recepcao123'), 'recepcionista', data_atual),  # Recepcionista
+            ]
+        )
+        print("Usuários padrão criados com sucesso!")
+    
     def hash_senha(self, senha):
         """Cria um hash da senha usando SHA-256."""
         return hashlib.sha256(senha.encode()).hexdigest()
@@ -155,34 +136,28 @@ class LoginSystem:
             return
         
         try:
-            # Conectar ao banco
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
             # Buscar usuário
-            cursor.execute("SELECT * FROM usuarios WHERE username = ?", (usuario,))
-            user = cursor.fetchone()
+            with self.db.conexao() as conn:
+                user = conn.execute("SELECT * FROM usuarios WHERE username = ?", (usuario,)).fetchone()
             
             # Verificar se usuário existe
             if not user:
                 messagebox.showerror("Erro", "Usuário não encontrado.")
-                conn.close()
                 return
             
             # Verificar senha
             if self.hash_senha(senha) != user['senha']:
                 messagebox.showerror("Erro", "Senha incorreta.")
-                conn.close()
                 return
             
-            # Registrar acesso
+            # Registrar acesso sem esperar pela gravação (feita pelo escritor do banco)
             data_atual = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            cursor.execute(
-                "UPDATE usuarios SET ultimo_acesso = ? WHERE id = ?",
-                (data_atual, user['id'])
+            futuro = self.db.enviar_escrita(
+                lambda conn: conn.execute(
+                    "UPDATE usuarios SET ultimo_acesso = ? WHERE id = ?", (data_atual, user['id'])
+                ).rowcount
             )
-            conn.commit()
+            futuro.add_done_callback(self._conferir_registro_acesso)
             
             # Montar dados do usuário para retorno
             dados_usuario = {
@@ -192,8 +167,6 @@ class LoginSystem:
                 'perfil': user['perfil']
             }
             
-            conn.close()
-            
             # Fechar janela de login e mostrar janela principal
             self.janela_login.destroy()
             if hasattr(self.root, 'deiconify'):
@@ -206,6 +179,12 @@ class LoginSystem:
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao fazer login: {str(e)}")
     
+    def _conferir_registro_acesso(self, futuro):
+        """Registra no console falhas ao gravar o último acesso (não impedem o login)."""
+        erro = futuro.exception()
+        if erro is not None:
+            print(f"Erro ao registrar último acesso: {erro}")
+    
     def ao_fechar(self):
         """Ação ao fechar a janela de login."""
         try:
@@ -0,0 +1,166 @@
+"""
+Ponte entre a interface Tk e corrotinas asyncio.
+
+O Tk exige que os widgets sejam usados apenas na thread do mainloop, então as
+corrotinas rodam em um loop asyncio numa thread própria e o resultado volta para
+a thread da interface por um evento virtual, sem verificar filas com after().
+
+Uso:
+    ponte = PonteTkAsyncio(frame)
+    ponte.executar(adb.buscar_texto(termo), ao_concluir=self.mostrar_resultados,
+                   chave='pesquisa')
+"""
+import asyncio
+import concurrent.futures
+import queue
+import threading
+import tkinter as tk
+
+
+class PonteTkAsyncio:
+    """
+    Executa corrotinas em um loop asyncio em segundo plano e chama os callbacks
+    na thread do Tk.
+
+    Uma corrotina pode aguardar várias chamadas em sequência (ex.: obter a
+    avaliação e depois o histórico); só o resultado final chega à interface.
+    """
+
+    EVENTO = '<<ResultadoAsync>>'
+
+    def __init__(self, widget):
+        """
+        Args:
+            widget (tk.Misc): Widget que recebe o evento de entrega dos resultados.
+                Se for destruído, os resultados pendentes são descartados.
+        """
+        self.widget = widget
+        self.fechado = False
+
+        self._resultados = queue.SimpleQueue()
+        self._tarefas = {}  # chave -> tarefa mais recente (usado só na thread do Tk)
+
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._executar_loop, name='PonteTkAsyncio', daemon=True)
+        self._thread.start()
+
+        widget.bind(self.EVENTO, self._entregar, add='+')
+
+    def _executar_loop(self):
+        """Roda o loop asyncio até fechar() e cancela as tarefas que sobrarem."""
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+            pendentes = asyncio.all_tasks(self.loop)
+            for tarefa in pendentes:
+                tarefa.cancel()
+            self.loop.run_until_complete(asyncio.gather(*pendentes, return_exceptions=True))
+        finally:
+            self.loop.close()
+
+    def executar(self, corrotina, ao_concluir=None, ao_falhar=None, chave=None):
+        """
+        Agenda uma corrotina no loop da ponte (chamar na thread do Tk).
+
+        Args:
+            corrotina (coroutine): Corrotina a executar, ex.: adb.obter_avaliacao(10).
+            ao_concluir (callable, opcional): Chamado com o resultado, na thread do Tk.
+            ao_falhar (callable, opcional): Chamado com a exceção, na thread do Tk;
+                sem ele, o erro é apenas impresso.
+            chave (str, opcional): Identifica pedidos que se substituem (ex.: 'pesquisa').
+                Um novo pedido com a mesma chave cancela o anterior, e o resultado de
+                um pedido substituído nunca é entregue.
+
+        Returns:
+            concurrent.futures.Future: Permite cancelar a execução; None se a ponte
+            já estiver fechada.
+        """
+        if self.fechado:
+            corrotina.close()
+            return None
+
+        if chave is not None:
+            self.cancelar(chave)
+
+        futuro = asyncio.run_coroutine_threadsafe(corrotina, self.loop)
+        if chave is not None:
+            self._tarefas[chave] = futuro
+        futuro.add_done_callback(
+            lambda f: self._concluido(f, chave, ao_concluir, ao_falhar)
+        )
+        return futuro
+
+    def chamar_na_interface(self, callback, valor):
+        """
+        Chama callback(valor) na thread do Tk (pode ser chamado de qualquer thread),
+        pela mesma entrega dos resultados das corrotinas.
+
+        Usado por avisos que chegam de outras threads, como os do MonitorAlteracoes.
+        """
+        if self.fechado:
+            return
+        futuro = concurrent.futures.Future()
+        futuro.set_result(valor)
+        self._concluido(futuro, None, callback, None)
+
+    def cancelar(self, chave):
+        """Cancela o pedido pendente com a chave informada, se houver."""
+        anterior = self._tarefas.pop(chave, None)
+        if anterior is not None:
+            anterior.cancel()
+
+    def _concluido(self, futuro, chave, ao_concluir, ao_falhar):
+        """Enfileira o resultado e acorda a thread do Tk (roda na thread do loop)."""
+        if futuro.cancelled() or self.fechado:
+            return
+
+        self._resultados.put((futuro, chave, ao_concluir, ao_falhar))
+        try:
+            # O Tcl repassa o evento para a thread do mainloop
+            self.widget.event_generate(self.EVENTO, when='tail')
+        except (tk.TclError, RuntimeError):
+            # Widget destruído ou mainloop encerrado: não há a quem entregar
+            pass
+
+    def _entregar(self, evento=None):
+        """Chama os callbacks dos pedidos concluídos (roda na thread do Tk)."""
+        while True:
+            try:
+                futuro, chave, ao_concluir, ao_falhar = self._resultados.get_nowait()
+            except queue.Empty:
+                return
+
+            if chave is not None:
+                # Concluído, mas substituído antes da entrega
+                if self._tarefas.get(chave) is not futuro:
+                    continue
+                del self._tarefas[chave]
+
+            try:
+                erro = futuro.exception()
+                if erro is None:
+                    if ao_concluir:
+                        ao_concluir(futuro.result())
+                elif ao_falhar:
+                    ao_falhar(erro)
+                else:
+                    print(f"Erro em tarefa assíncrona: {erro}")
+            except Exception as e:
+                print(f"Erro ao entregar resultado assíncrono: {e}")
+
+    def fechar(self):
+        """Cancela os pedidos pendentes e encerra o loop da ponte."""
+        if self.fechado:
+            return
+        self.fechado = True
+
+        for futuro in list(self._tarefas.values()):
+            futuro.cancel()
+        self._tarefas.clear()
+
+        try:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        except RuntimeError:
+            pass  # Loop já encerrado
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
@@ -0,0 +1,366 @@
+"""
+Análise de desfechos: evolução da dor (EVA) e resposta à frequência do tratamento.
+
+As colunas usadas (paciente, data, EVA, sessões por semana e duração da sessão)
+são lidas de uma vez, na mesma transação, e convertidas em arrays do NumPy; as
+contas são feitas sobre os arrays inteiros, sem laços em Python por avaliação ou
+paciente.
+
+O resultado fica guardado até o banco mudar: cada AnaliseDesfechos tem uma conexão
+própria e compara o PRAGMA data_version dela, que muda a cada commit feito por
+outra conexão (o escritor do banco, outra estação), com o da última análise.
+
+O NumPy é opcional: sem ele, só esta análise fica indisponível.
+
+Uso:
+    resultados = obter_analise("fisioterapia.db").resultados()
+"""
+import os
+import sqlite3
+import sys
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.database import abrir_conexao
+
+
+# Percentis mensais da EVA calculados por padrão
+PERCENTIS_PADRAO = (25, 50, 75, 90)
+
+# Cada coluna vem em um único texto "v1,v2,..." (group_concat), convertido pelo
+# NumPy sem criar um objeto Python por valor: ler linha a linha pelo sqlite3
+# custava mais que todo o resto da análise. Os agregados de uma mesma consulta
+# percorrem as linhas juntos, então as colunas de uma tabela ficam alinhadas
+# desde que nenhum valor seja NULL (group_concat os pula): cada consulta filtra
+# as colunas que podem ser NULL ou troca o NULL por 0. As tabelas são alinhadas
+# entre si pelo id da avaliação. Sessões e duração ('60 minutos' -> 60) são
+# inteiros; vazios viram 0 e depois NaN.
+_LEITURAS = (
+    ('''
+    SELECT group_concat(id), group_concat(paciente_id), group_concat(strftime('%s', data_avaliacao))
+    FROM avaliacoes
+    WHERE strftime('%s', data_avaliacao) IS NOT NULL AND paciente_id IS NOT NULL
+    ''', ('id', 'paciente_id', 'segundos')),
+    ('''
+    SELECT group_concat(avaliacao_id), group_concat(CAST(eva_valor AS INTEGER))
+    FROM escalas_dolor
+    WHERE eva_valor IS NOT NULL AND avaliacao_id IS NOT NULL
+    ''', ('avaliacao_id', 'eva')),
+    ('''
+    SELECT group_concat(avaliacao_id),
+           group_concat(IFNULL(CAST(NULLIF(sesiones_semana, '') AS INTEGER), 0)),
+           group_concat(IFNULL(CAST(NULLIF(duracion_sesion, '') AS INTEGER), 0))
+    FROM plan_tratamiento
+    WHERE avaliacao_id IS NOT NULL
+    ''', ('avaliacao_id', 'sesiones_semana', 'duracion_sesion')),
+)
+
+# Uma análise por arquivo de banco, compartilhada por todas as threads
+_analises = {}
+_analises_lock = threading.Lock()
+
+
+def _exigir_numpy():
+    """
+    Raises:
+        ImportError: Se o NumPy não estiver instalado.
+    """
+    if np is None:
+        raise ImportError("A análise de desfechos requer o NumPy (pip install numpy)")
+
+
+def _ler_colunas(cursor, sql, nomes):
+    """
+    Executa uma das _LEITURAS e converte cada texto concatenado em um array de inteiros.
+
+    Raises:
+        ValueError: Se os arrays da consulta não tiverem o mesmo tamanho (algum
+            valor NULL foi pulado e as colunas ficariam desalinhadas).
+    """
+    linha = cursor.execute(sql).fetchone()
+    colunas = {
+        nome: np.fromstring(texto, dtype=np.int64, sep=',') if texto else np.zeros(0, dtype=np.int64)
+        for nome, texto in zip(nomes, linha)
+    }
+    tamanhos = {nome: len(coluna) for nome, coluna in colunas.items()}
+    if len(set(tamanhos.values())) > 1:
+        raise ValueError(f"Colunas da análise desalinhadas: {tamanhos}")
+    return colunas
+
+
+def _alinhar(ids, avaliacao_ids, valores):
+    """Distribui os valores de uma seção pelas posições das avaliações em ids (ordenado)."""
+    coluna = np.full(len(ids), np.nan)
+    posicoes = np.searchsorted(ids, avaliacao_ids)
+    existentes = posicoes < len(ids)
+    existentes[existentes] = ids[posicoes[existentes]] == avaliacao_ids[existentes]
+    coluna[posicoes[existentes]] = valores[existentes]
+    return coluna
+
+
+def carregar_colunas(conn):
+    """
+    Lê as colunas da análise: uma consulta por tabela, no mesmo instantâneo do banco.
+
+    Args:
+        conn (sqlite3.Connection): Conexão aberta com o banco.
+
+    Returns:
+        dict: Arrays 'paciente_id', 'dia' (dias desde 1970-01-01, com fração),
+        'mes' (ano * 12 + mês - 1), 'eva', 'sesiones_semana' e 'duracion_sesion'
+        (minutos), um item por avaliação, em ordem de paciente e data. Valores
+        ausentes são NaN; avaliações com data inválida ou sem paciente ficam de fora.
+
+    Raises:
+        ValueError: Se as colunas de uma consulta vierem desalinhadas.
+    """
+    _exigir_numpy()
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    iniciou = not conn.in_transaction
+    try:
+        if iniciou:
+            # Sem uma transação, um commit entre as leituras misturaria dois estados do banco
+            cursor.execute('BEGIN')
+        avaliacoes, dor, plano = (_ler_colunas(cursor, sql, nomes) for sql, nomes in _LEITURAS)
+    finally:
+        if iniciou:
+            conn.commit()
+        cursor.close()
+
+    # O SQLite pode ler avaliacoes pelo índice (paciente_id, data_avaliacao), em
+    # outra ordem; _alinhar precisa dos ids em ordem
+    ordem = np.argsort(avaliacoes['id'], kind='stable')
+    ids = avaliacoes['id'][ordem]
+    segundos = avaliacoes['segundos'][ordem]
+    colunas = {
+        'paciente_id': avaliacoes['paciente_id'][ordem],
+        'dia': segundos / 86400,
+        'mes': segundos.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64) + 1970 * 12,
+        'eva': _alinhar(ids, dor['avaliacao_id'], dor['eva']),
+        'sesiones_semana': _alinhar(ids, plano['avaliacao_id'], plano['sesiones_semana']),
+        'duracion_sesion': _alinhar(ids, plano['avaliacao_id'], plano['duracion_sesion']),
+    }
+    for nome in ('sesiones_semana', 'duracion_sesion'):
+        colunas[nome][colunas[nome] <= 0] = np.nan
+
+    ordem = np.lexsort((ids, segundos, colunas['paciente_id']))
+    return {nome: coluna[ordem] for nome, coluna in colunas.items()}
+
+
+def _evolucao_eva(colunas):
+    """Primeira e última EVA de cada paciente com duas ou mais avaliações com EVA."""
+    com_eva = ~np.isnan(colunas['eva'])
+    paciente = colunas['paciente_id'][com_eva]
+    dia = colunas['dia'][com_eva]
+    eva = colunas['eva'][com_eva]
+    sesiones = colunas['sesiones_semana'][com_eva]
+    duracion = colunas['duracion_sesion'][com_eva]
+
+    # As linhas vêm em ordem de paciente: cada troca de paciente_id inicia um grupo
+    inicio = np.flatnonzero(np.r_[True, paciente[1:] != paciente[:-1]])
+    fim = np.r_[inicio[1:], len(paciente)] - 1
+    varias = fim > inicio
+    inicio, fim = inicio[varias], fim[varias]
+
+    return {
+        'paciente_id': paciente[inicio],
+        'eva_inicial': eva[inicio],
+        'eva_final': eva[fim],
+        'variacao': eva[fim] - eva[inicio],
+        'dias': dia[fim] - dia[inicio],
+        # Plano prescrito na primeira avaliação
+        'sesiones_semana': sesiones[inicio],
+        'duracion_sesion': duracion[inicio],
+    }
+
+
+def _percentis_mensais(colunas, percentis):
+    """Percentis da EVA por mês da avaliação, com interpolação linear (como np.percentile)."""
+    com_eva = ~np.isnan(colunas['eva'])
+    mes = colunas['mes'][com_eva]
+    eva = colunas['eva'][com_eva]
+
+    # Ordenar por mês e, dentro do mês, por EVA: o percentil de cada mês é uma
+    # posição dentro do seu trecho do array
+    ordem = np.lexsort((eva, mes))
+    mes, eva = mes[ordem], eva[ordem]
+    meses, inicio, total = np.unique(mes, return_index=True, return_counts=True)
+
+    fracoes = np.asarray(percentis, dtype=float) / 100
+    posicoes = inicio[:, None] + (total[:, None] - 1) * fracoes[None, :]
+    abaixo = np.floor(posicoes).astype(np.int64)
+    acima = np.ceil(posicoes).astype(np.int64)
+    valores = eva[abaixo] + (eva[acima] - eva[abaixo]) * (posicoes - abaixo)
+
+    return {
+        'meses': [f"{m // 12:04d}-{m % 12 + 1:02d}" for m in meses.tolist()],
+        'avaliacoes': total,
+        'percentis': tuple(percentis),
+        'valores': valores,
+    }
+
+
+def _melhora_por_frequencia(evolucao):
+    """Melhora da EVA (inicial - final) agrupada pelas sessões por semana prescritas."""
+    com_plano = ~np.isnan(evolucao['sesiones_semana'])
+    melhora = -evolucao['variacao'][com_plano]
+    duracion = evolucao['duracion_sesion'][com_plano]
+
+    sesiones, grupo = np.unique(evolucao['sesiones_semana'][com_plano], return_inverse=True)
+    pacientes = np.bincount(grupo, minlength=len(sesiones))
+    com_duracion = ~np.isnan(duracion)
+    minutos = np.bincount(grupo[com_duracion], weights=duracion[com_duracion], minlength=len(sesiones))
+    com_minutos = np.bincount(grupo[com_duracion], minlength=len(sesiones))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {
+            'sesiones_semana': sesiones,
+            'pacientes': pacientes,
+            'melhora_media': np.bincount(grupo, weights=melhora, minlength=len(sesiones)) / pacientes,
+            'taxa_melhora': np.bincount(grupo, weights=melhora > 0, minlength=len(sesiones)) / pacientes,
+            'duracion_media': minutos / com_minutos,
+        }
+
+
+def calcular_desfechos(colunas, percentis=PERCENTIS_PADRAO):
+    """
+    Calcula os desfechos a partir das colunas de carregar_colunas.
+
+    Args:
+        colunas (dict): Arrays retornados por carregar_colunas.
+        percentis (tuple): Percentis mensais da EVA (0 a 100).
+
+    Returns:
+        dict: 'avaliacoes' (total lido) e
+        - 'evolucao_eva': arrays por paciente com duas ou mais EVAs: 'paciente_id',
+          'eva_inicial', 'eva_final', 'variacao' (final - inicial; negativa é
+          melhora), 'dias' entre elas e o plano da primeira ('sesiones_semana',
+          'duracion_sesion', NaN se não preenchido);
+        - 'percentis_mensais': 'meses' ('YYYY-MM'), 'avaliacoes' com EVA por mês,
+          'percentis' e 'valores' (uma linha por mês, uma coluna por percentil);
+        - 'melhora_por_frequencia': por sessões semanais prescritas, 'pacientes',
+          'melhora_media' (pontos de EVA), 'taxa_melhora' (fração que melhorou) e
+          'duracion_media' (minutos por sessão).
+
+    Raises:
+        ValueError: Se algum percentil estiver fora de 0 a 100.
+    """
+    _exigir_numpy()
+    if any(not 0 <= percentil <= 100 for percentil in percentis):
+        raise ValueError("Os percentis devem estar entre 0 e 100")
+
+    evolucao = _evolucao_eva(colunas)
+    return {
+        'avaliacoes': len(colunas['paciente_id']),
+        'evolucao_eva': evolucao,
+        'percentis_mensais': _percentis_mensais(colunas, percentis),
+        'melhora_por_frequencia': _melhora_por_frequencia(evolucao),
+    }
+
+
+def _somente_leitura(resultados):
+    """Marca os arrays do resultado guardado como somente leitura (ele é compartilhado)."""
+    for valor in resultados.values():
+        if isinstance(valor, dict):
+            _somente_leitura(valor)
+        elif np is not None and isinstance(valor, np.ndarray):
+            valor.flags.writeable = False
+    return resultados
+
+
+class AnaliseDesfechos:
+    """
+    Análise de desfechos de um arquivo de banco, recalculada só quando os dados mudam.
+
+    O PRAGMA data_version é próprio de cada conexão e não muda com os commits da
+    própria conexão, por isso a análise usa uma conexão só dela (somente leitura).
+    """
+
+    def __init__(self, nome_db):
+        """
+        Args:
+            nome_db (str): Caminho do arquivo do banco de dados.
+
+        Raises:
+            ImportError: Se o NumPy não estiver instalado.
+        """
+        _exigir_numpy()
+        self.nome_db = nome_db
+        self.fechado = False
+        self.calculos = 0  # Quantas vezes os dados foram lidos e a análise refeita
+
+        self._conn = None
+        self._lock = threading.Lock()
+        self._versao = None
+        self._percentis = None
+        self._resultados = None
+
+    def _conexao(self):
+        """Conexão da análise, aberta no primeiro uso (chamar com o lock adquirido)."""
+        if self._conn is None:
+            self._conn = abrir_conexao(self.nome_db, somente_leitura=True)
+        return self._conn
+
+    def resultados(self, percentis=PERCENTIS_PADRAO):
+        """
+        Retorna os desfechos de calcular_desfechos, do cache se o banco não mudou.
+
+        Args:
+            percentis (tuple): Percentis mensais da EVA (0 a 100).
+
+        Returns:
+            dict: Resultado de calcular_desfechos. É compartilhado entre as chamadas,
+            por isso os arrays são somente leitura.
+
+        Raises:
+            ValueError: Se algum percentil estiver fora de 0 a 100.
+            sqlite3.ProgrammingError: Se a análise já tiver sido fechada.
+        """
+        percentis = tuple(percentis)
+        with self._lock:
+            if self.fechado:
+                raise sqlite3.ProgrammingError("Análise de desfechos fechada")
+            conn = self._conexao()
+
+            # Lida antes das colunas: um commit entre as duas leituras só faz a
+            # próxima chamada recalcular
+            versao = conn.execute('PRAGMA data_version').fetchone()[0]
+            if self._resultados is not None and versao == self._versao and percentis == self._percentis:
+                return self._resultados
+
+            resultados = _somente_leitura(calcular_desfechos(carregar_colunas(conn), percentis))
+            self._versao, self._percentis, self._resultados = versao, percentis, resultados
+            self.calculos += 1
+            return resultados
+
+    def fechar(self):
+        """Fecha a conexão da análise e descarta o resultado guardado."""
+        with self._lock:
+            self.fechado = True
+            self._resultados = None
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def obter_analise(nome_db):
+    """
+    Retorna a análise de desfechos do arquivo informado, criando-a se necessário.
+
+    Raises:
+        ImportError: Se o NumPy não estiver instalado.
+    """
+    chave = os.path.abspath(nome_db)
+    with _analises_lock:
+        analise = _analises.get(chave)
+        if analise is None or analise.fechado:
+            analise = AnaliseDesfechos(nome_db)
+            _analises[chave] = analise
+        return analise
@@ -0,0 +1,115 @@
+"""
+Versão assíncrona (asyncio) do BancoDadosFisioterapia.
+
+As chamadas ao SQLite continuam bloqueantes; AsyncBancoDados apenas as executa
+no pool fixo de threads de obter_executor_leitura, para que uma corrotina possa
+aguardá-las sem travar o loop de eventos.
+
+Uso:
+    adb = AsyncBancoDados()
+    pagina = await adb.listar_avaliacoes(filtro="mar")
+
+Na interface Tk, as corrotinas são executadas pela PonteTkAsyncio
+(client/ui/ponte_asyncio.py), que entrega o resultado na thread da interface.
+"""
+import asyncio
+import functools
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.database import BancoDadosFisioterapia, obter_executor_leitura
+
+
+class AsyncBancoDados:
+    """
+    Fachada assíncrona sobre BancoDadosFisioterapia.
+
+    Cancelar a tarefa que aguarda uma chamada (ex.: uma busca substituída por
+    outra mais recente) retira a chamada da fila se ela ainda não começou; se já
+    estiver em execução, ela termina na sua thread e o resultado é descartado.
+    Por isso cancelar salvar_avaliacao não desfaz uma gravação já iniciada.
+    """
+
+    def __init__(self, db=None, nome_db="fisioterapia.db", executor=None):
+        """
+        Args:
+            db (BancoDadosFisioterapia, opcional): Instância a usar; por padrão cria uma
+                para nome_db (o pool de conexões e o cache são compartilhados por arquivo).
+            nome_db (str): Caminho do arquivo do banco de dados, se db não for informado.
+            executor (concurrent.futures.Executor, opcional): Threads que executam as
+                chamadas; por padrão, o pool fixo compartilhado de obter_executor_leitura.
+        """
+        self.db = db if db is not None else BancoDadosFisioterapia(nome_db)
+        self._executor = executor
+
+    @property
+    def executor(self):
+        """Executor das chamadas (o pool compartilhado é recriado se tiver sido fechado)."""
+        return self._executor or obter_executor_leitura()
+
+    async def executar(self, funcao, *args, **kwargs):
+        """
+        Executa uma função bloqueante no pool de threads e aguarda o resultado.
+
+        Args:
+            funcao (callable): Função a executar, normalmente um método de self.db.
+
+        Returns:
+            Any: Retorno da função (exceções são propagadas para quem aguarda).
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(funcao, *args, **kwargs))
+
+    async def listar_avaliacoes(self, filtro=None, limite=None, pagina=1):
+        """Versão assíncrona de BancoDadosFisioterapia.listar_avaliacoes."""
+        return await self.executar(self.db.listar_avaliacoes, filtro, limite, pagina)
+
+    async def listar_avaliacoes_cursor(self, **kwargs):
+        """Versão assíncrona de BancoDadosFisioterapia.listar_avaliacoes_cursor."""
+        return await self.executar(self.db.listar_avaliacoes_cursor, **kwargs)
+
+    async def obter_resumos(self, avaliacao_ids):
+        """Versão assíncrona de BancoDadosFisioterapia.obter_resumos."""
+        return await self.executar(self.db.obter_resumos, avaliacao_ids)
+
+    async def obter_avaliacao(self, avaliacao_id):
+        """Versão assíncrona de BancoDadosFisioterapia.obter_avaliacao."""
+        return await self.executar(self.db.obter_avaliacao, avaliacao_id)
+
+    async def obter_avaliacoes(self, avaliacao_ids, campos=None):
+        """Versão assíncrona de BancoDadosFisioterapia.obter_avaliacoes."""
+        return await self.executar(self.db.obter_avaliacoes, avaliacao_ids, campos)
+
+    async def historico_paciente(self, paciente_id, campos=None):
+        """Versão assíncrona de BancoDadosFisioterapia.historico_paciente."""
+        return await self.executar(self.db.historico_paciente, paciente_id, campos)
+
+    async def salvar_avaliacao(self, dados_formulario):
+        """Versão assíncrona de BancoDadosFisioterapia.salvar_avaliacao."""
+        return await self.executar(self.db.salvar_avaliacao, dados_formulario)
+
+    async def buscar_pacientes(self, termo_busca):
+        """Versão assíncrona de BancoDadosFisioterapia.buscar_pacientes."""
+        return await self.executar(self.db.buscar_pacientes, termo_busca)
+
+    async def buscar_texto(self, termo, limite=50):
+        """Versão assíncrona de BancoDadosFisioterapia.buscar_texto."""
+        return await self.executar(self.db.buscar_texto, termo, limite)
+
+    async def estatisticas_gerais(self):
+        """Versão assíncrona de BancoDadosFisioterapia.estatisticas_gerais."""
+        return await self.executar(self.db.estatisticas_gerais)
+
+    async def analise_desfechos(self, percentis=None):
+        """Versão assíncrona de BancoDadosFisioterapia.analise_desfechos."""
+        return await self.executar(self.db.analise_desfechos, percentis)
+
+    async def avaliacoes_por_grado_fuerza(self, grado, grupo=None):
+        """Versão assíncrona de BancoDadosFisioterapia.avaliacoes_por_grado_fuerza."""
+        return await self.executar(self.db.avaliacoes_por_grado_fuerza, grado, grupo)
+
+    async def contar_coorte(self, filtros):
+        """Versão assíncrona de BancoDadosFisioterapia.contar_coorte."""
+        return await self.executar(self.db.contar_coorte, filtros)
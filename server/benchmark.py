@@ -0,0 +1,1199 @@
+"""
+Benchmarks do banco de dados da aplicação de fisioterapia.
+
+Cada benchmark cria um banco temporário populado com dados sintéticos e
+imprime os tempos medidos. Uso:
+
+    python -m server.benchmark <nome> [n_avaliacoes]
+
+Benchmarks disponíveis: veja BENCHMARKS no final do arquivo.
+"""
+import os
+import sys
+import contextlib
+import json
+import time
+import random
+import sqlite3
+import datetime
+import tempfile
+import threading
+import statistics
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import database
+from server.database import BancoDadosFisioterapia
+from server.importacao import importar_diretorio
+from server.migracoes import MIGRACOES, aplicar_migracoes
+from server.normalizacao import normalizar_texto
+
+
+NOMES = ['María', 'José', 'Sofía', 'Lucas', 'Ana', 'Carlos', 'Lucía', 'Martín',
+         'Valentina', 'Mateo', 'Camila', 'Diego', 'Isabel', 'Andrés', 'Elena']
+SOBRENOMES = ['Rodríguez', 'González', 'Pérez', 'Fernández', 'López', 'Martínez',
+              'Sánchez', 'Gómez', 'Díaz', 'Silva', 'Brites', 'Romero', 'Núñez']
+MOTIVOS = ['Dolor lumbar', 'Cervicalgia', 'Esguince de tobillo', 'Tendinitis del hombro',
+           'Lesión de rodilla', 'Fascitis plantar', 'Escoliosis', 'Contractura muscular']
+DIAGNOSTICOS = ['Lumbalgia mecánica', 'Hernia discal', 'Síndrome subacromial',
+                'Condromalacia rotuliana', 'Epicondilitis', 'Cifosis postural']
+
+TABELAS_SECOES = [
+    'historico_clinico', 'exame_fisico', 'inspeccion_palpacion',
+    'columna_vertebral', 'movilidad_articular', 'fuerza_muscular',
+    'evaluacion_neuromuscular', 'evaluacion_funcional', 'coordinacion',
+    'pruebas_especificas', 'escalas_dolor', 'diagnosticos',
+    'plan_tratamiento', 'seguimiento'
+]
+
+# Consulta usada pela aba de clientes antes do pool de conexões
+SQL_BUSCA_ORIGINAL = '''
+SELECT a.id, a.data_avaliacao, p.nome, p.idade, p.genero, s.fecha_evaluacion
+FROM avaliacoes a
+JOIN pacientes p ON a.paciente_id = p.id
+LEFT JOIN seguimiento s ON a.id = s.avaliacao_id
+WHERE p.nome LIKE ?
+ORDER BY a.id DESC
+LIMIT 30
+'''
+
+
+def criar_banco_temporario():
+    """Retorna o caminho de um arquivo de banco novo em um diretório temporário."""
+    diretorio = tempfile.mkdtemp(prefix="bench_fisio_")
+    return os.path.join(diretorio, "bench.db")
+
+
+@contextlib.contextmanager
+def conexao_escrita(db):
+    """Conexão própria para preparar os dados do benchmark (as do pool de db são somente leitura)."""
+    conn = database.abrir_conexao(db.nome_db)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def popular_banco(nome_db, n_avaliacoes, semente=42):
+    """
+    Insere avaliações sintéticas diretamente com executemany.
+
+    Args:
+        nome_db (str): Caminho do banco (as tabelas são criadas se necessário).
+        n_avaliacoes (int): Quantidade de avaliações a inserir.
+        semente (int): Semente do gerador aleatório, para resultados reproduzíveis.
+
+    Returns:
+        BancoDadosFisioterapia: Instância aberta sobre o banco populado.
+    """
+    db = BancoDadosFisioterapia(nome_db)
+    rnd = random.Random(semente)
+    inicio = datetime.datetime(2023, 1, 1)
+
+    pacientes = []
+    avaliacoes = []
+    for i in range(1, n_avaliacoes + 1):
+        nome = f"{rnd.choice(NOMES)} {rnd.choice(SOBRENOMES)} {rnd.choice(SOBRENOMES)}"
+        nascimento = datetime.date(rnd.randint(1940, 2015), rnd.randint(1, 12), rnd.randint(1, 28))
+        data = inicio + datetime.timedelta(minutes=rnd.randint(0, 60 * 24 * 900))
+        genero = rnd.choice(['Masculino', 'Femenino'])
+        contato = f"09{rnd.randint(10000000, 99999999)}"
+        pacientes.append((
+            i, nome, str(2025 - nascimento.year), genero, contato, nascimento.strftime('%d/%m/%Y'),
+            'Traumatología', '', data.strftime('%Y-%m-%d %H:%M:%S'), normalizar_texto(nome),
+            nascimento.isoformat(), contato
+        ))
+        avaliacoes.append((i, i, data.strftime('%Y-%m-%d %H:%M:%S'), '', ''))
+
+    with conexao_escrita(db) as conn:
+        conn.execute("BEGIN TRANSACTION")
+        conn.executemany('''
+        INSERT INTO pacientes (id, nome, idade, genero, contato, data_nascimento,
+            area_consulta, alergias, data_cadastro, nome_busca, data_nascimento_iso, contato_busca)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', pacientes)
+        conn.executemany('''
+        INSERT INTO avaliacoes (id, paciente_id, data_avaliacao, fisioterapeuta, observacoes)
+        VALUES (?, ?, ?, ?, ?)
+        ''', avaliacoes)
+        for tabela in TABELAS_SECOES:
+            if tabela in ('escalas_dolor', 'seguimiento', 'historico_clinico', 'diagnosticos'):
+                continue
+            conn.executemany(
+                f"INSERT INTO {tabela} (avaliacao_id) VALUES (?)",
+                ((i,) for i in range(1, n_avaliacoes + 1))
+            )
+        conn.executemany(
+            "INSERT INTO historico_clinico (avaliacao_id, motivo_consulta) VALUES (?, ?)",
+            ((i, f"{rnd.choice(MOTIVOS)} de {rnd.randint(1, 24)} semanas") for i in range(1, n_avaliacoes + 1))
+        )
+        conn.executemany(
+            "INSERT INTO diagnosticos (avaliacao_id, resumen_problema) VALUES (?, ?)",
+            ((i, rnd.choice(DIAGNOSTICOS)) for i in range(1, n_avaliacoes + 1))
+        )
+        conn.executemany(
+            "INSERT INTO escalas_dolor (avaliacao_id, eva_valor) VALUES (?, ?)",
+            ((i, rnd.randint(0, 10)) for i in range(1, n_avaliacoes + 1))
+        )
+        proximas = (inicio + datetime.timedelta(days=rnd.randint(0, 1000)) for _ in range(n_avaliacoes))
+        conn.executemany(
+            "INSERT INTO seguimiento (avaliacao_id, fecha_evaluacion, fecha_evaluacion_iso) VALUES (?, ?, ?)",
+            ((i, proxima.strftime('%d/%m/%Y'), proxima.strftime('%Y-%m-%d'))
+             for i, proxima in enumerate(proximas, start=1))
+        )
+        conn.commit()
+
+    return db
+
+
+def executar_ddl_completo(conn):
+    """Reproduz o comportamento anterior às migrações: todo o DDL a cada abertura."""
+    cursor = conn.cursor()
+    # Só as tabelas e índices originais; as migrações seguintes preenchem dados
+    for versao, _, funcao in MIGRACOES:
+        if versao <= 2:
+            funcao(cursor)
+    conn.commit()
+    cursor.close()
+
+
+def cronometrar(funcao, repeticoes):
+    """Executa a função várias vezes e retorna (mediana, p95) em milissegundos."""
+    tempos = []
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(i)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return statistics.median(tempos), tempos[int(len(tempos) * 0.95) - 1]
+
+
+def imprimir_resultado(rotulo, mediana, p95):
+    print(f"  {rotulo:<45} mediana {mediana:9.3f} ms   p95 {p95:9.3f} ms")
+
+
+def bench_pool(n_avaliacoes=50000, repeticoes=200):
+    """Latência de busca com o pool versus uma conexão nova (com DDL) por chamada."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+    termos = [nome[:3].lower() for nome in NOMES]
+
+    def sem_pool(i):
+        # Comportamento anterior: cada busca construía um BancoDadosFisioterapia,
+        # abrindo uma conexão nova e reexecutando todos os CREATE TABLE
+        conn = sqlite3.connect(nome_db)
+        conn.row_factory = sqlite3.Row
+        try:
+            executar_ddl_completo(conn)
+            conn.execute(SQL_BUSCA_ORIGINAL, (f"%{termos[i % len(termos)]}%",)).fetchall()
+        finally:
+            conn.close()
+
+    def com_pool(i):
+        with db.conexao() as conn:
+            conn.execute(SQL_BUSCA_ORIGINAL, (f"%{termos[i % len(termos)]}%",)).fetchall()
+
+    print("Busca por nome (30 resultados):")
+    imprimir_resultado("conexão + DDL por chamada", *cronometrar(sem_pool, repeticoes))
+    imprimir_resultado("pool de conexões", *cronometrar(com_pool, repeticoes))
+    imprimir_resultado("listar_avaliacoes(filtro=...)", *cronometrar(
+        lambda i: db.listar_avaliacoes(filtro=termos[i % len(termos)]), repeticoes))
+
+
+def bench_abertura(n_avaliacoes=50000, repeticoes=200):
+    """Custo de abrir o banco: DDL completo a cada abertura versus PRAGMA user_version."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    popular_banco(nome_db, n_avaliacoes)
+
+    def abrir_com_ddl(i):
+        conn = sqlite3.connect(nome_db)
+        try:
+            executar_ddl_completo(conn)
+        finally:
+            conn.close()
+
+    def abrir_com_migracoes(i):
+        conn = sqlite3.connect(nome_db)
+        try:
+            aplicar_migracoes(conn)
+        finally:
+            conn.close()
+
+    def construir_instancia(i):
+        # Simula um processo novo: esquecer que o arquivo já foi verificado
+        database._bancos_migrados.clear()
+        database.fechar_pools()
+        BancoDadosFisioterapia(nome_db)
+
+    print("Abertura de um banco já atualizado:")
+    imprimir_resultado("conexão + DDL completo (antes)", *cronometrar(abrir_com_ddl, repeticoes))
+    imprimir_resultado("conexão + PRAGMA user_version", *cronometrar(abrir_com_migracoes, repeticoes))
+    imprimir_resultado("BancoDadosFisioterapia() em processo novo", *cronometrar(construir_instancia, repeticoes))
+    imprimir_resultado("BancoDadosFisioterapia() já verificado", *cronometrar(
+        lambda i: BancoDadosFisioterapia(nome_db), repeticoes))
+
+
+def bench_paginacao(n_avaliacoes=200000, repeticoes=50):
+    """Primeira página versus páginas profundas: LIMIT/OFFSET contra paginação por chave."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+    tamanho = 30
+    profundidades = [1, n_avaliacoes // (tamanho * 10), n_avaliacoes // tamanho - 1]
+
+    print(f"Páginas de {tamanho} avaliações:")
+    for pagina in profundidades:
+        imprimir_resultado(f"OFFSET, página {pagina}", *cronometrar(
+            lambda i: db.listar_avaliacoes(pagina=pagina), repeticoes))
+        apos_id = None if pagina == 1 else n_avaliacoes - (pagina - 1) * tamanho + 1
+        imprimir_resultado(f"cursor, página {pagina}", *cronometrar(
+            lambda i: db.listar_avaliacoes_cursor(apos_id=apos_id, tamanho=tamanho), repeticoes))
+
+
+def bench_busca_textual(n_avaliacoes=100000, repeticoes=100):
+    """Busca textual FTS5 versus LIKE com curinga à esquerda."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+    termos = ['maria', 'rodriguez', 'lumb', 'hernia discal', 'jose perez', 'escoliosis']
+
+    def busca_like(i):
+        termo = f"%{termos[i % len(termos)]}%"
+        with db.conexao() as conn:
+            conn.execute('''
+            SELECT a.id FROM avaliacoes a
+            JOIN pacientes p ON a.paciente_id = p.id
+            LEFT JOIN historico_clinico h ON h.avaliacao_id = a.id
+            LEFT JOIN diagnosticos d ON d.avaliacao_id = a.id
+            WHERE p.nome LIKE ? OR h.motivo_consulta LIKE ? OR d.resumen_problema LIKE ?
+            ORDER BY a.id DESC LIMIT 50
+            ''', (termo, termo, termo)).fetchall()
+
+    print("Busca por nome e texto clínico (50 resultados):")
+    imprimir_resultado("LIKE '%termo%' em 3 colunas", *cronometrar(busca_like, repeticoes))
+    imprimir_resultado("buscar_texto (FTS5, com trechos)", *cronometrar(
+        lambda i: db.buscar_texto(termos[i % len(termos)]), repeticoes))
+
+
+def bench_busca_nome(n_avaliacoes=100000, repeticoes=100):
+    """Busca por nome: LIKE com curinga à esquerda versus prefixo da chave normalizada."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+    termos = ['maría', 'jose', 'sofia rod', 'lucia', 'andres g']
+
+    def busca_like(i):
+        termo = termos[i % len(termos)]
+        with db.conexao() as conn:
+            conn.execute("SELECT * FROM pacientes WHERE nome LIKE ? OR contato LIKE ? ORDER BY nome",
+                         (f"%{termo}%", f"%{termo}%")).fetchall()
+
+    print("Pacientes cujo nome corresponde ao termo:")
+    imprimir_resultado("LIKE '%termo%' (antes)", *cronometrar(busca_like, repeticoes))
+    imprimir_resultado("buscar_pacientes (prefixo normalizado)", *cronometrar(
+        lambda i: db.buscar_pacientes(termos[i % len(termos)]), repeticoes))
+    imprimir_resultado("listar_avaliacoes_cursor(filtro=...)", *cronometrar(
+        lambda i: db.listar_avaliacoes_cursor(filtro=termos[i % len(termos)]), repeticoes))
+
+
+def _formatar_data_original(data_str):
+    """Formatação por linha feita pela aba de clientes antes da tabela de resumo."""
+    try:
+        if '-' in data_str:
+            data = datetime.datetime.strptime(data_str.split(' ')[0], '%Y-%m-%d')
+        elif '/' in data_str:
+            data = datetime.datetime.strptime(data_str, '%d/%m/%Y')
+        else:
+            return data_str
+        return data.strftime('%d/%m/%Y')
+    except (TypeError, ValueError):
+        return data_str
+
+
+def bench_resumo(n_avaliacoes=100000, repeticoes=200):
+    """Página da lista de pacientes: JOIN de 3 tabelas + datas em Python versus avaliacoes_resumo."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+    apos_ids = [n_avaliacoes - k * 997 for k in range(50)]
+
+    def pagina_com_join(i):
+        with db.conexao() as conn:
+            rows = conn.execute('''
+            SELECT a.id, a.data_avaliacao, p.nome, p.idade, p.genero, s.fecha_evaluacion
+            FROM avaliacoes a
+            JOIN pacientes p ON a.paciente_id = p.id
+            LEFT JOIN seguimiento s ON a.id = s.avaliacao_id
+            WHERE a.id < ? ORDER BY a.id DESC LIMIT 30
+            ''', (apos_ids[i % len(apos_ids)],)).fetchall()
+        for row in rows:
+            _formatar_data_original(row['data_avaliacao'])
+            _formatar_data_original(row['fecha_evaluacion'])
+
+    def pagina_com_resumo(i):
+        for avaliacao in db.listar_avaliacoes_cursor(apos_id=apos_ids[i % len(apos_ids)])['avaliacoes']:
+            for data in (avaliacao['data'], avaliacao['fecha_evaluacion']):
+                f"{data[8:10]}/{data[5:7]}/{data[0:4]}"
+
+    print("Página de 30 avaliações com datas formatadas:")
+    imprimir_resultado("JOIN + strptime por linha (antes)", *cronometrar(pagina_com_join, repeticoes))
+    imprimir_resultado("avaliacoes_resumo (datas ISO)", *cronometrar(pagina_com_resumo, repeticoes))
+    imprimir_resultado("filtro por nome em avaliacoes_resumo", *cronometrar(
+        lambda i: db.listar_avaliacoes_cursor(filtro='maria'), repeticoes))
+
+
+def bench_estatisticas(n_avaliacoes=100000, repeticoes=200):
+    """estatisticas_gerais: COUNT/GROUP BY sobre as tabelas versus contadores mantidos por gatilhos."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+
+    def estatisticas_com_varredura(i):
+        with db.conexao() as conn:
+            conn.execute("SELECT COUNT(*) FROM pacientes").fetchone()
+            conn.execute("SELECT COUNT(*) FROM avaliacoes").fetchone()
+            conn.execute('''
+            SELECT strftime('%Y-%m', data_avaliacao) as mes, COUNT(*) as total
+            FROM avaliacoes WHERE data_avaliacao >= date('now', '-6 months')
+            GROUP BY mes ORDER BY mes DESC
+            ''').fetchall()
+            conn.execute("SELECT genero, COUNT(*) as total FROM pacientes GROUP BY genero").fetchall()
+
+    print("Estatísticas gerais:")
+    imprimir_resultado("COUNT/GROUP BY (antes)", *cronometrar(estatisticas_com_varredura, repeticoes // 10))
+    imprimir_resultado("contadores incrementais", *cronometrar(lambda i: db.estatisticas_gerais(), repeticoes))
+
+    inicio = time.perf_counter()
+    db.reconstruir_estatisticas()
+    print(f"  reconstrução completa dos contadores: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+
+def bench_reevaluaciones(n_avaliacoes=100000, repeticoes=200):
+    """Agenda da semana: ler e interpretar todas as datas em Python versus faixa do índice ISO."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+    inicios = [datetime.date(2023, 1, 1) + datetime.timedelta(days=7 * k) for k in range(100)]
+
+    def agenda_em_python(i):
+        inicio = inicios[i % len(inicios)]
+        fim = inicio + datetime.timedelta(days=6)
+        with db.conexao() as conn:
+            rows = conn.execute('''
+            SELECT s.avaliacao_id, s.fecha_evaluacion, p.nome, p.contato
+            FROM seguimiento s
+            JOIN avaliacoes a ON a.id = s.avaliacao_id
+            JOIN pacientes p ON p.id = a.paciente_id
+            ''').fetchall()
+        agenda = []
+        for row in rows:
+            try:
+                data = datetime.datetime.strptime(row['fecha_evaluacion'], '%d/%m/%Y').date()
+            except (TypeError, ValueError):
+                continue
+            if inicio <= data <= fim:
+                agenda.append(row)
+        return sorted(agenda, key=lambda row: row['fecha_evaluacion'][6:] + row['fecha_evaluacion'][3:5])
+
+    def agenda_com_indice(i):
+        inicio = inicios[i % len(inicios)]
+        return db.reevaluaciones_entre(inicio, inicio + datetime.timedelta(days=6))
+
+    print("Reavaliações de uma semana:")
+    imprimir_resultado("strptime em todas as linhas (antes)", *cronometrar(agenda_em_python, repeticoes // 20))
+    imprimir_resultado("reevaluaciones_entre (índice ISO)", *cronometrar(agenda_com_indice, repeticoes))
+
+
+def bench_atualizacao(n_avaliacoes=20000, repeticoes=200):
+    """Mudar só a escala EVA: regravar as 15 tabelas versus apenas a seção alterada."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+    arquivo_wal = nome_db + '-wal'
+    ids = [1 + (k * 7919) % n_avaliacoes for k in range(repeticoes)]
+    completos = {avaliacao_id: db.obter_avaliacao(avaliacao_id) for avaliacao_id in set(ids)}
+
+    def medir(atualizar, deslocamento):
+        bytes_wal = []
+        tempos_lock = []
+        inicio_transacao = []
+
+        def registrar(sql):
+            # O lock de escrita é obtido no BEGIN IMMEDIATE do escritor e liberado no commit
+            if sql.startswith('BEGIN'):
+                inicio_transacao.append(time.perf_counter())
+
+        db.executar_escrita(lambda conn: conn.set_trace_callback(registrar))
+        for i, avaliacao_id in enumerate(ids):
+            with conexao_escrita(db) as conn:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            inicio_transacao.clear()
+            # Valor sempre diferente do gravado (SQLite não regrava linhas idênticas)
+            atualizar(avaliacao_id, (i + deslocamento) % 11)
+            fim = time.perf_counter()
+            tempos_lock.append((fim - inicio_transacao[0]) * 1000)
+            bytes_wal.append(os.path.getsize(arquivo_wal))
+        db.executar_escrita(lambda conn: conn.set_trace_callback(None))
+        tempos_lock.sort()
+        return (statistics.median(bytes_wal), statistics.median(tempos_lock),
+                tempos_lock[int(len(tempos_lock) * 0.95) - 1])
+
+    def completa(avaliacao_id, eva):
+        dados = dict(completos[avaliacao_id], escala_eva=eva)
+        db.atualizar_avaliacao(avaliacao_id, dados)
+
+    def parcial(avaliacao_id, eva):
+        db.atualizar_avaliacao(avaliacao_id, {'escala_eva': eva}, parcial=True)
+
+    print("Atualização da escala EVA (WAL escrito e tempo com o lock de escrita):")
+    for deslocamento, (rotulo, atualizar) in enumerate((("todas as seções (antes)", completa),
+                                                         ("apenas a seção alterada", parcial)), start=1):
+        bytes_wal, mediana, p95 = medir(atualizar, deslocamento)
+        print(f"  {rotulo:<30} WAL {bytes_wal / 1024:8.1f} KiB   lock mediana {mediana:7.3f} ms   p95 {p95:7.3f} ms")
+
+
+def bench_escrita(n_avaliacoes=5000, escritas_por_thread=200, n_threads=8):
+    """Escritas concorrentes: uma conexão e um commit por escrita versus o escritor único com group commit."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+
+    def inserir_paciente(conn, nome):
+        conn.execute("INSERT INTO pacientes (nome, nome_busca) VALUES (?, ?)", (nome, normalizar_texto(nome)))
+
+    def medir(escrever_thread):
+        erros = []
+        threads = [threading.Thread(target=escrever_thread, args=(t, erros)) for t in range(n_threads)]
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duracao = time.perf_counter() - inicio
+        total = n_threads * escritas_por_thread
+        return (total - len(erros)) / duracao, len(erros)
+
+    def conexao_propria(t, erros):
+        # Como o código antigo: cada escrita abre sua transação e faz commit (timeout curto, como
+        # a estação que desiste e mostra "database is locked")
+        conn = database.abrir_conexao(nome_db, timeout=0.05)
+        for k in range(escritas_por_thread):
+            try:
+                inserir_paciente(conn, f"Conexao {t}-{k}")
+                conn.commit()
+            except sqlite3.OperationalError as e:
+                conn.rollback()
+                erros.append(e)
+        conn.close()
+
+    def escritor_sincrono(t, erros):
+        for k in range(escritas_por_thread):
+            try:
+                db.executar_escrita(inserir_paciente, f"Escritor {t}-{k}")
+            except sqlite3.OperationalError as e:
+                erros.append(e)
+
+    escritor_com_janela = database.EscritorBanco(nome_db, janela_agrupamento=0.002)
+
+    def escritor_janela(t, erros):
+        for k in range(escritas_por_thread):
+            try:
+                escritor_com_janela.executar(inserir_paciente, f"Janela {t}-{k}")
+            except sqlite3.OperationalError as e:
+                erros.append(e)
+
+    def escritor_futures(t, erros):
+        futuros = [db.enviar_escrita(inserir_paciente, f"Futuro {t}-{k}") for k in range(escritas_por_thread)]
+        for futuro in futuros:
+            if futuro.exception() is not None:
+                erros.append(futuro.exception())
+
+    print(f"{n_threads} threads x {escritas_por_thread} inserções:")
+    for rotulo, funcao in (("conexão própria + commit (antes)", conexao_propria),
+                           ("escritor único, espera cada escrita", escritor_sincrono),
+                           ("idem, janela de agrupamento de 2 ms", escritor_janela),
+                           ("escritor único, futures", escritor_futures)):
+        por_segundo, n_erros = medir(funcao)
+        print(f"  {rotulo:<40} {por_segundo:9.0f} escritas/s   erros 'locked': {n_erros}")
+    escritor_com_janela.fechar()
+
+
+def gerar_arquivos_json(diretorio, n_arquivos, semente=42):
+    """Grava n_arquivos avaliações sintéticas no formato de dados_pacientes/*.json."""
+    aleatorio = random.Random(semente)
+    campos = [campo for _, _, secao in database.ESQUEMA_AVALIACAO
+              for _, campo, padrao, conversor, _ in secao if conversor is None and padrao == '']
+    os.makedirs(diretorio, exist_ok=True)
+    for i in range(n_arquivos):
+        dados = {campo: '' for campo in campos}
+        dados.update({
+            'Nombre Completo': f"{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)}",
+            'Edad': str(aleatorio.randint(5, 90)),
+            'Genero': aleatorio.choice('MF'),
+            'Contacto': f"7199{aleatorio.randint(1000000, 9999999)}",
+            'Fecha Nasc.': f"{aleatorio.randint(1, 28):02d}/{aleatorio.randint(1, 12):02d}/{aleatorio.randint(1940, 2020)}",
+            'Motivo de consulta': aleatorio.choice(MOTIVOS),
+            'Resumen del problema': aleatorio.choice(DIAGNOSTICOS),
+            'escala_eva': aleatorio.randint(0, 10),
+            'Fuerza Muscular': [],
+            'fecha_evaluacion': f"{aleatorio.randint(1, 28):02d}/{aleatorio.randint(1, 12):02d}/2026",
+        })
+        with open(os.path.join(diretorio, f"avaliacao_{i:06d}.json"), 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False, indent=4)
+
+
+def bench_importacao(n_arquivos=20000, n_arquivos_antes=2000):
+    """Importação de arquivos JSON: importar_avaliacao_json por arquivo versus importar_diretorio."""
+    diretorio = os.path.join(tempfile.mkdtemp(prefix="bench_fisio_"), "arquivos")
+    print(f"Gerando {n_arquivos} arquivos em {diretorio}...")
+    gerar_arquivos_json(diretorio, n_arquivos)
+    caminhos = sorted(os.path.join(diretorio, nome) for nome in os.listdir(diretorio))
+
+    # Antes: uma transação (e um commit) por arquivo; mede uma amostra e extrapola
+    db = BancoDadosFisioterapia(criar_banco_temporario())
+    amostra = caminhos[:n_arquivos_antes]
+    inicio = time.perf_counter()
+    for caminho in amostra:
+        db.importar_avaliacao_json(caminho)
+    por_segundo_antes = len(amostra) / (time.perf_counter() - inicio)
+
+    nome_db = criar_banco_temporario()
+    inicio = time.perf_counter()
+    resultado = importar_diretorio(diretorio, nome_db)
+    duracao = time.perf_counter() - inicio
+    por_segundo = resultado['importados'] / duracao
+
+    print(f"Importação ({os.cpu_count()} núcleos):")
+    print(f"  importar_avaliacao_json por arquivo (antes)   {por_segundo_antes:8.0f} arquivos/s   "
+          f"100k arquivos: {100000 / por_segundo_antes / 60:6.1f} min")
+    print(f"  importar_diretorio                            {por_segundo:8.0f} arquivos/s   "
+          f"100k arquivos: {100000 / por_segundo / 60:6.1f} min")
+
+    inicio = time.perf_counter()
+    resultado = importar_diretorio(diretorio, nome_db)
+    print(f"  nova execução (tudo já importado): {(time.perf_counter() - inicio) * 1000:.0f} ms, "
+          f"{resultado['importados']} importados")
+
+
+def bench_exportacao(n_avaliacoes=20000):
+    """Exportar todas as avaliações: exportar_avaliacao_json por ID versus exportar_todas."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+    diretorio = os.path.dirname(nome_db)
+
+    def por_avaliacao():
+        # Antes: uma consulta com os 15 JOINs e um JSON indentado montado em memória por avaliação
+        with db.conexao() as conn:
+            ids = [linha[0] for linha in conn.execute("SELECT id FROM avaliacoes ORDER BY id")]
+        with open(os.path.join(diretorio, "antes.json"), 'w', encoding='utf-8') as arquivo:
+            for avaliacao_id in ids:
+                arquivo.write(db.exportar_avaliacao_json(avaliacao_id) + '\n')
+
+    # O tracemalloc deixa o Python bem mais lento: tempo e memória são medidos em execuções separadas
+    print(f"Exportação de {n_avaliacoes} avaliações (tempo e pico de memória alocada):")
+    for rotulo, funcao in (
+            ("exportar_avaliacao_json por ID (antes)", por_avaliacao),
+            ("exportar_todas NDJSON", lambda: db.exportar_todas(os.path.join(diretorio, "todas.ndjson"))),
+            ("exportar_todas NDJSON + gzip", lambda: db.exportar_todas(os.path.join(diretorio, "todas.ndjson.gz"))),
+            ("exportar_todas CSV", lambda: db.exportar_todas(os.path.join(diretorio, "todas.csv"), 'csv'))):
+        inicio = time.perf_counter()
+        funcao()
+        duracao = time.perf_counter() - inicio
+        tracemalloc.start()
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {rotulo:<40} {duracao:7.2f} s   {n_avaliacoes / duracao:8.0f} avaliações/s   "
+              f"pico {pico / 1024 / 1024:6.1f} MiB")
+
+
+def _remover_avaliacao_antiga(conn, avaliacao_id):
+    """Exclusão como era antes do ON DELETE CASCADE: um DELETE por tabela."""
+    paciente_id = conn.execute(
+        "SELECT paciente_id FROM avaliacoes WHERE id = ?", (avaliacao_id,)
+    ).fetchone()[0]
+    for tabela in TABELAS_SECOES:
+        conn.execute(f"DELETE FROM {tabela} WHERE avaliacao_id = ?", (avaliacao_id,))
+    conn.execute("DELETE FROM avaliacoes WHERE id = ?", (avaliacao_id,))
+    conn.execute("DELETE FROM pacientes WHERE id = ?", (paciente_id,))
+
+
+def bench_exclusao(n_avaliacoes=20000, n_excluir=500):
+    """Excluir n_excluir avaliações: laço de exclusões individuais versus excluir_avaliacoes."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+    # Em bancos pequenos, cada uma das três variantes exclui no máximo um terço das avaliações
+    n_excluir = min(n_excluir, n_avaliacoes // 3)
+
+    # Conjuntos disjuntos de ids sorteados, um por variante
+    ids = random.Random(7).sample(range(1, n_avaliacoes + 1), n_excluir * 3)
+    variantes = (
+        ("laço, 16 DELETEs por avaliação (antes)",
+         lambda bloco: [db.executar_escrita(_remover_avaliacao_antiga, i) for i in bloco]),
+        ("laço de excluir_avaliacao (cascata)",
+         lambda bloco: [db.excluir_avaliacao(i) for i in bloco]),
+        ("excluir_avaliacoes (uma transação)", db.excluir_avaliacoes),
+    )
+
+    print(f"Exclusão de {n_excluir} avaliações:")
+    for indice, (rotulo, funcao) in enumerate(variantes):
+        bloco = ids[indice * n_excluir:(indice + 1) * n_excluir]
+        inicio = time.perf_counter()
+        funcao(bloco)
+        duracao = time.perf_counter() - inicio
+        print(f"  {rotulo:<40} {duracao * 1000:9.1f} ms   {n_excluir / duracao:8.0f} avaliações/s")
+
+    with db.conexao() as conn:
+        restantes = conn.execute("SELECT COUNT(*) FROM avaliacoes").fetchone()[0]
+        orfas = conn.execute(
+            "SELECT COUNT(*) FROM seguimiento WHERE avaliacao_id NOT IN (SELECT id FROM avaliacoes)"
+        ).fetchone()[0]
+    print(f"  Avaliações restantes: {restantes}; linhas de seção órfãs: {orfas}")
+
+
+def bench_pacientes(n_avaliacoes=40000, avaliacoes_por_paciente=4, repeticoes=100):
+    """Mesclagem de cadastros duplicados e buscas de pacientes antes e depois dela."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+
+    # Cada grupo de avaliacoes_por_paciente avaliações passa a ter cadastros
+    # idênticos, como salvar_avaliacao gravava para um paciente que voltava
+    with conexao_escrita(db) as conn:
+        conn.execute(f'''
+        UPDATE pacientes SET (nome, contato, data_nascimento, nome_busca, data_nascimento_iso, contato_busca) = (
+            SELECT nome, contato, data_nascimento, nome_busca, data_nascimento_iso, contato_busca
+            FROM pacientes p WHERE p.id = ((pacientes.id - 1) / {int(avaliacoes_por_paciente)}) * {int(avaliacoes_por_paciente)} + 1
+        )
+        ''')
+        conn.commit()
+
+    def contar_pacientes():
+        with db.conexao() as conn:
+            return conn.execute("SELECT COUNT(*) FROM pacientes").fetchone()[0]
+
+    def medir_buscas(rotulo):
+        for termo in ("mar", "maria rodriguez"):
+            mediana, p95 = cronometrar(lambda _: db.buscar_pacientes(termo), repeticoes)
+            imprimir_resultado(f"{rotulo}: buscar_pacientes('{termo}')", mediana, p95)
+
+    antes = contar_pacientes()
+    medir_buscas(f"{antes} cadastros")
+
+    inicio = time.perf_counter()
+    removidos = db.mesclar_pacientes_duplicados()
+    print(f"mesclar_pacientes_duplicados: {removidos} cadastros removidos em "
+          f"{time.perf_counter() - inicio:.2f} s")
+
+    medir_buscas(f"{contar_pacientes()} cadastros")
+
+
+def bench_historico(n_avaliacoes=100000, avaliacoes_do_paciente=50, repeticoes=100):
+    """Evolução de um paciente: obter_avaliacao por avaliação versus historico_paciente."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+
+    # Avaliações espalhadas pelo banco passam a ser do paciente 1
+    passo = n_avaliacoes // avaliacoes_do_paciente
+    with conexao_escrita(db) as conn:
+        conn.execute(f"UPDATE avaliacoes SET paciente_id = 1 WHERE id % {passo} = 0")
+        conn.commit()
+        ids = [linha[0] for linha in conn.execute("SELECT id FROM avaliacoes WHERE paciente_id = 1")]
+
+    def por_avaliacao(_):
+        # Antes: uma consulta com os 15 JOINs por avaliação (sem o cache, como ao abrir a janela)
+        db.cache_avaliacoes.limpar()
+        return [db.obter_avaliacao(avaliacao_id) for avaliacao_id in ids]
+
+    print(f"Evolução de um paciente com {len(ids)} avaliações:")
+    for rotulo, funcao in (
+            ("obter_avaliacao por avaliação (antes)", por_avaliacao),
+            ("historico_paciente", lambda _: db.historico_paciente(1))):
+        mediana, p95 = cronometrar(funcao, repeticoes)
+        imprimir_resultado(rotulo, mediana, p95)
+
+
+def bench_lote(n_avaliacoes=100000, n_ids=200, repeticoes=20):
+    """Várias avaliações: obter_avaliacao em laço versus obter_avaliacoes."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+    ids = random.Random(3).sample(range(1, n_avaliacoes + 1), n_ids)
+
+    def em_laco(_):
+        # Antes: uma consulta com os 15 JOINs por ID (sem cache, como na primeira abertura)
+        db.cache_avaliacoes.limpar()
+        return [db.obter_avaliacao(avaliacao_id) for avaliacao_id in ids]
+
+    def em_lote(_):
+        db.cache_avaliacoes.limpar()
+        return db.obter_avaliacoes(ids)
+
+    print(f"{n_ids} avaliações sorteadas:")
+    for rotulo, funcao in (
+            ("obter_avaliacao em laço (antes)", em_laco),
+            ("obter_avaliacoes", em_lote),
+            ("obter_avaliacoes com 3 campos",
+             lambda _: db.obter_avaliacoes(ids, campos=['Nombre Completo', 'escala_eva', 'fecha_evaluacion']))):
+        mediana, p95 = cronometrar(funcao, repeticoes)
+        imprimir_resultado(rotulo, mediana, p95)
+
+
+def _avaliacao_por_nome(row):
+    """Conversão anterior ao registro compilado: cada coluna procurada pelo nome em um sqlite3.Row."""
+    dados = {'id': row['id'], 'paciente_id': row['paciente_id'], 'data_avaliacao': row['data_avaliacao']}
+    for campo, (tabela, expressao, leitor) in database._COLUNAS_POR_CAMPO.items():
+        # O sqlite3.Row nomeia "tabela.coluna" só pela coluna e subconsultas pelo próprio texto
+        nome = expressao.split('.', 1)[1] if tabela else expressao
+        dados[campo] = leitor(row[nome]) if leitor else row[nome]
+    return dados
+
+
+def bench_registro(n_avaliacoes=20000, repeticoes=500):
+    """Carga e gravação de uma avaliação com o esquema gerado de ESQUEMA_AVALIACAO."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+    ids = random.Random(5).sample(range(1, n_avaliacoes + 1), repeticoes)
+
+    with db.conexao() as conn:
+        linhas = conn.execute(database._SQL_AVALIACAO_COMPLETA + " WHERE a.id <= 2000").fetchall()
+        tuplas = [tuple(linha) for linha in linhas]
+
+    print("Conversão de 2000 linhas da avaliação completa em dicionários:")
+    for rotulo, funcao in (
+            ("sqlite3.Row, colunas pelo nome (antes)", lambda _: [_avaliacao_por_nome(row) for row in linhas]),
+            ("tuplas, posições pré-calculadas", lambda _: [database._avaliacao_da_linha(row) for row in tuplas])):
+        mediana, p95 = cronometrar(funcao, 20)
+        imprimir_resultado(rotulo, mediana, p95)
+
+    def carregar(i):
+        db.cache_avaliacoes.limpar()
+        return db.obter_avaliacao(ids[i])
+
+    formulario = db.obter_avaliacao(1)
+    print("Por avaliação:")
+    for rotulo, funcao in (
+            ("obter_avaliacao sem cache", carregar),
+            ("salvar_avaliacao", lambda _: db.salvar_avaliacao(formulario)),
+            ("atualizar_avaliacao completa", lambda i: db.atualizar_avaliacao(ids[i], formulario))):
+        mediana, p95 = cronometrar(funcao, repeticoes)
+        imprimir_resultado(rotulo, mediana, p95)
+
+
+GRUPOS_MUSCULARES = ['Cuádriceps', 'Isquiotibiales', 'Bíceps', 'Tríceps', 'Deltoides', 'Glúteo medio']
+
+
+def _grados_por_json(conn, grado, grupo):
+    """Consulta por grau anterior a grados_fuerza: ler o JSON de todas as avaliações."""
+    encontrados = []
+    for avaliacao_id, texto in conn.execute(
+            "SELECT avaliacao_id, grados_fuerza FROM fuerza_muscular WHERE grados_fuerza <> ''"):
+        for item in json.loads(texto):
+            if item == f"{grupo}: Grado {grado}":
+                encontrados.append(avaliacao_id)
+    return encontrados
+
+
+def bench_forca(n_avaliacoes=100000, repeticoes=20):
+    """Avaliações por grau de força: JSON em fuerza_muscular versus a tabela grados_fuerza."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+
+    # Dois grupos com grau por avaliação, gravados nos dois formatos
+    rnd = random.Random(11)
+    itens = {i: [f"{grupo}: Grado {rnd.randint(0, 5)}" for grupo in rnd.sample(GRUPOS_MUSCULARES, 2)]
+             for i in range(1, n_avaliacoes + 1)}
+    with conexao_escrita(db) as conn:
+        conn.executemany("UPDATE fuerza_muscular SET grados_fuerza = ? WHERE avaliacao_id = ?",
+                         ((json.dumps(lista), i) for i, lista in itens.items()))
+        conn.executemany(database.INSERCAO_GRADOS, (
+            (*grau, i) for i, lista in itens.items()
+            for grau in database.graus_formulario({'Fuerza Muscular': lista})
+        ))
+        conn.commit()
+
+    def por_json(_):
+        with db.conexao() as conn:
+            return _grados_por_json(conn, 2, 'Cuádriceps')
+
+    print("Avaliações com cuádriceps grau 2:")
+    for rotulo, funcao in (
+            ("JSON lido linha a linha (antes)", por_json),
+            ("avaliacoes_por_grado_fuerza", lambda _: db.avaliacoes_por_grado_fuerza(2, 'cuadriceps'))):
+        mediana, p95 = cronometrar(funcao, repeticoes)
+        imprimir_resultado(rotulo, mediana, p95)
+
+    def lote_por_json(_):
+        with db.conexao() as conn:
+            return {avaliacao_id: json.loads(texto) if texto else [] for avaliacao_id, texto in conn.execute(
+                "SELECT avaliacao_id, grados_fuerza FROM fuerza_muscular WHERE avaliacao_id <= 2000")}
+
+    def lote_por_tabela(_):
+        with db.conexao() as conn:
+            return {avaliacao_id: database._itens_da_coluna(texto) for avaliacao_id, texto in conn.execute(
+                f"SELECT a.id, {database._SQL_ITENS_FORCA} FROM avaliacoes a WHERE a.id <= 2000")}
+
+    print("'Fuerza Muscular' de 2000 avaliações:")
+    for rotulo, funcao in (
+            ("coluna JSON com json.loads (antes)", lote_por_json),
+            ("grados_fuerza, itens juntados no SQL", lote_por_tabela)):
+        mediana, p95 = cronometrar(funcao, repeticoes)
+        imprimir_resultado(rotulo, mediana, p95)
+
+
+def bench_coorte(n_avaliacoes=50000, repeticoes=10):
+    """Coorte "escoliose, EVA >= 7, 3+ sessões": exportar tudo e filtrar versus consultar_coorte."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+
+    rnd = random.Random(5)
+    with conexao_escrita(db) as conn:
+        conn.executemany("UPDATE columna_vertebral SET escoliosis = ? WHERE avaliacao_id = ?",
+                         ((rnd.choice(['', '', '', 'Escoliosis dorsal derecha']), i)
+                          for i in range(1, n_avaliacoes + 1)))
+        conn.executemany("UPDATE plan_tratamiento SET sesiones_semana = ? WHERE avaliacao_id = ?",
+                         ((rnd.choice(['', '1', '2', '3', '4', '5']), i) for i in range(1, n_avaliacoes + 1)))
+        conn.commit()
+
+    filtros = [
+        ('Presencia de Escoliosis', 'preenchido', True),
+        ('escala_eva', '>=', 7),
+        ('sesiones_semana', '>=', 3),
+    ]
+
+    def exportar_e_filtrar(_):
+        # Antes: todas as avaliações completas, filtradas à mão
+        db.cache_avaliacoes.limpar()
+        ids = range(1, n_avaliacoes + 1)
+        return [dados['id'] for dados in db.obter_avaliacoes(ids).values()
+                if dados['Presencia de Escoliosis'] and dados['escala_eva'] >= 7
+                and dados['sesiones_semana'] and float(dados['sesiones_semana']) >= 3]
+
+    print("Coorte de três filtros:")
+    for rotulo, funcao in (
+            ("obter_avaliacoes de todas + filtro (antes)", exportar_e_filtrar),
+            ("consultar_coorte", lambda _: list(db.consultar_coorte(filtros))),
+            ("contar_coorte", lambda _: db.contar_coorte(filtros))):
+        mediana, p95 = cronometrar(funcao, repeticoes)
+        imprimir_resultado(rotulo, mediana, p95)
+
+    tracemalloc.start()
+    for _ in db.consultar_coorte(filtros):
+        pass
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  Pico de memória percorrendo a coorte: {pico / 1024:.0f} KiB")
+
+
+def _desfechos_em_python(conn):
+    """Os cálculos de analise_desfechos em laços Python sobre sqlite3.Row (referência do benchmark)."""
+    por_paciente = {}
+    por_mes = {}
+    for row in conn.execute('''
+    SELECT a.paciente_id, a.data_avaliacao, e.eva_valor, p.sesiones_semana
+    FROM avaliacoes a
+    LEFT JOIN escalas_dolor e ON e.avaliacao_id = a.id
+    LEFT JOIN plan_tratamiento p ON p.avaliacao_id = a.id
+    ORDER BY a.paciente_id, a.data_avaliacao, a.id
+    '''):
+        if row['eva_valor'] is None:
+            continue
+        por_paciente.setdefault(row['paciente_id'], []).append(row)
+        por_mes.setdefault(row['data_avaliacao'][:7], []).append(row['eva_valor'])
+
+    melhoras = {}
+    for linhas in por_paciente.values():
+        if len(linhas) > 1 and linhas[0]['sesiones_semana']:
+            sesiones = float(linhas[0]['sesiones_semana'])
+            melhoras.setdefault(sesiones, []).append(linhas[0]['eva_valor'] - linhas[-1]['eva_valor'])
+    return (
+        {mes: statistics.quantiles(valores, n=4, method='inclusive') if len(valores) > 1 else valores
+         for mes, valores in sorted(por_mes.items())},
+        {sesiones: statistics.mean(valores) for sesiones, valores in sorted(melhoras.items())},
+    )
+
+
+def bench_analise(n_avaliacoes=100000, avaliacoes_por_paciente=4, repeticoes=20):
+    """Desfechos da EVA: laços Python versus NumPy e o resultado guardado por data_version."""
+    from server import analise
+
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+
+    rnd = random.Random(9)
+    with conexao_escrita(db) as conn:
+        conn.execute(f"UPDATE avaliacoes SET paciente_id = (id - 1) / {int(avaliacoes_por_paciente)} + 1")
+        conn.executemany("UPDATE plan_tratamiento SET sesiones_semana = ?, duracion_sesion = ? WHERE avaliacao_id = ?",
+                         ((rnd.choice(['', '1', '2', '3', '5']), rnd.choice(['45 minutos', '60 minutos']), i)
+                          for i in range(1, n_avaliacoes + 1)))
+        conn.commit()
+
+    def em_python(_):
+        with db.conexao() as conn:
+            return _desfechos_em_python(conn)
+
+    def com_numpy(_):
+        with db.conexao() as conn:
+            return analise.calcular_desfechos(analise.carregar_colunas(conn))
+
+    print(f"Desfechos de {n_avaliacoes} avaliações:")
+    for rotulo, funcao in (
+            ("laços Python sobre sqlite3.Row (antes)", em_python),
+            ("NumPy, lendo e recalculando", com_numpy),
+            ("analise_desfechos sem alterações no banco", lambda _: db.analise_desfechos())):
+        mediana, p95 = cronometrar(funcao, repeticoes)
+        imprimir_resultado(rotulo, mediana, p95)
+
+    def apos_escrita(i):
+        db.executar_escrita(lambda conn: conn.execute(
+            "UPDATE escalas_dolor SET eva_valor = ? WHERE avaliacao_id = 1", (i % 11,)))
+        return db.analise_desfechos()
+
+    mediana, p95 = cronometrar(apos_escrita, repeticoes)
+    imprimir_resultado("analise_desfechos após uma escrita", mediana, p95)
+
+
+def bench_leitores(n_avaliacoes=50000, n_leitores=4, duracao=3.0, linhas_por_gravacao=2000, pausa=0.005):
+    """Leituras da lista de pacientes durante gravações longas e contínuas de um escritor."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+    sql_lista = f"{BancoDadosFisioterapia._SQL_LISTAGEM} ORDER BY r.id DESC LIMIT 30"
+    # Em bancos pequenos, cada gravação cobre no máximo metade das avaliações
+    linhas_por_gravacao = min(linhas_por_gravacao, max(1, n_avaliacoes // 2))
+
+    def gravacao_longa(conn, i):
+        # Uma gravação grande, como um salvar_avaliacao com muitas seções ou uma importação
+        inicio = 1 + (i * linhas_por_gravacao) % max(1, n_avaliacoes - linhas_por_gravacao)
+        conn.execute("UPDATE escalas_dolor SET eva_valor = (eva_valor + 1) % 11 "
+                     "WHERE avaliacao_id BETWEEN ? AND ?", (inicio, inicio + linhas_por_gravacao - 1))
+
+    def medir(ler, escrever):
+        parar = threading.Event()
+        tempos = [[] for _ in range(n_leitores)]
+        gravacoes = []
+
+        def leitor(indice):
+            while not parar.is_set():
+                inicio = time.perf_counter()
+                ler()
+                tempos[indice].append((time.perf_counter() - inicio) * 1000)
+                # Intervalo entre atualizações da tela; sem ele os leitores só disputariam o GIL
+                time.sleep(pausa)
+
+        def escritor():
+            i = 0
+            try:
+                while not parar.is_set():
+                    escrever(i)
+                    i += 1
+            finally:
+                # Registrado mesmo se a gravação falhar; o erro aparece no traceback da thread
+                gravacoes.append(i)
+
+        threads = [threading.Thread(target=leitor, args=(k,)) for k in range(n_leitores)]
+        threads.append(threading.Thread(target=escritor))
+        for thread in threads:
+            thread.start()
+        time.sleep(duracao)
+        parar.set()
+        for thread in threads:
+            thread.join()
+
+        todos = sorted(tempo for lista in tempos for tempo in lista)
+        return (len(todos) / duracao, statistics.median(todos), todos[int(len(todos) * 0.99) - 1],
+                gravacoes[0] / duracao)
+
+    # Antes: leituras e escritas na mesma conexão de escrita, serializadas por um lock
+    compartilhada = database.abrir_conexao(nome_db)
+    lock = threading.Lock()
+
+    def ler_compartilhada():
+        with lock:
+            compartilhada.execute(sql_lista).fetchall()
+
+    def escrever_compartilhada(i):
+        with lock:
+            compartilhada.execute("BEGIN IMMEDIATE")
+            gravacao_longa(compartilhada, i)
+            compartilhada.commit()
+
+    # Pool com conexões de leitura e escrita, como era o pool antes de mode=ro
+    pool_escrita = database.PoolConexoes(nome_db)
+
+    def ler_pool(pool):
+        def ler():
+            with pool.conexao() as conn:
+                conn.execute(sql_lista).fetchall()
+        return ler
+
+    def escrever_escritor(i):
+        db.executar_escrita(gravacao_longa, i)
+
+    print(f"{n_leitores} leitores da lista + 1 escritor ({linhas_por_gravacao} linhas por transação), "
+          f"{duracao:.0f} s cada:")
+    for rotulo, ler, escrever in (
+            ("conexão única com lock (antes)", ler_compartilhada, escrever_compartilhada),
+            ("pool de leitura e escrita", ler_pool(pool_escrita), escrever_escritor),
+            ("pool somente leitura (mode=ro)", ler_pool(db.pool), escrever_escritor)):
+        leituras, mediana, p99, gravacoes = medir(ler, escrever)
+        print(f"  {rotulo:<32} {leituras:8.0f} leituras/s   mediana {mediana:7.3f} ms   "
+              f"p99 {p99:8.3f} ms   {gravacoes:6.1f} gravações/s")
+
+    pool_escrita.fechar()
+    compartilhada.close()
+
+
+def bench_transacao(n_avaliacoes=20000, n_operacoes=200):
+    """Operações em sequência: um commit por chamada versus uma única db.transacao()."""
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+    formulario = {
+        'Nombre Completo': 'Paciente Benchmark', 'Fecha Nasc.': '01/02/1990',
+        'escala_eva': 5, 'fecha_evaluacion': '01/01/2026', 'Fuerza Muscular': ['Cuádriceps: Grado 3'],
+    }
+    # As exclusões rodam quatro vezes (duas variantes em cada synchronous) e não repetem ids
+    n_operacoes = min(n_operacoes, n_avaliacoes // 4)
+    ids = iter(range(1, n_avaliacoes + 1))
+
+    def salvar():
+        for _ in range(n_operacoes):
+            db.salvar_avaliacao(formulario)
+
+    def excluir_e_recalcular():
+        for _ in range(n_operacoes // 10):
+            db.excluir_avaliacoes([next(ids) for _ in range(10)])
+        db.reconstruir_estatisticas()
+
+    def em_transacao(funcao):
+        def executar():
+            with db.transacao():
+                funcao()
+        return executar
+
+    for synchronous in ('NORMAL', 'FULL'):
+        # synchronous não pode mudar dentro de uma transação, então é alterado com o
+        # escritor parado na fila, logo depois de um trabalho vazio
+        db.executar_escrita(lambda conn: None)
+        db.escritor._conn.execute(f"PRAGMA synchronous = {synchronous}")
+        print(f"synchronous = {synchronous}:")
+        for rotulo, funcao in (
+                (f"{n_operacoes} salvar_avaliacao (antes)", salvar),
+                ("idem, em db.transacao()", em_transacao(salvar)),
+                (f"{n_operacoes // 10} excluir_avaliacoes + estatísticas", excluir_e_recalcular),
+                ("idem, em db.transacao()", em_transacao(excluir_e_recalcular))):
+            inicio = time.perf_counter()
+            funcao()
+            print(f"  {rotulo:<45} {(time.perf_counter() - inicio) * 1000:9.1f} ms")
+
+
+def bench_notificacoes(n_avaliacoes=50000, repeticoes=200):
+    """Custo do monitor de alterações e atraso entre o commit e o aviso."""
+    from server.notificacoes import MonitorAlteracoes
+
+    nome_db = criar_banco_temporario()
+    print(f"Populando {n_avaliacoes} avaliações em {nome_db}...")
+    db = popular_banco(nome_db, n_avaliacoes)
+
+    monitor = MonitorAlteracoes(nome_db)
+    db.escritor.ao_confirmar.append(monitor.acordar)
+    avisos = []
+    recebido = threading.Event()
+
+    def ao_alterar(alteracoes):
+        avisos.append((time.perf_counter(), alteracoes))
+        recebido.set()
+
+    monitor.inscrever(ao_alterar)
+
+    def medir_ms(funcao, vezes=repeticoes):
+        tempos = []
+        for i in range(vezes):
+            inicio = time.perf_counter()
+            funcao(i)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        return statistics.median(tempos)
+
+    def atraso(gravar):
+        # Do início da gravação até o aviso chegar à thread do monitor
+        def medir(i):
+            recebido.clear()
+            gravar(i)
+            recebido.wait(5)
+        return medir
+
+    def gravar_local(i):
+        db.atualizar_avaliacao(1 + i, {'escala_eva': i % 11}, parcial=True)
+
+    externa = database.abrir_conexao(nome_db)
+
+    def gravar_externa(i):
+        # Outra estação gravando no mesmo arquivo, fora do escritor desta aplicação
+        externa.execute("UPDATE escalas_dolor SET eva_valor = ? WHERE avaliacao_id = ?",
+                        (i % 11, 1 + i))
+        externa.commit()
+
+    print(f"Monitor de alterações ({repeticoes} repetições, mediana):")
+    sem_alteracao = medir_ms(lambda i: monitor.verificar())
+    print(f"  verificar sem alterações (PRAGMA data_version)  {sem_alteracao * 1000:9.1f} us")
+    print(f"  gravação local até o aviso                      {medir_ms(atraso(gravar_local)):9.3f} ms")
+    # Cada uma espera a verificação periódica, então bastam poucas repetições
+    print(f"  gravação de outra estação até o aviso           "
+          f"{medir_ms(atraso(gravar_externa), vezes=20):9.3f} ms "
+          f"(verificação a cada {monitor.intervalo:.1f} s)")
+
+    recarregar = medir_ms(lambda i: db.listar_avaliacoes_cursor(tamanho=20))
+    reler = medir_ms(lambda i: db.obter_resumos([1 + i]))
+    print(f"  recarregar a primeira página (antes)            {recarregar:9.3f} ms")
+    print(f"  reler só a linha alterada (obter_resumos)       {reler:9.3f} ms")
+
+    db.escritor.ao_confirmar.remove(monitor.acordar)
+    monitor.fechar()
+    externa.close()
+
+
+BENCHMARKS = {
+    'pool': bench_pool,
+    'abertura': bench_abertura,
+    'paginacao': bench_paginacao,
+    'busca_textual': bench_busca_textual,
+    'busca_nome': bench_busca_nome,
+    'resumo': bench_resumo,
+    'estatisticas': bench_estatisticas,
+    'reevaluaciones': bench_reevaluaciones,
+    'atualizacao': bench_atualizacao,
+    'escrita': bench_escrita,
+    'importacao': bench_importacao,
+    'exportacao': bench_exportacao,
+    'exclusao': bench_exclusao,
+    'pacientes': bench_pacientes,
+    'historico': bench_historico,
+    'lote': bench_lote,
+    'registro': bench_registro,
+    'forca': bench_forca,
+    'coorte': bench_coorte,
+    'analise': bench_analise,
+    'leitores': bench_leitores,
+    'transacao': bench_transacao,
+    'notificacoes': bench_notificacoes,
+}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print(f"Uso: python -m server.benchmark <{'|'.join(BENCHMARKS)}> [n_avaliacoes]")
+        sys.exit(1)
+
+    argumentos = [int(valor) for valor in sys.argv[2:3]]
+    BENCHMARKS[sys.argv[1]](*argumentos)
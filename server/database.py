@@ -1,9 +1,1108 @@
 import sqlite3
 import json
+import csv
+import gzip
+import io
+import base64
 import os
 import datetime
+import sys
 import tkinter as tk
 import threading
+import time
+import contextlib
+import copy
+import queue
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.request import pathname2url
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.migracoes import aplicar_migracoes, recalcular_estatisticas
+from server.normalizacao import (
+    normalizar_texto, normalizar_data, normalizar_contato, intervalo_prefixo, itens_forca_muscular
+)
+
+
+def abrir_conexao(nome_db, timeout=10.0, somente_leitura=False):
+    """
+    Abre uma conexão configurada para uso pela aplicação.
+    
+    Args:
+        nome_db (str): Caminho do arquivo do banco de dados.
+        timeout (float): Segundos de espera pelo lock do SQLite (busy timeout).
+        somente_leitura (bool): Abrir com a URI "file:...?mode=ro". Em WAL, uma
+            conexão assim lê o último commit sem esperar pelo escritor, e qualquer
+            tentativa de escrita falha com sqlite3.OperationalError. O arquivo já
+            precisa existir (ver BancoDadosFisioterapia._migrar).
+        
+    Returns:
+        sqlite3.Connection: Conexão com row_factory sqlite3.Row.
+    """
+    if somente_leitura:
+        uri = f"file:{pathname2url(os.path.abspath(nome_db))}?mode=ro"
+        conn = sqlite3.connect(uri, timeout=timeout, check_same_thread=False, uri=True)
+    else:
+        conn = sqlite3.connect(nome_db, timeout=timeout, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA synchronous = NORMAL;')
+    conn.execute('PRAGMA temp_store = MEMORY;')
+    conn.execute('PRAGMA cache_size = 5000;')
+    conn.execute('PRAGMA foreign_keys = ON;')
+    return conn
+
+
+class PoolConexoes:
+    """
+    Pool de conexões SQLite com afinidade por thread.
+    
+    Cada thread recebe uma conexão própria enquanto estiver usando o banco e
+    chamadas aninhadas na mesma thread reutilizam essa conexão. Ao final do uso
+    a conexão volta para a lista de ociosas e pode ser reaproveitada por outra
+    thread, evitando abrir o arquivo do banco a cada consulta.
+    """
+    
+    def __init__(self, nome_db, tamanho_maximo=5, timeout=10.0, intervalo_verificacao=30.0,
+                 somente_leitura=False):
+        """
+        Args:
+            nome_db (str): Caminho do arquivo do banco de dados.
+            tamanho_maximo (int): Número máximo de conexões abertas ao mesmo tempo.
+            timeout (float): Segundos de espera por uma conexão livre (e pelo lock do SQLite).
+            intervalo_verificacao (float): Conexões ociosas há mais tempo que isso são
+                testadas antes de serem entregues novamente.
+            somente_leitura (bool): Abrir as conexões com mode=ro (ver abrir_conexao).
+        """
+        self.nome_db = nome_db
+        self.tamanho_maximo = tamanho_maximo
+        self.timeout = timeout
+        self.intervalo_verificacao = intervalo_verificacao
+        self.somente_leitura = somente_leitura
+        self.fechado = False
+        
+        self._ociosas = []  # Pilha de (conexão, instante em que foi devolvida)
+        self._total = 0     # Conexões abertas (ociosas + em uso)
+        self._condicao = threading.Condition()
+        self._local = threading.local()
+    
+    def _criar_conexao(self):
+        """Abre uma nova conexão já configurada para uso pela aplicação."""
+        return abrir_conexao(self.nome_db, self.timeout, self.somente_leitura)
+    
+    def _conexao_valida(self, conn, ociosa_desde):
+        """Verifica se uma conexão ociosa ainda pode ser usada."""
+        try:
+            # Acessar o atributo levanta ProgrammingError se a conexão foi fechada
+            conn.in_transaction
+            # Consulta de teste apenas para conexões paradas há muito tempo
+            if time.monotonic() - ociosa_desde >= self.intervalo_verificacao:
+                conn.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def _descartar(self, conn):
+        """Fecha uma conexão e libera sua vaga no pool (chamar com a condição adquirida)."""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self._total -= 1
+        self._condicao.notify()
+    
+    def obter(self):
+        """
+        Retira uma conexão do pool, criando uma nova se houver vaga.
+        
+        Returns:
+            sqlite3.Connection: Conexão pronta para uso.
+            
+        Raises:
+            sqlite3.OperationalError: Se nenhuma conexão ficar livre dentro do timeout.
+        """
+        with self._condicao:
+            while True:
+                if self.fechado:
+                    raise sqlite3.ProgrammingError("Pool de conexões fechado")
+                
+                while self._ociosas:
+                    conn, ociosa_desde = self._ociosas.pop()
+                    if self._conexao_valida(conn, ociosa_desde):
+                        return conn
+                    self._descartar(conn)
+                
+                if self._total < self.tamanho_maximo:
+                    self._total += 1
+                    break
+                
+                if not self._condicao.wait(self.timeout):
+                    raise sqlite3.OperationalError("Tempo esgotado aguardando uma conexão livre")
+        
+        try:
+            return self._criar_conexao()
+        except Exception:
+            with self._condicao:
+                self._total -= 1
+                self._condicao.notify()
+            raise
+    
+    def devolver(self, conn):
+        """Devolve uma conexão ao pool, desfazendo transações deixadas abertas."""
+        with self._condicao:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error:
+                self._descartar(conn)
+                return
+            
+            if self.fechado:
+                self._descartar(conn)
+            else:
+                self._ociosas.append((conn, time.monotonic()))
+                self._condicao.notify()
+    
+    @contextlib.contextmanager
+    def conexao(self):
+        """
+        Context manager que empresta a conexão da thread atual.
+        
+        Uso:
+            with pool.conexao() as conn:
+                conn.execute(...)
+        """
+        atual = getattr(self._local, 'conn', None)
+        if atual is not None:
+            # Uso aninhado na mesma thread: reaproveitar a conexão já emprestada
+            yield atual
+            return
+        
+        conn = self.obter()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self.devolver(conn)
+    
+    def liberar_ociosas(self):
+        """Fecha as conexões ociosas; novas serão abertas sob demanda."""
+        with self._condicao:
+            while self._ociosas:
+                conn, _ = self._ociosas.pop()
+                self._descartar(conn)
+    
+    def fechar(self):
+        """Fecha o pool. Conexões em uso são fechadas quando forem devolvidas."""
+        with self._condicao:
+            self.fechado = True
+            self._condicao.notify_all()
+        self.liberar_ociosas()
+
+
+class CacheLRU:
+    """
+    Cache LRU limitado e thread-safe, com contadores de acertos e falhas.
+    
+    Para evitar guardar dados antigos quando uma leitura corre junto com uma
+    escrita, cada invalidação incrementa uma versão: quem leu do banco antes
+    da invalidação não consegue mais guardar o resultado.
+    """
+    
+    def __init__(self, capacidade=256):
+        self.capacidade = capacidade
+        self.acertos = 0
+        self.falhas = 0
+        self.versao = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def obter(self, chave):
+        """Retorna o valor guardado (marcando-o como recente) ou None."""
+        with self._lock:
+            valor = self._itens.get(chave)
+            if valor is None:
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return valor
+    
+    def guardar(self, chave, valor, versao):
+        """
+        Guarda um valor lido do banco.
+        
+        Args:
+            versao (int): Valor de self.versao lido antes da consulta ao banco.
+        """
+        with self._lock:
+            if versao != self.versao:
+                return
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+    
+    def invalidar(self, *chaves):
+        """Remove as chaves informadas do cache."""
+        with self._lock:
+            self.versao += 1
+            for chave in chaves:
+                self._itens.pop(chave, None)
+    
+    def limpar(self):
+        """Esvazia o cache."""
+        with self._lock:
+            self.versao += 1
+            self._itens.clear()
+    
+    def estatisticas(self):
+        """Retorna os contadores do cache."""
+        with self._lock:
+            return {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'tamanho': len(self._itens),
+                'capacidade': self.capacidade,
+            }
+
+
+def _banco_ocupado(erro):
+    """True se o erro do SQLite indica que outro processo está com o lock do banco."""
+    mensagem = str(erro).lower()
+    return 'locked' in mensagem or 'busy' in mensagem
+
+
+class UnidadeDesfeita(Exception):
+    """A unidade de trabalho de EscritorBanco.transacao() foi desfeita por um erro no bloco."""
+
+
+class _UnidadeTrabalho:
+    """Fila das escritas de uma unidade de trabalho, atendida pela thread do escritor."""
+    
+    _contador = 0
+    _contador_lock = threading.Lock()
+    
+    def __init__(self):
+        self.fila = queue.Queue()
+        self.desfazer = False
+        self._finalizada = False
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def proximo_savepoint(cls):
+        """Número para o nome de um SAVEPOINT aninhado, único no processo."""
+        with cls._contador_lock:
+            cls._contador += 1
+            return cls._contador
+    
+    def enviar(self, item):
+        """Enfileira (funcao, args, kwargs, futuro, isolar), ou None para encerrar, para a thread do escritor."""
+        with self._lock:
+            if not self._finalizada:
+                self.fila.put(item)
+                return
+        # A transação da unidade já terminou (ex.: o lote falhou)
+        if item is not None:
+            item[3].set_exception(sqlite3.OperationalError("A transação da unidade de trabalho foi encerrada"))
+    
+    def executar_comando(self, sql):
+        """Executa um comando de controle (SAVEPOINT, RELEASE) fora do SAVEPOINT por escrita."""
+        futuro = Future()
+        self.enviar((lambda conn: conn.execute(sql), (), {}, futuro, False))
+        return futuro.result()
+    
+    def encerrar(self, desfazer):
+        """Pede o fim da unidade: commit com o lote ou, com desfazer, rollback."""
+        self.desfazer = desfazer
+        self.enviar(None)
+    
+    def finalizar(self):
+        """Marca a unidade como terminada e recusa o que ainda estiver na fila (thread do escritor)."""
+        with self._lock:
+            self._finalizada = True
+        while True:
+            try:
+                item = self.fila.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and item[3].set_running_or_notify_cancel():
+                item[3].set_exception(
+                    sqlite3.OperationalError("A transação da unidade de trabalho foi encerrada"))
+
+
+class EscritorBanco:
+    """
+    Thread única responsável por todas as escritas em um arquivo de banco.
+    
+    Trabalhos são funções no formato funcao(conn, *args, **kwargs) que executam
+    seus comandos sem abrir nem confirmar transações. enviar() devolve um
+    Future com o retorno do trabalho. Os trabalhos que se acumulam na fila são
+    gravados na mesma transação (group commit), cada um em seu próprio
+    SAVEPOINT: o erro de um trabalho desfaz apenas as alterações dele.
+    
+    Com um único escritor por processo, as escritas da aplicação não disputam o
+    lock entre si; contra outros processos (outra estação usando o mesmo
+    arquivo), o escritor espera busy_timeout e repete a transação com espera
+    exponencial antes de desistir.
+    
+    transacao() junta as escritas de uma thread em uma única transação (unidade
+    de trabalho), confirmada ao fim do bloco with.
+    
+    As funções de ao_confirmar são chamadas, sem argumentos, na thread do escritor
+    depois de cada commit (o MonitorAlteracoes as usa para não esperar a próxima
+    verificação); devem ser rápidas e não podem enviar escritas.
+    """
+    
+    def __init__(self, nome_db, janela_agrupamento=0.0, tamanho_lote=64,
+                 busy_timeout=5.0, tentativas=5, espera_tentativa=0.05):
+        """
+        Args:
+            nome_db (str): Caminho do arquivo do banco de dados.
+            janela_agrupamento (float): Segundos que o escritor espera por outros
+                trabalhos depois do primeiro antes de iniciar a transação. Com 0, o
+                lote reúne o que chegou enquanto a transação anterior era gravada;
+                uma janela de alguns milissegundos só compensa quando o commit é
+                caro (synchronous = FULL, disco lento).
+            tamanho_lote (int): Máximo de trabalhos por transação.
+            busy_timeout (float): Segundos que o SQLite espera pelo lock a cada tentativa.
+            tentativas (int): Tentativas de obter o lock de escrita e de confirmar.
+            espera_tentativa (float): Espera antes da segunda tentativa; dobra a cada nova.
+        """
+        self.nome_db = nome_db
+        self.janela_agrupamento = janela_agrupamento
+        self.tamanho_lote = tamanho_lote
+        self.busy_timeout = busy_timeout
+        self.tentativas = tentativas
+        self.espera_tentativa = espera_tentativa
+        self.fechado = False
+        
+        self._fila = queue.Queue()
+        self._conn = None
+        self._local = threading.local()  # .unidade: unidade de trabalho aberta pela thread
+        self.ao_confirmar = []
+        self._thread = threading.Thread(
+            target=self._executar, name=f"EscritorBanco-{os.path.basename(nome_db)}", daemon=True
+        )
+        self._thread.start()
+    
+    def enviar(self, funcao, *args, **kwargs):
+        """
+        Agenda um trabalho de escrita.
+        
+        Args:
+            funcao (callable): Função chamada como funcao(conn, *args, **kwargs).
+            
+        Returns:
+            concurrent.futures.Future: Resultado (ou exceção) do trabalho, disponível
+                depois que a transação que o contém for confirmada.
+        """
+        futuro = Future()
+        if threading.current_thread() is self._thread:
+            # Trabalho enviado por outro trabalho: executar na transação atual,
+            # esperar pela fila aqui travaria o escritor
+            futuro.set_running_or_notify_cancel()
+            try:
+                futuro.set_result(funcao(self._conn, *args, **kwargs))
+            except Exception as e:
+                futuro.set_exception(e)
+            return futuro
+        
+        unidade = getattr(self._local, 'unidade', None)
+        if unidade is not None:
+            # A thread tem uma unidade de trabalho aberta: entrar na transação dela
+            unidade.enviar((funcao, args, kwargs, futuro, True))
+            return futuro
+        
+        if self.fechado:
+            raise sqlite3.ProgrammingError("Escritor do banco fechado")
+        self._fila.put((funcao, args, kwargs, futuro))
+        return futuro
+    
+    def executar(self, funcao, *args, **kwargs):
+        """Envia um trabalho e espera o resultado; exceções do trabalho são relançadas."""
+        return self.enviar(funcao, *args, **kwargs).result()
+    
+    def em_transacao(self):
+        """True se as escritas da thread atual entram em uma transação já aberta."""
+        return (threading.current_thread() is self._thread
+                or getattr(self._local, 'unidade', None) is not None)
+    
+    @contextlib.contextmanager
+    def transacao(self):
+        """
+        Unidade de trabalho: as escritas enviadas pela thread atual dentro do bloco
+        entram em uma única transação, com um único commit no final.
+        
+        Ao entrar, um trabalho da fila abre a transação e passa a executar só as
+        escritas desta thread, cada uma em seu SAVEPOINT (como no group commit,
+        o erro de uma delas desfaz só ela e é relançado para quem a enviou). Cada
+        escrita retorna assim que é executada; o commit acontece ao sair do bloco,
+        e uma exceção no bloco desfaz a unidade inteira. Um transacao() aninhado
+        (ou chamado dentro de um trabalho de escrita) vira um SAVEPOINT.
+        
+        Enquanto a unidade estiver aberta, as escritas de outras threads esperam
+        na fila, então ela deve ser curta e não pode esperar por escritas enviadas
+        de outra thread. As leituras pelo pool só veem as alterações da unidade
+        depois do commit; para lê-las antes, use um trabalho de escrita.
+        
+        Uso:
+            with escritor.transacao():
+                escritor.executar(trabalho_1)
+                escritor.executar(trabalho_2)
+        
+        Raises:
+            sqlite3.Error: Se o commit da unidade falhar (nada é gravado).
+        """
+        if threading.current_thread() is self._thread:
+            with self._savepoint(self._conn.execute):
+                yield
+            return
+        
+        unidade = getattr(self._local, 'unidade', None)
+        if unidade is not None:
+            with self._savepoint(unidade.executar_comando):
+                yield
+            return
+        
+        if self.fechado:
+            raise sqlite3.ProgrammingError("Escritor do banco fechado")
+        unidade = _UnidadeTrabalho()
+        futuro = Future()
+        self._fila.put((self._servir_unidade, (unidade,), {}, futuro))
+        self._local.unidade = unidade
+        try:
+            yield
+        except BaseException:
+            self._local.unidade = None
+            unidade.encerrar(desfazer=True)
+            # Esperar o rollback; o erro que importa é o do bloco
+            futuro.exception()
+            raise
+        
+        self._local.unidade = None
+        unidade.encerrar(desfazer=False)
+        futuro.result()
+    
+    @contextlib.contextmanager
+    def _savepoint(self, executar_sql):
+        """SAVEPOINT desfeito se o bloco levantar uma exceção (transacao() aninhado)."""
+        nome = f"unidade_{_UnidadeTrabalho.proximo_savepoint()}"
+        executar_sql(f"SAVEPOINT {nome}")
+        try:
+            yield
+        except BaseException:
+            executar_sql(f"ROLLBACK TO {nome}")
+            executar_sql(f"RELEASE {nome}")
+            raise
+        executar_sql(f"RELEASE {nome}")
+    
+    def _servir_unidade(self, conn, unidade):
+        """
+        Trabalho de escrita de transacao(): mantém a transação do lote aberta,
+        executando as escritas da unidade até que ela seja encerrada.
+        
+        Raises:
+            UnidadeDesfeita: Se o bloco with terminou com uma exceção; o lote
+                desfaz o que a unidade gravou.
+        """
+        try:
+            while True:
+                item = unidade.fila.get()
+                if item is None:
+                    break
+                funcao, args, kwargs, futuro, isolar = item
+                if not futuro.set_running_or_notify_cancel():
+                    continue
+                
+                if isolar:
+                    conn.execute("SAVEPOINT trabalho_unidade")
+                try:
+                    resultado = funcao(conn, *args, **kwargs)
+                except Exception as e:
+                    if isolar:
+                        conn.execute("ROLLBACK TO trabalho_unidade")
+                        conn.execute("RELEASE trabalho_unidade")
+                    futuro.set_exception(e)
+                else:
+                    if isolar:
+                        conn.execute("RELEASE trabalho_unidade")
+                    futuro.set_result(resultado)
+        finally:
+            unidade.finalizar()
+        
+        if unidade.desfazer:
+            raise UnidadeDesfeita("Unidade de trabalho desfeita")
+    
+    def fechar(self, esperar=True):
+        """Grava os trabalhos já enviados e encerra a thread do escritor."""
+        if self.fechado:
+            return
+        self.fechado = True
+        self._fila.put(None)
+        if esperar and threading.current_thread() is not self._thread:
+            self._thread.join()
+    
+    def _executar(self):
+        """Laço da thread: junta os trabalhos em lotes e grava cada lote."""
+        self._conn = abrir_conexao(self.nome_db, self.busy_timeout)
+        try:
+            encerrar = False
+            while not encerrar:
+                trabalho = self._fila.get()
+                if trabalho is None:
+                    break
+                
+                lote = [trabalho]
+                limite = time.monotonic() + self.janela_agrupamento
+                while len(lote) < self.tamanho_lote:
+                    try:
+                        proximo = self._fila.get(timeout=max(0.0, limite - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if proximo is None:
+                        encerrar = True
+                        break
+                    lote.append(proximo)
+                
+                self._gravar_lote(lote)
+        finally:
+            self._conn.close()
+    
+    def _repetir_se_ocupado(self, comando):
+        """Executa comando() repetindo, com espera exponencial, enquanto o banco estiver ocupado."""
+        for tentativa in range(self.tentativas):
+            try:
+                return comando()
+            except sqlite3.OperationalError as e:
+                if not _banco_ocupado(e) or tentativa == self.tentativas - 1:
+                    raise
+                time.sleep(self.espera_tentativa * (2 ** tentativa))
+    
+    def _gravar_lote(self, lote):
+        """Executa um lote de trabalhos em uma transação e resolve os futures."""
+        conn = self._conn
+        lote = [trabalho for trabalho in lote if trabalho[3].set_running_or_notify_cancel()]
+        if not lote:
+            return
+        
+        try:
+            self._repetir_se_ocupado(lambda: conn.execute("BEGIN IMMEDIATE"))
+        except sqlite3.Error as e:
+            for _, _, _, futuro in lote:
+                futuro.set_exception(e)
+            return
+        
+        if len(lote) == 1:
+            self._gravar_trabalho_unico(*lote[0])
+            return
+        
+        resultados = []
+        try:
+            for funcao, args, kwargs, futuro in lote:
+                conn.execute("SAVEPOINT trabalho_escrita")
+                try:
+                    resultado = funcao(conn, *args, **kwargs)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO trabalho_escrita")
+                    conn.execute("RELEASE trabalho_escrita")
+                    resultados.append((futuro, None, e))
+                else:
+                    conn.execute("RELEASE trabalho_escrita")
+                    resultados.append((futuro, resultado, None))
+            
+            self._repetir_se_ocupado(conn.commit)
+        
+        except sqlite3.Error as e:
+            # Falha da transação inteira (ex.: disco cheio): nada do lote foi gravado
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+            for _, _, _, futuro in lote:
+                futuro.set_exception(e)
+            return
+        
+        self._avisar_commit()
+        for futuro, resultado, erro in resultados:
+            if erro is not None:
+                futuro.set_exception(erro)
+            else:
+                futuro.set_result(resultado)
+    
+    def _gravar_trabalho_unico(self, funcao, args, kwargs, futuro):
+        """
+        Executa um trabalho que está sozinho na transação, sem SAVEPOINT.
+        
+        O rollback da transação já isola o erro, e dentro de um SAVEPOINT o FTS5
+        fica mais lento conforme o índice cresce: uma importação de milhares de
+        avaliações em um só trabalho levava de 1 s a 5 s por lote.
+        """
+        conn = self._conn
+        try:
+            resultado = funcao(conn, *args, **kwargs)
+            self._repetir_se_ocupado(conn.commit)
+        except Exception as e:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+            futuro.set_exception(e)
+        else:
+            self._avisar_commit()
+            futuro.set_result(resultado)
+    
+    def _avisar_commit(self):
+        """Chama as funções de ao_confirmar; o erro de uma não afeta as escritas."""
+        for funcao in list(self.ao_confirmar):
+            try:
+                funcao()
+            except Exception as e:
+                print(f"Erro ao avisar commit: {e}")
+
+
+# Um pool, um cache e um escritor por arquivo de banco, compartilhados por todas as instâncias
+_pools = {}
+_caches_avaliacoes = {}
+_escritores = {}
+_pools_lock = threading.Lock()
+_bancos_migrados = set()
+
+# Threads para executar leituras fora da thread da interface, compartilhadas por todos os bancos
+_executor_leitura = None
+
+
+def obter_pool(nome_db, tamanho_maximo=5):
+    """
+    Retorna o pool de leitura do arquivo informado, criando-o se necessário.
+    
+    As conexões do pool são somente leitura: todas as escritas passam pelo
+    EscritorBanco, e em WAL um leitor mode=ro nunca espera pela transação dele.
+    """
+    chave = os.path.abspath(nome_db)
+    with _pools_lock:
+        pool = _pools.get(chave)
+        if pool is None or pool.fechado:
+            pool = PoolConexoes(nome_db, tamanho_maximo=tamanho_maximo, somente_leitura=True)
+            _pools[chave] = pool
+        return pool
+
+
+def obter_cache_avaliacoes(nome_db, capacidade=256):
+    """Retorna o cache de avaliações do arquivo informado, criando-o se necessário."""
+    chave = os.path.abspath(nome_db)
+    with _pools_lock:
+        cache = _caches_avaliacoes.get(chave)
+        if cache is None:
+            cache = CacheLRU(capacidade)
+            _caches_avaliacoes[chave] = cache
+        return cache
+
+
+def obter_escritor(nome_db):
+    """Retorna o escritor do arquivo informado, criando-o (e iniciando sua thread) se necessário."""
+    chave = os.path.abspath(nome_db)
+    with _pools_lock:
+        escritor = _escritores.get(chave)
+        if escritor is None or escritor.fechado:
+            escritor = EscritorBanco(nome_db)
+            _escritores[chave] = escritor
+        return escritor
+
+
+def obter_executor_leitura(max_workers=4):
+    """
+    Retorna o pool fixo de threads usado para chamadas em segundo plano, criando-o
+    se necessário.
+    
+    O padrão fica abaixo do tamanho do pool de conexões (5) para que a thread da
+    interface ainda encontre uma conexão livre com todas as threads ocupadas.
+    """
+    global _executor_leitura
+    with _pools_lock:
+        if _executor_leitura is None:
+            _executor_leitura = ThreadPoolExecutor(max_workers=max_workers,
+                                                   thread_name_prefix='LeituraBanco')
+        return _executor_leitura
+
+
+def fechar_pools():
+    """Grava as escritas pendentes e fecha escritores e pools (usar ao encerrar a aplicação)."""
+    global _executor_leitura
+    with _pools_lock:
+        escritores = list(_escritores.values())
+        _escritores.clear()
+        executor, _executor_leitura = _executor_leitura, None
+    if executor is not None:
+        # Leituras ainda na fila não têm mais quem use o resultado
+        executor.shutdown(wait=False, cancel_futures=True)
+    for escritor in escritores:
+        escritor.fechar()
+    
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.fechar()
+        _pools.clear()
+
+
+# Registro único do esquema da avaliação. Dele saem, uma vez na importação do
+# módulo, os INSERTs de salvar_avaliacao e da importação em lote, os UPDATEs de
+# atualizar_avaliacao, o SELECT de obter_avaliacao e das exportações com a
+# conversão das linhas, e os rótulos da janela de detalhes.
+#
+# (tabela, coluna de ligação, ((coluna, campo do formulário, padrão, conversor, rótulo), ...)).
+# Colunas derivadas (nome_busca, *_iso) repetem o campo de origem com um conversor
+# e não têm rótulo: são gravadas, mas não voltam no dicionário da avaliação.
+ESQUEMA_AVALIACAO = (
+    ('pacientes', 'id', (
+        ('nome', 'Nombre Completo', '', None, 'Nome Completo'),
+        ('idade', 'Edad', '', None, 'Idade'),
+        ('genero', 'Genero', '', None, 'Gênero'),
+        ('contato', 'Contacto', '', None, 'Contato'),
+        ('data_nascimento', 'Fecha Nasc.', '', None, 'Data de Nascimento'),
+        ('area_consulta', 'Área de consulta', '', None, 'Área de Consulta'),
+        ('alergias', 'Alergias', '', None, 'Alergias'),
+        ('nome_busca', 'Nombre Completo', '', normalizar_texto, None),
+        ('data_nascimento_iso', 'Fecha Nasc.', '', normalizar_data, None),
+        ('contato_busca', 'Contacto', '', normalizar_contato, None),
+    )),
+    ('historico_clinico', 'avaliacao_id', (
+        ('motivo_consulta', 'Motivo de consulta', '', None, 'Motivo da Consulta'),
+        ('antecedentes', 'Antecedentes', '', None, 'Antecedentes'),
+        ('enfermedad_actual', 'Efermedad actual', '', None, 'Doença Atual'),
+        ('cirugias_previas', 'Cirurgías previas', '', None, 'Cirurgias Prévias'),
+        ('medicamentos_actuales', 'Medicamentos actuales', '', None, 'Medicamentos Atuais'),
+    )),
+    ('exame_fisico', 'avaliacao_id', (
+        ('pa', 'PA', '', None, 'Pressão Arterial'),
+        ('pulso', 'Pulso', '', None, 'Pulso'),
+        ('talla', 'Talla', '', None, 'Altura'),
+        ('peso', 'Peso', '', None, 'Peso'),
+        ('temperatura', 'T', '', None, 'Temperatura'),
+        ('fr', 'FR', '', None, 'Frequência Respiratória'),
+        ('sat_o2', 'Sat.O2', '', None, 'Saturação de O2'),
+        ('idx', 'IDx', '', None, 'Diagnóstico'),
+        ('conducta', 'Conducta', '', None, 'Conduta'),
+    )),
+    ('inspeccion_palpacion', 'avaliacao_id', (
+        ('postura', 'Postura', '', None, 'Postura'),
+        ('simetria_corporal', 'Simetría corporal', '', None, 'Simetria Corporal'),
+        ('deformidades_aparentes', 'Deformidades aparentes', '', None, 'Deformidades Aparentes'),
+        ('puntos_dolorosos', 'Puntos dolorosos', '', None, 'Pontos Dolorosos'),
+        ('tension_muscular', 'Tensión muscular', '', None, 'Tensão Muscular'),
+    )),
+    ('columna_vertebral', 'avaliacao_id', (
+        ('curvas_fisiologicas', 'Curvas Fisiológicas', '', None, 'Curvas Fisiológicas'),
+        ('escoliosis', 'Presencia de Escoliosis', '', None, 'Presença de Escoliose'),
+        ('cifosis_lordosis', 'Cifosis o Lordosis', '', None, 'Cifose ou Lordose'),
+    )),
+    ('movilidad_articular', 'avaliacao_id', (
+        ('movimiento_activo', 'Movimiento Activo', '', None, 'Movimento Ativo'),
+        ('movimiento_pasivo', 'Movimiento Pasivo', '', None, 'Movimento Passivo'),
+        ('evaluacion_articulaciones', 'Evaluación de articulaciones', '', None, 'Avaliação de Articulações'),
+    )),
+    ('fuerza_muscular', 'avaliacao_id', (
+        ('evaluacion_grupos_musculares', 'Evaluación de grupos musculares', '', None, 'Avaliação de Grupos Musculares'),
+    )),
+    ('evaluacion_neuromuscular', 'avaliacao_id', (
+        ('reflejos', 'Reflejos', '', None, 'Reflexos'),
+        ('coordinacion_motora', 'Coordinación motora', '', None, 'Coordenação Motora'),
+        ('equilibrio', 'Equilibrio', '', None, 'Equilíbrio'),
+    )),
+    ('evaluacion_funcional', 'avaliacao_id', (
+        ('capacidad_actividades_diarias', 'Capacidad para realizar actividades diarias', '', None, 'Capacidade para Atividades Diárias'),
+        ('limitaciones_dificultades', 'Limitaciones y dificultades', '', None, 'Limitações e Dificuldades'),
+    )),
+    ('coordinacion', 'avaliacao_id', (
+        ('ejercicios_dedos', 'Ejercicios con dedos', '', None, 'Exercícios com Dedos'),
+        ('precision_movimientos', 'Precisión en movimientos', '', None, 'Precisão nos Movimentos'),
+        ('marcha', 'Marcha', '', None, 'Marcha'),
+        ('equilibrio_dinamico', 'Equilibrio Dinámico', '', None, 'Equilíbrio Dinâmico'),
+    )),
+    ('pruebas_especificas', 'avaliacao_id', (
+        ('pruebas_ortopedicas', 'Pruebas ortopédicas', '', None, 'Testes Ortopédicos'),
+        ('pruebas_neurologicas', 'Pruebas neurológicas', '', None, 'Testes Neurológicos'),
+        ('pruebas_estabilidad', 'Pruebas de estabilidad', '', None, 'Testes de Estabilidade'),
+    )),
+    ('escalas_dolor', 'avaliacao_id', (
+        ('eva_valor', 'escala_eva', 0, None, 'Escala de Dor (EVA)'),
+        ('observaciones_dolor', 'observaciones_dolor', '', None, 'Observações sobre a Dor'),
+    )),
+    ('diagnosticos', 'avaliacao_id', (
+        ('resumen_problema', 'Resumen del problema', '', None, 'Resumo do Problema'),
+        ('objetivos_tratamiento', 'Objetivos del tratamiento', '', None, 'Objetivos do Tratamento'),
+    )),
+    ('plan_tratamiento', 'avaliacao_id', (
+        ('sesiones_semana', 'sesiones_semana', '', None, 'Sessões por Semana'),
+        ('duracion_sesion', 'duracion_sesion', '', None, 'Duração da Sessão'),
+        ('obs_frecuencia', 'obs_frecuencia', '', None, 'Observações de Frequência'),
+        ('ejercicios_recomendados', 'Ejercicios recomendados', '', None, 'Exercícios Recomendados'),
+    )),
+    ('seguimiento', 'avaliacao_id', (
+        ('programacion_seguimiento', 'programacion_seguimiento', '', None, 'Programação de Seguimento'),
+        ('fecha_evaluacion', 'fecha_evaluacion', '', None, 'Data da Próxima Avaliação'),
+        ('criterio_revision', 'criterio_revision', '', None, 'Critério de Revisão'),
+        ('criterios_adicionales', 'criterios_adicionales', '', None, 'Critérios Adicionais'),
+        ('fecha_evaluacion_iso', 'fecha_evaluacion', '', normalizar_data, None),
+    )),
+)
+
+# 'Fuerza Muscular' (lista de opções) não tem coluna: cada item é uma linha de
+# grados_fuerza, com o grupo e o grau separados para consultas por grau. Na
+# leitura, uma subconsulta junta os itens com o separador char(31); eles saem
+# da chave primária (avaliacao_id, posicao) já na ordem da lista.
+CAMPO_FORCA_MUSCULAR = 'Fuerza Muscular'
+_SEPARADOR_ITENS = '\x1f'
+_SQL_ITENS_FORCA = (
+    "(SELECT group_concat(g.descricao, char(31)) FROM grados_fuerza g WHERE g.avaliacao_id = a.id)"
+)
+# O avaliacao_id vai por último, como a ligação dos comandos de atualizar_avaliacao
+INSERCAO_GRADOS = (
+    "INSERT INTO grados_fuerza (posicao, grupo, grado, descricao, avaliacao_id) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+
+def _itens_da_coluna(valor):
+    """Separa os itens juntados por _SQL_ITENS_FORCA; sem itens vira []."""
+    return valor.split(_SEPARADOR_ITENS) if valor else []
+
+
+# Rótulos em português dos campos, exibidos na janela de detalhes
+ROTULOS_CAMPOS = {
+    'data_avaliacao': 'Data da Avaliação',
+    CAMPO_FORCA_MUSCULAR: 'Força Muscular',
+    **{campo: rotulo for _, _, colunas in ESQUEMA_AVALIACAO
+       for _, campo, _, _, rotulo in colunas if rotulo},
+}
+
+
+def _montar_colunas_por_campo():
+    """
+    Campo do formulário -> (tabela do JOIN, expressão do SELECT, leitor), sem as
+    colunas derivadas. A força muscular não precisa de JOIN e entra logo depois
+    das colunas de fuerza_muscular, como no formulário.
+    """
+    colunas_por_campo = {}
+    for tabela, _, colunas in ESQUEMA_AVALIACAO:
+        for coluna, campo, _, _, rotulo in colunas:
+            if rotulo:
+                colunas_por_campo[campo] = (tabela, f"{tabela}.{coluna}", None)
+        if tabela == 'fuerza_muscular':
+            colunas_por_campo[CAMPO_FORCA_MUSCULAR] = (None, _SQL_ITENS_FORCA, _itens_da_coluna)
+    return colunas_por_campo
+
+
+_COLUNAS_POR_CAMPO = _montar_colunas_por_campo()
+
+# Campos da avaliação completa, na ordem do registro
+CAMPOS_AVALIACAO = tuple(_COLUNAS_POR_CAMPO)
+
+
+def _montar_colunas_filtro():
+    """
+    Campo do formulário -> (tabela, coluna, conversor) comparados por consultar_coorte:
+    a coluna derivada (normalizada e indexada, como nome_busca) quando houver, e o
+    conversor que leva o valor do filtro ao formato dela.
+    """
+    colunas_filtro = {}
+    for tabela, _, colunas in ESQUEMA_AVALIACAO:
+        for coluna, campo, _, conversor, _ in colunas:
+            if conversor or campo not in colunas_filtro:
+                colunas_filtro[campo] = (tabela, coluna, conversor)
+    return colunas_filtro
+
+
+_COLUNAS_FILTRO = _montar_colunas_filtro()
+
+# Colunas INTEGER do esquema; as demais são TEXT e, comparadas a um número,
+# passam por CAST(... AS REAL) (ver os índices de expressão da migração 14)
+_COLUNAS_INTEIRAS = {'eva_valor'}
+
+
+def valores_formulario(dados_formulario):
+    """
+    Converte os dados do formulário nos valores gravados em cada tabela.
+    
+    Args:
+        dados_formulario (dict): Dados do formulário (campos ausentes recebem o padrão).
+        
+    Returns:
+        tuple: Uma tupla de valores por tabela, na ordem de ESQUEMA_AVALIACAO e das
+        colunas de cada uma (sem a coluna de ligação).
+        
+    Raises:
+        ValueError: Se alguma data do formulário for inválida.
+    """
+    return tuple(
+        tuple(conversor(dados_formulario.get(campo, padrao)) if conversor
+              else dados_formulario.get(campo, padrao)
+              for _, campo, padrao, conversor, _ in colunas)
+        for _, _, colunas in ESQUEMA_AVALIACAO
+    )
+
+
+def graus_formulario(dados_formulario):
+    """
+    Converte a força muscular do formulário nas linhas de grados_fuerza.
+    
+    Args:
+        dados_formulario (dict): Dados do formulário; 'Fuerza Muscular' pode ser
+            a opção marcada (texto) ou uma lista de opções.
+        
+    Returns:
+        list: Tuplas (posicao, grupo, grado, descricao), na ordem de INSERCAO_GRADOS
+        sem o avaliacao_id.
+    """
+    itens = itens_forca_muscular(dados_formulario.get(CAMPO_FORCA_MUSCULAR))
+    return [(posicao, *item) for posicao, item in enumerate(itens)]
+
+
+# Colunas de pacientes em ESQUEMA_AVALIACAO (o primeiro item), na ordem dos valores
+COLUNAS_PACIENTE = tuple(coluna for coluna, _, _, _, _ in ESQUEMA_AVALIACAO[0][2])
+
+# Cadastro mais recente com a identidade informada (usa idx_pacientes_identidade)
+SQL_PACIENTE_POR_IDENTIDADE = '''
+SELECT * FROM pacientes
+WHERE nome_busca = ? AND data_nascimento_iso IS ? AND contato_busca = ?
+ORDER BY id DESC LIMIT 1
+'''
+
+
+def identidade_paciente(valores_paciente):
+    """
+    Chave de identidade do paciente: nome normalizado, data de nascimento e
+    contato normalizado. Só o nome não basta (homônimos).
+    
+    Args:
+        valores_paciente (tuple): Valores da tabela pacientes, na ordem de COLUNAS_PACIENTE.
+        
+    Returns:
+        tuple: (nome_busca, data_nascimento_iso, contato_busca), ou None se faltar
+        o nome ou não houver data de nascimento nem contato.
+    """
+    valores = dict(zip(COLUNAS_PACIENTE, valores_paciente))
+    if valores['nome_busca'] and (valores['data_nascimento_iso'] or valores['contato_busca']):
+        return valores['nome_busca'], valores['data_nascimento_iso'], valores['contato_busca']
+    return None
+
+
+def campos_novos_paciente(existente, valores_paciente):
+    """
+    Campos preenchidos no formulário que diferem do cadastro reaproveitado;
+    campos vazios não apagam o que já existe.
+    
+    Args:
+        existente (Mapping): Cadastro gravado (linha de pacientes ou dicionário).
+        valores_paciente (tuple): Valores novos, na ordem de COLUNAS_PACIENTE.
+        
+    Returns:
+        dict: Coluna -> valor novo.
+    """
+    return {coluna: valor for coluna, valor in zip(COLUNAS_PACIENTE, valores_paciente)
+            if valor not in ('', None) and valor != existente[coluna]}
+
+
+def _montar_insercoes():
+    """
+    Gera um INSERT por tabela com a coluna de ligação primeiro; o de pacientes
+    termina com data_cadastro. Um id de paciente None é gerado pelo SQLite.
+    """
+    insercoes = {}
+    for tabela, coluna_ligacao, colunas in ESQUEMA_AVALIACAO:
+        nomes = [coluna_ligacao] + [coluna for coluna, _, _, _, _ in colunas]
+        if tabela == 'pacientes':
+            nomes.append('data_cadastro')
+        insercoes[tabela] = (
+            f"INSERT INTO {tabela} ({', '.join(nomes)}) "
+            f"VALUES ({', '.join('?' * len(nomes))})"
+        )
+    return insercoes
+
+
+def _montar_atualizacoes():
+    """Gera o UPDATE de todas as colunas de cada tabela, com a ligação no WHERE."""
+    return {
+        tabela: (f"UPDATE {tabela} SET {', '.join(f'{coluna} = ?' for coluna, _, _, _, _ in colunas)} "
+                 f"WHERE {coluna_ligacao} = ?")
+        for tabela, coluna_ligacao, colunas in ESQUEMA_AVALIACAO
+    }
+
+
+INSERCOES = _montar_insercoes()
+_ATUALIZACOES = _montar_atualizacoes()
+
+
+def _projecao_campos(campos, incluir_paciente=True, inicio=0):
+    """
+    Monta a parte da consulta que traz só os campos pedidos de uma avaliação
+    (apelido 'a'), com um JOIN por tabela envolvida. As tabelas são referidas
+    pelo próprio nome (ex.: pacientes.nome_busca).
+    
+    Args:
+        campos (list): Nomes dos campos do formulário, como em obter_avaliacao.
+        incluir_paciente (bool): Aceitar campos do paciente (JOIN com pacientes).
+        inicio (int): Posição, na linha da consulta, da primeira coluna de campos.
+        
+    Returns:
+        tuple: (colunas do SELECT, cada uma precedida de ', '; JOINs; função que
+        converte uma linha (tupla) no dicionário {campo: valor}).
+        
+    Raises:
+        ValueError: Se algum campo não existir.
+    """
+    desconhecidos = [campo for campo in campos if campo not in _COLUNAS_POR_CAMPO
+                     or (not incluir_paciente and _COLUNAS_POR_CAMPO[campo][0] == 'pacientes')]
+    if desconhecidos:
+        raise ValueError(f"Campos desconhecidos: {', '.join(desconhecidos)}")
+    
+    tabelas = {}
+    selecao = []
+    for campo in campos:
+        tabela, expressao, _ = _COLUNAS_POR_CAMPO[campo]
+        if tabela:
+            tabelas[tabela] = None
+        selecao.append(f", {expressao}")
+    juncoes = ''.join(
+        " JOIN pacientes ON pacientes.id = a.paciente_id" if tabela == 'pacientes'
+        else f" LEFT JOIN {tabela} ON {tabela}.avaliacao_id = a.id"
+        for tabela in tabelas
+    )
+    
+    # Posições calculadas aqui, para a conversão não procurar colunas por nome
+    campos = tuple(campos)
+    posicoes = range(inicio, inicio + len(campos))
+    leitores = tuple((campo, _COLUNAS_POR_CAMPO[campo][2]) for campo in campos
+                     if _COLUNAS_POR_CAMPO[campo][2])
+    
+    def converter(linha):
+        dados = dict(zip(campos, map(linha.__getitem__, posicoes)))
+        for campo, leitor in leitores:
+            dados[campo] = leitor(dados[campo])
+        return dados
+    
+    return ''.join(selecao), juncoes, converter
+
+
+def _montar_leitura_completa():
+    """
+    Gera a consulta da avaliação completa (a avaliação, o paciente e todas as
+    seções, sem WHERE) e a função que converte uma linha dela no dicionário
+    de obter_avaliacao.
+    """
+    selecao, juncoes, converter_campos = _projecao_campos(CAMPOS_AVALIACAO, inicio=3)
+    sql = f"SELECT a.id, a.paciente_id, a.data_avaliacao{selecao} FROM avaliacoes a{juncoes}"
+    
+    def converter(linha):
+        return {'id': linha[0], 'paciente_id': linha[1], 'data_avaliacao': linha[2],
+                **converter_campos(linha)}
+    
+    return sql, converter
+
+
+_SQL_AVALIACAO_COMPLETA, _avaliacao_da_linha = _montar_leitura_completa()
+
 
 class BancoDadosFisioterapia:
     """
@@ -12,327 +1111,158 @@ class BancoDadosFisioterapia:
     """
     
     def __init__(self, nome_db="fisioterapia.db"):
-        """Inicializa o banco de dados e cria as tabelas se não existirem."""
+        """Inicializa o banco de dados e aplica as migrações pendentes do esquema."""
         self.nome_db = nome_db
         self.lock = threading.Lock()  # Adicionar um lock para sincronização
         
-        # Criar uma única conexão persistente no início
-        # Criar uma única conexão persistente no início
-        self.conn = sqlite3.connect(self.nome_db, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
+        # Leituras usam conexões somente leitura de um pool compartilhado por arquivo,
+        # então criar várias instâncias (uma por thread, por exemplo) é barato
+        self.pool = obter_pool(self.nome_db)
+        
+        # Avaliações montadas por obter_avaliacao, invalidadas a cada escrita.
+        # Compartilhado por arquivo para que escritas de uma instância sejam vistas pelas outras
+        self.cache_avaliacoes = obter_cache_avaliacoes(self.nome_db)
         
-        self._criar_tabelas()
+        # Todas as escritas passam por uma única thread por arquivo (ver EscritorBanco)
+        self.escritor = obter_escritor(self.nome_db)
+        
+        # Verificar o esquema apenas na primeira vez que o arquivo é aberto no processo
+        chave = os.path.abspath(self.nome_db)
+        if chave not in _bancos_migrados:
+            self._migrar()
+            _bancos_migrados.add(chave)
     
-    def _obter_cursor(self):
-        """Obtém um cursor para a conexão existente ou cria uma nova se necessário."""
-        # Verificar se a conexão existe e está aberta
+    def _migrar(self):
+        """
+        Aplica as migrações pendentes (e cria o arquivo, se for novo) com uma
+        conexão de escrita própria: as do pool são somente leitura, e a
+        migração que ativa o WAL não pode rodar dentro da transação do escritor.
+        """
+        conn = abrir_conexao(self.nome_db)
         try:
-            # Testar se a conexão está funcionando
-            self.conn.execute("SELECT 1")
-        except (sqlite3.Error, AttributeError):
-            # Recriar a conexão se estiver fechada ou com erro
-            self.conn = sqlite3.connect(self.nome_db)
-            self.conn.row_factory = sqlite3.Row
+            aplicar_migracoes(conn)
+        finally:
+            conn.close()
+    
+    def conexao(self):
+        """
+        Empresta uma conexão somente leitura do pool para a thread atual
+        (escritas vão por enviar_escrita/executar_escrita).
         
-        return self.conn.cursor()
+        Uso:
+            with db.conexao() as conn:
+                cursor = conn.cursor()
+        """
+        if self.pool.fechado:
+            self.pool = obter_pool(self.nome_db)
+        return self.pool.conexao()
     
-    def fechar_conexao(self):
-        """Fecha a conexão com o banco de dados de forma segura"""
-        if hasattr(self, 'conn') and self.conn:
-            try:
-                with self.lock:  # Use o lock para evitar problemas de concorrência
-                    self.conn.close()
-                    self.conn = None
-                print("Conexão com banco de dados fechada com sucesso")
-            except Exception as e:
-                print(f"Erro ao fechar conexão: {e}")
-    
-    def _criar_tabelas(self):
-        """
-        Cria as tabelas necessárias no banco de dados se não existirem.
-        
-        A estrutura inclui:
-        - pacientes: Informações básicas do paciente
-        - avaliacoes: Dados da avaliação fisioterapêutica
-        - secoes_historico: Histórico clínico do paciente
-        - avaliacao_fisica: Dados da avaliação física detalhada
-        - provas_especificas: Resultados de testes específicos
-        - medidas_escalas: Dados de medições e escalas de dor
-        - diagnosticos: Diagnóstico fisioterapêutico
-        - tratamento: Plano de tratamento
-        - seguimento: Informações de acompanhamento e reavaliação
-        """
-        cursor = self.conn.cursor()
-
-        # Tabela de Usuários
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            senha TEXT NOT NULL,
-            perfil TEXT NOT NULL,
-            ultimo_acesso TEXT,
-            data_criacao TEXT
-        )
-        ''')
-        
-        # Tabela de Pacientes (dados básicos)
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS pacientes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT,
-            idade TEXT,
-            genero TEXT,
-            contato TEXT,
-            data_nascimento TEXT,
-            area_consulta TEXT,
-            alergias TEXT,
-            data_cadastro TEXT
-        )
-        ''')
-        
-        # Tabela de Avaliações (principal)
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS avaliacoes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            paciente_id INTEGER,
-            data_avaliacao TEXT,
-            fisioterapeuta TEXT,
-            observacoes TEXT,
-            FOREIGN KEY (paciente_id) REFERENCES pacientes (id)
-        )
-        ''')
-        
-        # Tabela de Histórico Clínico
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS historico_clinico (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            avaliacao_id INTEGER,
-            motivo_consulta TEXT,
-            antecedentes TEXT,
-            enfermedad_actual TEXT,
-            cirugias_previas TEXT,
-            medicamentos_actuales TEXT,
-            FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
-        )
-        ''')
-        
-        # Tabela de Avaliação Física (exame físico básico)
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS exame_fisico (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            avaliacao_id INTEGER,
-            pa TEXT,
-            pulso TEXT,
-            talla TEXT,
-            peso TEXT,
-            temperatura TEXT,
-            fr TEXT,
-            sat_o2 TEXT,
-            idx TEXT,
-            conducta TEXT,
-            FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
-        )
-        ''')
-        
-        # Tabela de Inspeção e Palpação
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS inspeccion_palpacion (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            avaliacao_id INTEGER,
-            postura TEXT,
-            simetria_corporal TEXT,
-            deformidades_aparentes TEXT,
-            puntos_dolorosos TEXT,
-            tension_muscular TEXT,
-            FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
-        )
-        ''')
-        
-        # Tabela de Coluna Vertebral
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS columna_vertebral (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            avaliacao_id INTEGER,
-            curvas_fisiologicas TEXT,
-            escoliosis TEXT,
-            cifosis_lordosis TEXT,
-            FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
-        )
-        ''')
-        
-        # Tabela de Mobilidade Articular
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS movilidad_articular (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            avaliacao_id INTEGER,
-            movimiento_activo TEXT,
-            movimiento_pasivo TEXT,
-            evaluacion_articulaciones TEXT,
-            FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
-        )
-        ''')
-        
-        # Tabela de Força Muscular
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS fuerza_muscular (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            avaliacao_id INTEGER,
-            evaluacion_grupos_musculares TEXT,
-            grados_fuerza TEXT,
-            FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
-        )
-        ''')
-        
-        # Tabela de Avaliação Neuromuscular
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS evaluacion_neuromuscular (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            avaliacao_id INTEGER,
-            reflejos TEXT,
-            coordinacion_motora TEXT,
-            equilibrio TEXT,
-            FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
-        )
-        ''')
-        
-        # Tabela de Avaliação Funcional
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS evaluacion_funcional (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            avaliacao_id INTEGER,
-            capacidad_actividades_diarias TEXT,
-            limitaciones_dificultades TEXT,
-            FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
-        )
-        ''')
-        
-        # Tabela de Coordenação
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS coordinacion (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            avaliacao_id INTEGER,
-            ejercicios_dedos TEXT,
-            precision_movimientos TEXT,
-            marcha TEXT,
-            equilibrio_dinamico TEXT,
-            FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
-        )
-        ''')
-        
-        # Tabela de Provas Específicas
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS pruebas_especificas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            avaliacao_id INTEGER,
-            pruebas_ortopedicas TEXT,
-            pruebas_neurologicas TEXT,
-            pruebas_estabilidad TEXT,
-            FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
-        )
-        ''')
-        
-        # Tabela de Escalas de Dor
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS escalas_dolor (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            avaliacao_id INTEGER,
-            eva_valor INTEGER,
-            observaciones_dolor TEXT,
-            FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
-        )
-        ''')
-        
-        # Tabela de Diagnósticos
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS diagnosticos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            avaliacao_id INTEGER,
-            resumen_problema TEXT,
-            objetivos_tratamiento TEXT,
-            FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
-        )
-        ''')
-        
-        # Tabela de Plano de Tratamento
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS plan_tratamiento (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            avaliacao_id INTEGER,
-            sesiones_semana TEXT,
-            duracion_sesion TEXT,
-            obs_frecuencia TEXT,
-            ejercicios_recomendados TEXT,
-            FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
-        )
-        ''')
-        
-        # Tabela de Seguimento
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS seguimiento (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            avaliacao_id INTEGER,
-            programacion_seguimiento TEXT,
-            fecha_evaluacion TEXT,
-            criterio_revision TEXT,
-            criterios_adicionales TEXT,
-            FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
-        )
-        ''')
-
-        # Otimizar o SQLite para melhor desempenho
-        cursor.execute('PRAGMA synchronous = NORMAL;')  # Menos sincronização com disco
-        cursor.execute('PRAGMA journal_mode = WAL;')    # Write-Ahead Logging
-        cursor.execute('PRAGMA temp_store = MEMORY;')   # Armazenar temporários na memória
-        cursor.execute('PRAGMA cache_size = 5000;')     # Aumentar cache (em páginas)
-        cursor.execute('PRAGMA locking_mode = NORMAL;') # Modo de bloqueio normal é mais rápido
-        cursor.execute('PRAGMA foreign_keys = ON;')     # Manter integridade referencial
+    def enviar_escrita(self, funcao, *args, **kwargs):
+        """
+        Agenda uma escrita no escritor único do banco.
+        
+        Args:
+            funcao (callable): Chamada como funcao(conn, *args, **kwargs) na thread do
+                escritor; não deve abrir nem confirmar transações.
+            
+        Returns:
+            concurrent.futures.Future: Retorno da função após o commit.
+        """
+        if self.escritor.fechado:
+            self.escritor = obter_escritor(self.nome_db)
+        return self.escritor.enviar(funcao, *args, **kwargs)
+    
+    def executar_escrita(self, funcao, *args, **kwargs):
+        """Como enviar_escrita, mas espera o commit e retorna o resultado da função."""
+        return self.enviar_escrita(funcao, *args, **kwargs).result()
+    
+    @contextlib.contextmanager
+    def transacao(self):
+        """
+        Agrupa várias operações em uma única transação, com um só commit.
         
-        self.conn.commit()
-        # Não feche a conexão aqui! Apenas o cursor
-        cursor.close()
+        Os métodos de escrita chamados dentro do bloco (salvar_avaliacao,
+        excluir_avaliacoes, reconstruir_estatisticas, importar_diretorio...)
+        entram na transação em vez de confirmar cada um a sua; blocos aninhados
+        viram SAVEPOINTs. Uma exceção que sai do bloco desfaz tudo o que foi
+        gravado nele; um método que trata o próprio erro (e retorna False, por
+        exemplo) desfaz só a sua parte. Detalhes em EscritorBanco.transacao.
+        
+        Uso:
+            with db.transacao():
+                db.excluir_avaliacoes(ids)
+                db.reconstruir_estatisticas()
+        
+        Raises:
+            sqlite3.Error: Se o commit falhar (nada do bloco é gravado).
+        """
+        if self.escritor.fechado:
+            self.escritor = obter_escritor(self.nome_db)
+        externa = not self.escritor.em_transacao()
+        try:
+            with self.escritor.transacao():
+                yield
+        finally:
+            if externa:
+                # Os métodos invalidam o cache antes do commit da unidade; uma leitura
+                # nesse intervalo pode ter guardado o estado anterior (ou uma alteração
+                # que acabou desfeita)
+                self.cache_avaliacoes.limpar()
+    
+    def fechar_conexao(self):
+        """Libera as conexões ociosas do pool de forma segura"""
+        try:
+            self.pool.liberar_ociosas()
+            print("Conexão com banco de dados fechada com sucesso")
+        except Exception as e:
+            print(f"Erro ao fechar conexão: {e}")
     
     def salvar_avaliacao(self, dados_formulario):
         """
         Salva todos os dados do formulário no banco de dados.
         
+        Um paciente que já tem cadastro (mesmo nome, data de nascimento e contato)
+        recebe a avaliação no cadastro existente, em vez de um novo.
+        
         Args:
             dados_formulario (dict): Dicionário contendo todos os dados do formulário.
             
         Returns:
             int: ID da avaliação criada.
+            
+        Raises:
+            ValueError: Se 'Fecha Nasc.' ou 'fecha_evaluacion' não for uma data válida.
         """
-        cursor = self._obter_cursor()
+        # Converter os dados (e validar as datas) antes de abrir a transação
+        valores = valores_formulario(dados_formulario)
+        graus = graus_formulario(dados_formulario)
+        
+        try:
+            avaliacao_id, alteradas = self.executar_escrita(self._inserir_avaliacao, valores, graus)
+        except sqlite3.Error as e:
+            print(f"Erro ao salvar no banco de dados: {e}")
+            raise
+        
+        self.cache_avaliacoes.invalidar(*alteradas)
+        return avaliacao_id
     
+    def _inserir_avaliacao(self, conn, valores, graus):
+        """
+        Trabalho de escrita de salvar_avaliacao: grava o paciente e todas as seções.
+        
+        Args:
+            valores (tuple): Valores por tabela, como retornados por valores_formulario.
+            graus (list): Linhas de grados_fuerza, como retornadas por graus_formulario.
+        
+        Returns:
+            tuple: (avaliacao_id, ids das avaliações cujo conteúdo mudou).
+        """
+        cursor = conn.cursor()
         try:
-            # Iniciar transação
-            self.conn.execute("BEGIN TRANSACTION")
-            
-            # 1. Salvar dados do paciente
-            data_atual = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Verificar se tem nome do paciente
-            nome_paciente = dados_formulario.get('Nombre Completo', '')
-            
-            # Inserir paciente
-            cursor.execute('''
-            INSERT INTO pacientes (
-                nome, idade, genero, contato, data_nascimento, 
-                area_consulta, alergias, data_cadastro
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                dados_formulario.get('Nombre Completo', ''),
-                dados_formulario.get('Edad', ''),
-                dados_formulario.get('Genero', ''),
-                dados_formulario.get('Contacto', ''),
-                dados_formulario.get('Fecha Nasc.', ''),
-                dados_formulario.get('Área de consulta', ''),
-                dados_formulario.get('Alergias', ''),
-                data_atual
-            ))
-            
-            paciente_id = cursor.lastrowid
-            
+            # 1. Reaproveitar o cadastro do paciente, se ele já tiver sido avaliado
+            data_atual = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            paciente_id, alterado = self._gravar_paciente(cursor, valores[0], data_atual)
+
             # 2. Inserir avaliação principal
             cursor.execute('''
             INSERT INTO avaliacoes (
@@ -344,721 +1274,541 @@ class BancoDadosFisioterapia:
                 '',  # Campo para nome do fisioterapeuta (pode ser adicionado ao formulário)
                 ''   # Observações gerais
             ))
-            
+
             avaliacao_id = cursor.lastrowid
-            
-            # 3. Histórico Clínico
-            cursor.execute('''
-            INSERT INTO historico_clinico (
-                avaliacao_id, motivo_consulta, antecedentes, 
-                enfermedad_actual, cirugias_previas, medicamentos_actuales
-            ) VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                avaliacao_id,
-                dados_formulario.get('Motivo de consulta', ''),
-                dados_formulario.get('Antecedentes', ''),
-                dados_formulario.get('Efermedad actual', ''),
-                dados_formulario.get('Cirurgías previas', ''),
-                dados_formulario.get('Medicamentos actuales', '')
-            ))
-            
-            # 4. Exame Físico
-            cursor.execute('''
-            INSERT INTO exame_fisico (
-                avaliacao_id, pa, pulso, talla, peso, 
-                temperatura, fr, sat_o2, idx, conducta
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                avaliacao_id,
-                dados_formulario.get('PA', ''),
-                dados_formulario.get('Pulso', ''),
-                dados_formulario.get('Talla', ''),
-                dados_formulario.get('Peso', ''),
-                dados_formulario.get('T', ''),
-                dados_formulario.get('FR', ''),
-                dados_formulario.get('Sat.O2', ''),
-                dados_formulario.get('IDx', ''),
-                dados_formulario.get('Conducta', '')
-            ))
-            
-            # 5. Inspeção e Palpação
-            cursor.execute('''
-            INSERT INTO inspeccion_palpacion (
-                avaliacao_id, postura, simetria_corporal, 
-                deformidades_aparentes, puntos_dolorosos, tension_muscular
-            ) VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                avaliacao_id,
-                dados_formulario.get('Postura', ''),
-                dados_formulario.get('Simetría corporal', ''),
-                dados_formulario.get('Deformidades aparentes', ''),
-                dados_formulario.get('Puntos dolorosos', ''),
-                dados_formulario.get('Tensión muscular', '')
-            ))
-            
-            # 6. Coluna Vertebral
-            cursor.execute('''
-            INSERT INTO columna_vertebral (
-                avaliacao_id, curvas_fisiologicas, escoliosis, cifosis_lordosis
-            ) VALUES (?, ?, ?, ?)
-            ''', (
-                avaliacao_id,
-                dados_formulario.get('Curvas Fisiológicas', ''),
-                dados_formulario.get('Presencia de Escoliosis', ''),
-                dados_formulario.get('Cifosis o Lordosis', '')
-            ))
-            
-            # 7. Mobilidade Articular
-            cursor.execute('''
-            INSERT INTO movilidad_articular (
-                avaliacao_id, movimiento_activo, movimiento_pasivo, evaluacion_articulaciones
-            ) VALUES (?, ?, ?, ?)
-            ''', (
-                avaliacao_id,
-                dados_formulario.get('Movimiento Activo', ''),
-                dados_formulario.get('Movimiento Pasivo', ''),
-                dados_formulario.get('Evaluación de articulaciones', '')
-            ))
-            
-            # 8. Força Muscular
-            # Converter lista de opcões selecionadas para string JSON
-            forca_muscular = dados_formulario.get('Fuerza Muscular', [])
-            forca_json = json.dumps(forca_muscular) if forca_muscular else ''
-            
-            cursor.execute('''
-            INSERT INTO fuerza_muscular (
-                avaliacao_id, evaluacion_grupos_musculares, grados_fuerza
-            ) VALUES (?, ?, ?)
-            ''', (
-                avaliacao_id,
-                dados_formulario.get('Evaluación de grupos musculares', ''),
-                forca_json
-            ))
-            
-            # 9. Avaliação Neuromuscular
-            cursor.execute('''
-            INSERT INTO evaluacion_neuromuscular (
-                avaliacao_id, reflejos, coordinacion_motora, equilibrio
-            ) VALUES (?, ?, ?, ?)
-            ''', (
-                avaliacao_id,
-                dados_formulario.get('Reflejos', ''),
-                dados_formulario.get('Coordinación motora', ''),
-                dados_formulario.get('Equilibrio', '')
-            ))
-            
-            # 10. Avaliação Funcional
-            cursor.execute('''
-            INSERT INTO evaluacion_funcional (
-                avaliacao_id, capacidad_actividades_diarias, limitaciones_dificultades
-            ) VALUES (?, ?, ?)
-            ''', (
-                avaliacao_id,
-                dados_formulario.get('Capacidad para realizar actividades diarias', ''),
-                dados_formulario.get('Limitaciones y dificultades', '')
-            ))
-            
-            # 11. Coordenação
-            cursor.execute('''
-            INSERT INTO coordinacion (
-                avaliacao_id, ejercicios_dedos, precision_movimientos, 
-                marcha, equilibrio_dinamico
-            ) VALUES (?, ?, ?, ?, ?)
-            ''', (
-                avaliacao_id,
-                dados_formulario.get('Ejercicios con dedos', ''),
-                dados_formulario.get('Precisión en movimientos', ''),
-                dados_formulario.get('Marcha', ''),
-                dados_formulario.get('Equilibrio Dinámico', '')
-            ))
-            
-            # 12. Provas Específicas
-            cursor.execute('''
-            INSERT INTO pruebas_especificas (
-                avaliacao_id, pruebas_ortopedicas, pruebas_neurologicas, pruebas_estabilidad
-            ) VALUES (?, ?, ?, ?)
-            ''', (
-                avaliacao_id,
-                dados_formulario.get('Pruebas ortopédicas', ''),
-                dados_formulario.get('Pruebas neurológicas', ''),
-                dados_formulario.get('Pruebas de estabilidad', '')
-            ))
-            
-            # 13. Escalas de Dor
-            cursor.execute('''
-            INSERT INTO escalas_dolor (
-                avaliacao_id, eva_valor, observaciones_dolor
-            ) VALUES (?, ?, ?)
-            ''', (
-                avaliacao_id,
-                dados_formulario.get('escala_eva', 0),
-                dados_formulario.get('observaciones_dolor', '')
-            ))
-            
-            # 14. Diagnósticos
-            cursor.execute('''
-            INSERT INTO diagnosticos (
-                avaliacao_id, resumen_problema, objetivos_tratamiento
-            ) VALUES (?, ?, ?)
-            ''', (
-                avaliacao_id,
-                dados_formulario.get('Resumen del problema', ''),
-                dados_formulario.get('Objetivos del tratamiento', '')
-            ))
-            
-            # 15. Plano de Tratamento
-            cursor.execute('''
-            INSERT INTO plan_tratamiento (
-                avaliacao_id, sesiones_semana, duracion_sesion, 
-                obs_frecuencia, ejercicios_recomendados
-            ) VALUES (?, ?, ?, ?, ?)
-            ''', (
-                avaliacao_id,
-                dados_formulario.get('sesiones_semana', ''),
-                dados_formulario.get('duracion_sesion', ''),
-                dados_formulario.get('obs_frecuencia', ''),
-                dados_formulario.get('Ejercicios recomendados', '')
-            ))
-            
-            # 16. Seguimento
-            cursor.execute('''
-            INSERT INTO seguimiento (
-                avaliacao_id, programacion_seguimiento, fecha_evaluacion, 
-                criterio_revision, criterios_adicionales
-            ) VALUES (?, ?, ?, ?, ?)
-            ''', (
-                avaliacao_id,
-                dados_formulario.get('programacion_seguimiento', ''),
-                dados_formulario.get('fecha_evaluacion', ''),
-                dados_formulario.get('criterio_revision', ''),
-                dados_formulario.get('criterios_adicionales', '')
-            ))
-            
-            # Confirmar transação
-            self.conn.commit()
-            
-            return avaliacao_id
-                
-        except sqlite3.Error as e:
-            # Em caso de erro, reverter transação
-            self.conn.rollback()
-            print(f"Erro ao salvar no banco de dados: {e}")
-            raise
+
+            # 3. Uma linha por seção, com os INSERTs gerados de ESQUEMA_AVALIACAO
+            for (tabela, _, _), valores_tabela in zip(ESQUEMA_AVALIACAO[1:], valores[1:]):
+                cursor.execute(INSERCOES[tabela], (avaliacao_id, *valores_tabela))
+            cursor.executemany(INSERCAO_GRADOS, [(*grau, avaliacao_id) for grau in graus])
+            
+            # Os dados novos do paciente aparecem também nas avaliações anteriores dele
+            if alterado:
+                cursor.execute("SELECT id FROM avaliacoes WHERE paciente_id = ?", (paciente_id,))
+                return avaliacao_id, [row['id'] for row in cursor.fetchall()]
+            return avaliacao_id, [avaliacao_id]
         
         finally:
-            # Apenas fechar o cursor, não a conexão
             cursor.close()
     
+    def _gravar_paciente(self, cursor, valores_paciente, data_atual):
+        """
+        Retorna o paciente da avaliação, reaproveitando o cadastro de quem já foi avaliado.
+        
+        O paciente é reconhecido pelo índice de identidade: mesmo nome normalizado,
+        mesma data de nascimento e mesmo contato normalizado. Só o nome não basta
+        (homônimos), então sem data de nascimento nem contato é criado um cadastro
+        novo. No cadastro reaproveitado, os campos preenchidos no formulário
+        substituem os gravados; campos vazios não apagam o que já existe.
+        
+        Args:
+            valores_paciente (tuple): Valores da tabela pacientes, na ordem de ESQUEMA_AVALIACAO.
+        
+        Returns:
+            tuple: (paciente_id, alterado); alterado indica que um cadastro
+            existente recebeu dados novos.
+        """
+        identidade = identidade_paciente(valores_paciente)
+        if identidade is not None:
+            cursor.execute(SQL_PACIENTE_POR_IDENTIDADE, identidade)
+            existente = cursor.fetchone()
+            if existente is not None:
+                alteracoes = campos_novos_paciente(existente, valores_paciente)
+                if alteracoes:
+                    cursor.execute(
+                        f"UPDATE pacientes SET {', '.join(f'{coluna} = ?' for coluna in alteracoes)} "
+                        f"WHERE id = ?",
+                        (*alteracoes.values(), existente['id'])
+                    )
+                return existente['id'], bool(alteracoes)
+        
+        cursor.execute(INSERCOES['pacientes'], (None, *valores_paciente, data_atual))
+        return cursor.lastrowid, False
+
     def obter_avaliacao(self, avaliacao_id):
         """
-        Obtém uma avaliação completa do banco de dados com performance otimizada.
+        Obtém uma avaliação completa, usando o cache LRU quando possível.
+        
+        A mesma avaliação é pedida ao selecionar na lista, ao abrir os detalhes,
+        ao editar e ao exportar; só a primeira consulta vai ao banco.
         
         Args:
             avaliacao_id (int): ID da avaliação a ser obtida.
             
         Returns:
-            dict: Dicionário contendo todos os dados da avaliação.
+            dict: Dicionário contendo todos os dados da avaliação (uma cópia,
+                que pode ser alterada pelo chamador).
         """
-        cursor = self._obter_cursor()
+        try:
+            chave = int(avaliacao_id)
+        except (TypeError, ValueError):
+            return None
         
-        # Criar dicionário vazio para armazenar os dados
-        dados = {}
+        dados = self.cache_avaliacoes.obter(chave)
+        if dados is None:
+            versao = self.cache_avaliacoes.versao
+            dados = self._carregar_avaliacao(chave)
+            if dados is None:
+                return None
+            self.cache_avaliacoes.guardar(chave, dados, versao)
         
-        try:
-            # Usar uma única consulta com múltiplos JOINs para melhorar performance
-            query = '''
-            SELECT 
-                a.*, p.*,
-                h.motivo_consulta, h.antecedentes, h.enfermedad_actual, h.cirugias_previas, h.medicamentos_actuales,
-                e.pa, e.pulso, e.talla, e.peso, e.temperatura, e.fr, e.sat_o2, e.idx, e.conducta,
-                i.postura, i.simetria_corporal, i.deformidades_aparentes, i.puntos_dolorosos, i.tension_muscular,
-                c.curvas_fisiologicas, c.escoliosis, c.cifosis_lordosis,
-                m.movimiento_activo, m.movimiento_pasivo, m.evaluacion_articulaciones,
-                f.evaluacion_grupos_musculares, f.grados_fuerza,
-                n.reflejos, n.coordinacion_motora, n.equilibrio,
-                ev.capacidad_actividades_diarias, ev.limitaciones_dificultades,
-                co.ejercicios_dedos, co.precision_movimientos, co.marcha, co.equilibrio_dinamico,
-                pe.pruebas_ortopedicas, pe.pruebas_neurologicas, pe.pruebas_estabilidad,
-                d.eva_valor, d.observaciones_dolor,
-                dg.resumen_problema, dg.objetivos_tratamiento,
-                pt.sesiones_semana, pt.duracion_sesion, pt.obs_frecuencia, pt.ejercicios_recomendados,
-                s.programacion_seguimiento, s.fecha_evaluacion, s.criterio_revision, s.criterios_adicionales
-            FROM avaliacoes a
-            JOIN pacientes p ON a.paciente_id = p.id
-            LEFT JOIN historico_clinico h ON a.id = h.avaliacao_id
-            LEFT JOIN exame_fisico e ON a.id = e.avaliacao_id
-            LEFT JOIN inspeccion_palpacion i ON a.id = i.avaliacao_id
-            LEFT JOIN columna_vertebral c ON a.id = c.avaliacao_id
-            LEFT JOIN movilidad_articular m ON a.id = m.avaliacao_id
-            LEFT JOIN fuerza_muscular f ON a.id = f.avaliacao_id
-            LEFT JOIN evaluacion_neuromuscular n ON a.id = n.avaliacao_id
-            LEFT JOIN evaluacion_funcional ev ON a.id = ev.avaliacao_id
-            LEFT JOIN coordinacion co ON a.id = co.avaliacao_id
-            LEFT JOIN pruebas_especificas pe ON a.id = pe.avaliacao_id
-            LEFT JOIN escalas_dolor d ON a.id = d.avaliacao_id
-            LEFT JOIN diagnosticos dg ON a.id = dg.avaliacao_id
-            LEFT JOIN plan_tratamiento pt ON a.id = pt.avaliacao_id
-            LEFT JOIN seguimiento s ON a.id = s.avaliacao_id
-            WHERE a.id = ?
-            '''
-            
-            cursor.execute(query, (avaliacao_id,))
-            row = cursor.fetchone()
+        return copy.deepcopy(dados)
+    
+    def obter_avaliacoes(self, avaliacao_ids, campos=None):
+        """
+        Obtém várias avaliações de uma vez, em vez de chamar obter_avaliacao em laço.
+        
+        As que não estão no cache são lidas com WHERE a.id IN (...), em blocos de
+        TAMANHO_BLOCO_IDS ids por consulta, e guardadas no cache se o lote for
+        pequeno perto da capacidade dele.
+        
+        Args:
+            avaliacao_ids (iterable): IDs das avaliações.
+            campos (iterable, opcional): Só estes campos (nomes do formulário, como nas
+                chaves de obter_avaliacao); a consulta junta apenas as tabelas deles e
+                não usa o cache. Por padrão, a avaliação completa.
             
-            if not row:
-                return None
+        Returns:
+            dict: {avaliacao_id: dados} na ordem dos IDs pedidos, sem os inexistentes.
+            Os dados têm o formato de obter_avaliacao (cópias que podem ser
+            alteradas) ou, com campos, 'id', 'paciente_id', 'data_avaliacao' e os
+            campos pedidos.
             
-            # Preencher dados básicos (mapeamento específico para garantir nomes corretos)
-            dados['id'] = row['id']
-            dados['data_avaliacao'] = row['data_avaliacao']
-            dados['Nombre Completo'] = row['nome']
-            dados['Edad'] = row['idade']
-            dados['Genero'] = row['genero']
-            dados['Contacto'] = row['contato']
-            dados['Fecha Nasc.'] = row['data_nascimento']
-            dados['Área de consulta'] = row['area_consulta']
-            dados['Alergias'] = row['alergias']
-            
-            # Dados do histórico clínico
-            dados['Motivo de consulta'] = row['motivo_consulta']
-            dados['Antecedentes'] = row['antecedentes']
-            dados['Efermedad actual'] = row['enfermedad_actual']
-            dados['Cirurgías previas'] = row['cirugias_previas']
-            dados['Medicamentos actuales'] = row['medicamentos_actuales']
-            
-            # Dados do exame físico
-            dados['PA'] = row['pa']
-            dados['Pulso'] = row['pulso']
-            dados['Talla'] = row['talla']
-            dados['Peso'] = row['peso']
-            dados['T'] = row['temperatura']
-            dados['FR'] = row['fr']
-            dados['Sat.O2'] = row['sat_o2']
-            dados['IDx'] = row['idx']
-            dados['Conducta'] = row['conducta']
-            
-            # Dados de inspeção e palpação
-            dados['Postura'] = row['postura']
-            dados['Simetría corporal'] = row['simetria_corporal']
-            dados['Deformidades aparentes'] = row['deformidades_aparentes']
-            dados['Puntos dolorosos'] = row['puntos_dolorosos']
-            dados['Tensión muscular'] = row['tension_muscular']
-            
-            # Dados de coluna vertebral
-            dados['Curvas Fisiológicas'] = row['curvas_fisiologicas']
-            dados['Presencia de Escoliosis'] = row['escoliosis']
-            dados['Cifosis o Lordosis'] = row['cifosis_lordosis']
-            
-            # Dados de mobilidade articular
-            dados['Movimiento Activo'] = row['movimiento_activo']
-            dados['Movimiento Pasivo'] = row['movimiento_pasivo']
-            dados['Evaluación de articulaciones'] = row['evaluacion_articulaciones']
-            
-            # Dados de força muscular
-            dados['Evaluación de grupos musculares'] = row['evaluacion_grupos_musculares']
-            
-            # Converter string JSON para lista para força muscular
-            if row['grados_fuerza']:
-                try:
-                    dados['Fuerza Muscular'] = json.loads(row['grados_fuerza'])
-                except json.JSONDecodeError:
-                    dados['Fuerza Muscular'] = []
+        Raises:
+            ValueError: Se algum dos campos não existir.
+        """
+        ids = list(dict.fromkeys(int(avaliacao_id) for avaliacao_id in avaliacao_ids))
+        
+        if campos is not None:
+            campos = list(dict.fromkeys(campos))
+            selecao, juncoes, converter = _projecao_campos(campos, inicio=3)
+            consulta = f"SELECT a.id, a.paciente_id, a.data_avaliacao{selecao} FROM avaliacoes a{juncoes}"
+            
+            encontrados = {}
+            with self.conexao() as conn:
+                for linha in self._consultar_em_blocos(conn, consulta, ids):
+                    encontrados[linha[0]] = {
+                        'id': linha[0], 'paciente_id': linha[1], 'data_avaliacao': linha[2],
+                        **converter(linha)
+                    }
+            return {avaliacao_id: encontrados[avaliacao_id] for avaliacao_id in ids
+                    if avaliacao_id in encontrados}
+        
+        encontrados = {}
+        faltando = []
+        for avaliacao_id in ids:
+            dados = self.cache_avaliacoes.obter(avaliacao_id)
+            if dados is None:
+                faltando.append(avaliacao_id)
             else:
-                dados['Fuerza Muscular'] = []
-            
-            # Dados de avaliação neuromuscular
-            dados['Reflejos'] = row['reflejos']
-            dados['Coordinación motora'] = row['coordinacion_motora']
-            dados['Equilibrio'] = row['equilibrio']
-            
-            # Dados de avaliação funcional
-            dados['Capacidad para realizar actividades diarias'] = row['capacidad_actividades_diarias']
-            dados['Limitaciones y dificultades'] = row['limitaciones_dificultades']
-            
-            # Dados de coordenação
-            dados['Ejercicios con dedos'] = row['ejercicios_dedos']
-            dados['Precisión en movimientos'] = row['precision_movimientos']
-            dados['Marcha'] = row['marcha']
-            dados['Equilibrio Dinámico'] = row['equilibrio_dinamico']
-            
-            # Dados de provas específicas
-            dados['Pruebas ortopédicas'] = row['pruebas_ortopedicas']
-            dados['Pruebas neurológicas'] = row['pruebas_neurologicas']
-            dados['Pruebas de estabilidad'] = row['pruebas_estabilidad']
-            
-            # Dados de escalas de dor
-            dados['escala_eva'] = row['eva_valor']
-            dados['observaciones_dolor'] = row['observaciones_dolor']
-            
-            # Dados de diagnósticos
-            dados['Resumen del problema'] = row['resumen_problema']
-            dados['Objetivos del tratamiento'] = row['objetivos_tratamiento']
-            
-            # Dados de plano de tratamento
-            dados['sesiones_semana'] = row['sesiones_semana']
-            dados['duracion_sesion'] = row['duracion_sesion']
-            dados['obs_frecuencia'] = row['obs_frecuencia']
-            dados['Ejercicios recomendados'] = row['ejercicios_recomendados']
-            
-            # Dados de seguimento
-            dados['programacion_seguimiento'] = row['programacion_seguimiento']
-            dados['fecha_evaluacion'] = row['fecha_evaluacion']
-            dados['criterio_revision'] = row['criterio_revision']
-            dados['criterios_adicionales'] = row['criterios_adicionales']
+                encontrados[avaliacao_id] = dados
+        
+        if faltando:
+            # Um lote maior que o cache só expulsaria as avaliações em uso
+            guardar = len(faltando) <= self.cache_avaliacoes.capacidade // 2
+            versao = self.cache_avaliacoes.versao
+            with self.conexao() as conn:
+                for linha in self._consultar_em_blocos(conn, _SQL_AVALIACAO_COMPLETA, faltando):
+                    dados = _avaliacao_da_linha(linha)
+                    encontrados[dados['id']] = dados
+                    if guardar:
+                        self.cache_avaliacoes.guardar(dados['id'], dados, versao)
+        
+        return {avaliacao_id: copy.deepcopy(encontrados[avaliacao_id]) for avaliacao_id in ids
+                if avaliacao_id in encontrados}
+    
+    def _consultar_em_blocos(self, conn, consulta, ids):
+        """
+        Executa "consulta WHERE a.id IN (...)" para os ids, em blocos de
+        TAMANHO_BLOCO_IDS (o SQLite limita os parâmetros por comando), e
+        produz as linhas (tuplas) de todos os blocos.
+        """
+        for inicio in range(0, len(ids), self.TAMANHO_BLOCO_IDS):
+            bloco = ids[inicio:inicio + self.TAMANHO_BLOCO_IDS]
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            try:
+                cursor.execute(f"{consulta} WHERE a.id IN ({', '.join('?' * len(bloco))})", bloco)
+                yield from cursor
+            finally:
+                cursor.close()
+    
+    def estatisticas_cache(self):
+        """Retorna acertos, falhas e ocupação do cache de avaliações."""
+        return self.cache_avaliacoes.estatisticas()
+    
+    def _carregar_avaliacao(self, avaliacao_id):
+        """
+        Obtém uma avaliação completa do banco de dados com performance otimizada.
+        
+        Args:
+            avaliacao_id (int): ID da avaliação a ser obtida.
             
-            return dados
+        Returns:
+            dict: Dicionário contendo todos os dados da avaliação.
+        """
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            # Tuplas: _avaliacao_da_linha lê as colunas por posição
+            cursor.row_factory = None
+        
+            try:
+                # Usar uma única consulta com múltiplos JOINs para melhorar performance
+                cursor.execute(_SQL_AVALIACAO_COMPLETA + " WHERE a.id = ?", (avaliacao_id,))
+                row = cursor.fetchone()
             
-        except sqlite3.Error as e:
-            print(f"Erro ao obter avaliação: {e}")
-            return None
+                if not row:
+                    return None
+            
+                return _avaliacao_da_linha(row)
+            
+            except sqlite3.Error as e:
+                print(f"Erro ao obter avaliação: {e}")
+                return None
         
-        finally:
-            cursor.close()
+            finally:
+                cursor.close()
+    
+    # Consulta base da listagem de avaliações. avaliacoes_resumo é mantida por
+    # gatilhos com apenas os campos exibidos na lista e as datas em ISO
+    _SQL_LISTAGEM = '''
+    SELECT r.id, r.data_avaliacao, r.nome, r.idade, r.genero, r.proxima_avaliacao
+    FROM avaliacoes_resumo r
+    '''
+    
+    @staticmethod
+    def _resumo_avaliacao(row):
+        """
+        Converte uma linha da listagem no dicionário usado pela lista de pacientes.
+        As datas ('data' e 'fecha_evaluacion') vêm no formato 'YYYY-MM-DD'.
+        """
+        return {
+            'id': row['id'],
+            'data': row['data_avaliacao'] or '',
+            'nome': row['nome'],
+            'idade': row['idade'],
+            'genero': row['genero'],
+            'fecha_evaluacion': row['proxima_avaliacao'] or ''
+        }
     
     def listar_avaliacoes(self, filtro=None, limite=None, pagina=1):
         """
         Lista as avaliações no banco de dados com paginação e otimizações.
         
+        Para rolagem infinita prefira listar_avaliacoes_cursor, que não precisa
+        percorrer as páginas anteriores.
+        
         Args:
-            filtro (str, opcional): Filtro de pesquisa por nome do paciente.
+            filtro (str, opcional): Início do nome do paciente (ignora acentos e maiúsculas).
             limite (int, opcional): Limitar número de resultados para performance.
             pagina (int, opcional): Número da página para paginação.
             
         Returns:
             list: Lista de dicionários com dados resumidos das avaliações.
         """
-        cursor = self._obter_cursor()
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+        
+            try:
+                query = self._SQL_LISTAGEM
+            
+                params = []
+                intervalo = intervalo_prefixo(filtro)
+                if intervalo:
+                    query += " WHERE r.nome_busca >= ? AND r.nome_busca < ?"
+                    params.extend(intervalo)
+            
+                # Índice para ordenação - ordena por ID que é mais rápido que data
+                query += " ORDER BY r.id DESC"
+            
+                # Implementar paginação eficiente
+                pagina_tamanho = 30  # Ajuste conforme necessário
+            
+                if limite:
+                    query += f" LIMIT {int(limite)}"
+                else:
+                    offset = (pagina - 1) * pagina_tamanho
+                    query += f" LIMIT {pagina_tamanho} OFFSET {offset}"
+            
+                cursor.execute(query, params)
+                return [self._resumo_avaliacao(row) for row in cursor.fetchall()]
+            
+            except sqlite3.Error as e:
+                print(f"Erro ao listar avaliações: {e}")
+                return []
+            finally:
+                cursor.close()  # Apenas fecha o cursor, não a conexão
+    
+    def listar_avaliacoes_cursor(self, filtro=None, apos_id=None, direcao='proxima',
+                                 tamanho=30, token=None):
+        """
+        Lista uma página de avaliações usando paginação por chave (keyset).
+        
+        Em vez de LIMIT/OFFSET, cada página começa logo após o último ID da
+        página anterior, então buscar a página 1000 custa o mesmo que a primeira.
+        As avaliações são ordenadas da mais recente para a mais antiga.
+        
+        Args:
+            filtro (str, opcional): Início do nome do paciente (ignora acentos e maiúsculas).
+            apos_id (int, opcional): ID de referência; a página começa depois dele.
+            direcao (str): 'proxima' (avaliações mais antigas que apos_id) ou
+                'anterior' (mais recentes que apos_id).
+            tamanho (int): Quantidade de avaliações por página.
+            token (str, opcional): Token de continuação devolvido por uma chamada
+                anterior. Quando informado, substitui filtro, apos_id e direcao.
+                
+        Returns:
+            dict: {'avaliacoes': lista de resumos, 'token': token da página seguinte
+                na mesma direção, ou None quando não há mais resultados}.
+        """
+        if token:
+            filtro, apos_id, direcao = self._decodificar_token(token)
+        
+        if direcao not in ('proxima', 'anterior'):
+            raise ValueError(f"Direção de paginação inválida: {direcao}")
+        
+        query = self._SQL_LISTAGEM
+        condicoes = []
+        params = []
         
+        intervalo = intervalo_prefixo(filtro)
+        if intervalo:
+            condicoes.append("r.nome_busca >= ? AND r.nome_busca < ?")
+            params.extend(intervalo)
+        
+        if apos_id is not None:
+            condicoes.append("r.id < ?" if direcao == 'proxima' else "r.id > ?")
+            params.append(int(apos_id))
+        
+        if condicoes:
+            query += " WHERE " + " AND ".join(condicoes)
+        
+        # Buscar um item a mais para saber se existe outra página
+        query += " ORDER BY r.id DESC" if direcao == 'proxima' else " ORDER BY r.id ASC"
+        query += " LIMIT ?"
+        params.append(int(tamanho) + 1)
+        
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+            except sqlite3.Error as e:
+                print(f"Erro ao listar avaliações: {e}")
+                return {'avaliacoes': [], 'token': None}
+            finally:
+                cursor.close()
+        
+        tem_mais = len(rows) > tamanho
+        rows = rows[:tamanho]
+        if direcao == 'anterior':
+            # Manter sempre a ordem de exibição (mais recente primeiro)
+            rows.reverse()
+        
+        avaliacoes = [self._resumo_avaliacao(row) for row in rows]
+        
+        proximo_token = None
+        if tem_mais:
+            ultimo_id = avaliacoes[-1]['id'] if direcao == 'proxima' else avaliacoes[0]['id']
+            proximo_token = self._codificar_token(filtro, ultimo_id, direcao)
+        
+        return {'avaliacoes': avaliacoes, 'token': proximo_token}
+    
+    @staticmethod
+    def _codificar_token(filtro, apos_id, direcao):
+        """Gera o token opaco de continuação da paginação."""
+        conteudo = json.dumps([filtro or '', apos_id, direcao], ensure_ascii=False)
+        return base64.urlsafe_b64encode(conteudo.encode('utf-8')).decode('ascii')
+    
+    @staticmethod
+    def _decodificar_token(token):
+        """Recupera (filtro, apos_id, direcao) de um token de continuação."""
         try:
-            # Consulta mais enxuta, selecionando apenas os campos necessários
-            query = '''
-            SELECT a.id, a.data_avaliacao, p.nome, p.idade, p.genero, 
-                s.fecha_evaluacion
-            FROM avaliacoes a
-            JOIN pacientes p ON a.paciente_id = p.id
-            LEFT JOIN seguimiento s ON a.id = s.avaliacao_id
-            '''
-            
-            params = []
-            if filtro:
-                query += " WHERE p.nome LIKE ?"
-                params.append(f"%{filtro}%")
-            
-            # Índice para ordenação - ordena por ID que é mais rápido que data
-            query += " ORDER BY a.id DESC"
-            
-            # Implementar paginação eficiente
-            pagina_tamanho = 30  # Ajuste conforme necessário
-            
-            if limite:
-                query += f" LIMIT {int(limite)}"
-            else:
-                offset = (pagina - 1) * pagina_tamanho
-                query += f" LIMIT {pagina_tamanho} OFFSET {offset}"
-            
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
+            filtro, apos_id, direcao = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+            return filtro, int(apos_id), direcao
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Token de paginação inválido: {token}") from e
+    
+    def obter_resumos(self, avaliacao_ids):
+        """
+        Retorna as linhas da lista de pacientes das avaliações informadas, para
+        atualizar só as linhas alteradas (ver server/notificacoes.py).
+        
+        Args:
+            avaliacao_ids (iterable): IDs das avaliações.
             
-            avaliacoes = []
-            for row in rows:
-                fecha_evaluacion = row['fecha_evaluacion'] if 'fecha_evaluacion' in row.keys() else ''
-                
-                avaliacoes.append({
-                    'id': row['id'],
-                    'data': row['data_avaliacao'],
-                    'nome': row['nome'],
-                    'idade': row['idade'],
-                    'genero': row['genero'],
-                    'fecha_evaluacion': fecha_evaluacion
-                })
+        Returns:
+            dict: ID -> resumo no formato de listar_avaliacoes_cursor; ids
+            inexistentes (ex.: avaliações já excluídas) ficam de fora.
+        """
+        ids = list(dict.fromkeys(int(avaliacao_id) for avaliacao_id in avaliacao_ids))
+        resumos = {}
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                for inicio in range(0, len(ids), self.TAMANHO_BLOCO_IDS):
+                    bloco = ids[inicio:inicio + self.TAMANHO_BLOCO_IDS]
+                    cursor.execute(
+                        f"{self._SQL_LISTAGEM} WHERE r.id IN ({', '.join('?' * len(bloco))})", bloco
+                    )
+                    for row in cursor.fetchall():
+                        resumos[row['id']] = self._resumo_avaliacao(row)
+            finally:
+                cursor.close()
+        return resumos
+    
+    def _comandos_atualizacao(self, dados_formulario, parcial):
+        """
+        Monta os comandos de atualizar_avaliacao a partir de ESQUEMA_AVALIACAO:
+        um UPDATE por tabela e, para a força muscular, DELETE e INSERTs em grados_fuerza.
+        
+        Args:
+            dados_formulario (dict): Dados do formulário.
+            parcial (bool): Se True, só entram as colunas cujos campos estão em
+                dados_formulario e só as tabelas com alguma dessas colunas.
             
-            return avaliacoes
+        Returns:
+            list: Tuplas (tabela, sql, valores sem o id de ligação).
             
-        except sqlite3.Error as e:
-            print(f"Erro ao listar avaliações: {e}")
-            return []
-        finally:
-            cursor.close()  # Apenas fecha o cursor, não a conexão
+        Raises:
+            ValueError: Se alguma data do formulário for inválida.
+        """
+        if not parcial:
+            # Todas as colunas: os UPDATEs já gerados na importação do módulo
+            comandos = [(tabela, _ATUALIZACOES[tabela], valores)
+                        for (tabela, _, _), valores in zip(ESQUEMA_AVALIACAO, valores_formulario(dados_formulario))]
+        else:
+            comandos = []
+            for tabela, coluna_ligacao, campos in ESQUEMA_AVALIACAO:
+                colunas = []
+                valores = []
+                for coluna, campo, _, conversor, _ in campos:
+                    if campo not in dados_formulario:
+                        continue
+                    valor = dados_formulario[campo]
+                    colunas.append(f"{coluna} = ?")
+                    valores.append(conversor(valor) if conversor else valor)
+                
+                if colunas:
+                    sql = f"UPDATE {tabela} SET {', '.join(colunas)} WHERE {coluna_ligacao} = ?"
+                    comandos.append((tabela, sql, valores))
+        
+        # Os graus de força são regravados por inteiro
+        if not parcial or CAMPO_FORCA_MUSCULAR in dados_formulario:
+            comandos.append(('grados_fuerza', "DELETE FROM grados_fuerza WHERE avaliacao_id = ?", ()))
+            comandos.extend(('grados_fuerza', INSERCAO_GRADOS, grau)
+                            for grau in graus_formulario(dados_formulario))
+        return comandos
     
-    def atualizar_avaliacao(self, avaliacao_id, dados_formulario):
+    def atualizar_avaliacao(self, avaliacao_id, dados_formulario, parcial=False):
         """
         Atualiza os dados de uma avaliação existente.
         
         Args:
             avaliacao_id (int): ID da avaliação a ser atualizada.
             dados_formulario (dict): Novos dados do formulário.
+            parcial (bool): Se True, dados_formulario contém apenas os campos
+                alterados e só as seções que os contêm são regravadas; campos
+                ausentes mantêm o valor atual. Se False, todas as seções são
+                regravadas e campos ausentes voltam ao valor padrão.
             
         Returns:
             bool: True se a atualização foi bem-sucedida, False caso contrário.
+            
+        Raises:
+            ValueError: Se 'Fecha Nasc.' ou 'fecha_evaluacion' não for uma data válida.
         """
-        cursor = self._obter_cursor()        
-
+        # Montar os comandos (e validar as datas) antes de abrir a transação
+        comandos = self._comandos_atualizacao(dados_formulario, parcial)
+        
         try:
-            # Iniciar transação
-            self.conn.execute("BEGIN TRANSACTION")
-            
-            # 1. Obter o ID do paciente
+            alteradas = self.executar_escrita(self._aplicar_atualizacao, avaliacao_id, comandos)
+        except sqlite3.Error as e:
+            print(f"Erro ao atualizar avaliação: {e}")
+            return False
+        
+        if alteradas is None:
+            return False
+        self.cache_avaliacoes.invalidar(*alteradas)
+        return True
+    
+    def _aplicar_atualizacao(self, conn, avaliacao_id, comandos):
+        """
+        Trabalho de escrita de atualizar_avaliacao.
+        
+        Returns:
+            list: IDs das avaliações cujo conteúdo mudou (todas as do paciente se os
+                dados dele foram alterados) ou None se a avaliação não existe.
+        """
+        cursor = conn.cursor()
+        try:
+            # Obter o ID do paciente
             cursor.execute("SELECT paciente_id FROM avaliacoes WHERE id = ?", (avaliacao_id,))
             row = cursor.fetchone()
-            if not row:
-                return False
-                
-            paciente_id = row['paciente_id']
-            
-            # 2. Atualizar dados do paciente
-            cursor.execute('''
-            UPDATE pacientes SET
-                nome = ?,
-                idade = ?,
-                genero = ?,
-                contato = ?,
-                data_nascimento = ?,
-                area_consulta = ?,
-                alergias = ?
-            WHERE id = ?
-            ''', (
-                dados_formulario.get('Nombre Completo', ''),
-                dados_formulario.get('Edad', ''),
-                dados_formulario.get('Genero', ''),
-                dados_formulario.get('Contacto', ''),
-                dados_formulario.get('Fecha Nasc.', ''),
-                dados_formulario.get('Área de consulta', ''),
-                dados_formulario.get('Alergias', ''),
-                paciente_id
-            ))
-            
-            # 3. Atualizar histórico clínico
-            cursor.execute('''
-            UPDATE historico_clinico SET
-                motivo_consulta = ?,
-                antecedentes = ?,
-                enfermedad_actual = ?,
-                cirugias_previas = ?,
-                medicamentos_actuales = ?
-            WHERE avaliacao_id = ?
-            ''', (
-                dados_formulario.get('Motivo de consulta', ''),
-                dados_formulario.get('Antecedentes', ''),
-                dados_formulario.get('Efermedad actual', ''),
-                dados_formulario.get('Cirurgías previas', ''),
-                dados_formulario.get('Medicamentos actuales', ''),
-                avaliacao_id
-            ))
-            
-            # 4. Atualizar exame físico
-            cursor.execute('''
-            UPDATE exame_fisico SET
-                pa = ?,
-                pulso = ?,
-                talla = ?,
-                peso = ?,
-                temperatura = ?,
-                fr = ?,
-                sat_o2 = ?,
-                idx = ?,
-                conducta = ?
-            WHERE avaliacao_id = ?
-            ''', (
-                dados_formulario.get('PA', ''),
-                dados_formulario.get('Pulso', ''),
-                dados_formulario.get('Talla', ''),
-                dados_formulario.get('Peso', ''),
-                dados_formulario.get('T', ''),
-                dados_formulario.get('FR', ''),
-                dados_formulario.get('Sat.O2', ''),
-                dados_formulario.get('IDx', ''),
-                dados_formulario.get('Conducta', ''),
-                avaliacao_id
-            ))
-            
-            # 5. Atualizar inspeção e palpação
-            cursor.execute('''
-            UPDATE inspeccion_palpacion SET
-                postura = ?,
-                simetria_corporal = ?,
-                deformidades_aparentes = ?,
-                puntos_dolorosos = ?,
-                tension_muscular = ?
-            WHERE avaliacao_id = ?
-            ''', (
-                dados_formulario.get('Postura', ''),
-                dados_formulario.get('Simetría corporal', ''),
-                dados_formulario.get('Deformidades aparentes', ''),
-                dados_formulario.get('Puntos dolorosos', ''),
-                dados_formulario.get('Tensión muscular', ''),
-                avaliacao_id
-            ))
-            
-            # 6. Atualizar coluna vertebral
-            cursor.execute('''
-            UPDATE columna_vertebral SET
-                curvas_fisiologicas = ?,
-                escoliosis = ?,
-                cifosis_lordosis = ?
-            WHERE avaliacao_id = ?
-            ''', (
-                dados_formulario.get('Curvas Fisiológicas', ''),
-                dados_formulario.get('Presencia de Escoliosis', ''),
-                dados_formulario.get('Cifosis o Lordosis', ''),
-                avaliacao_id
-            ))
-            
-            # 7. Atualizar mobilidade articular
-            cursor.execute('''
-            UPDATE movilidad_articular SET
-                movimiento_activo = ?,
-                movimiento_pasivo = ?,
-                evaluacion_articulaciones = ?
-            WHERE avaliacao_id = ?
-            ''', (
-                dados_formulario.get('Movimiento Activo', ''),
-                dados_formulario.get('Movimiento Pasivo', ''),
-                dados_formulario.get('Evaluación de articulaciones', ''),
-                avaliacao_id
-            ))
-            
-            # 8. Atualizar força muscular
-            # Converter lista para JSON
-            forca_muscular = dados_formulario.get('Fuerza Muscular', [])
-            forca_json = json.dumps(forca_muscular) if forca_muscular else ''
-            
-            cursor.execute('''
-            UPDATE fuerza_muscular SET
-                evaluacion_grupos_musculares = ?,
-                grados_fuerza = ?
-            WHERE avaliacao_id = ?
-            ''', (
-                dados_formulario.get('Evaluación de grupos musculares', ''),
-                forca_json,
-                avaliacao_id
-            ))
-            
-            # 9. Atualizar avaliação neuromuscular
-            cursor.execute('''
-            UPDATE evaluacion_neuromuscular SET
-                reflejos = ?,
-                coordinacion_motora = ?,
-                equilibrio = ?
-            WHERE avaliacao_id = ?
-            ''', (
-                dados_formulario.get('Reflejos', ''),
-                dados_formulario.get('Coordinación motora', ''),
-                dados_formulario.get('Equilibrio', ''),
-                avaliacao_id
-            ))
-            
-            # 10. Atualizar avaliação funcional
-            cursor.execute('''
-            UPDATE evaluacion_funcional SET
-                capacidad_actividades_diarias = ?,
-                limitaciones_dificultades = ?
-            WHERE avaliacao_id = ?
-            ''', (
-                dados_formulario.get('Capacidad para realizar actividades diarias', ''),
-                dados_formulario.get('Limitaciones y dificultades', ''),
-                avaliacao_id
-            ))
-            
-            # 11. Atualizar coordenação
-            cursor.execute('''
-            UPDATE coordinacion SET
-                ejercicios_dedos = ?,
-                precision_movimientos = ?,
-                marcha = ?,
-                equilibrio_dinamico = ?
-            WHERE avaliacao_id = ?
-            ''', (
-                dados_formulario.get('Ejercicios con dedos', ''),
-                dados_formulario.get('Precisión en movimientos', ''),
-                dados_formulario.get('Marcha', ''),
-                dados_formulario.get('Equilibrio Dinámico', ''),
-                avaliacao_id
-            ))
-            
-            # 12. Atualizar provas específicas
-            cursor.execute('''
-            UPDATE pruebas_especificas SET
-                pruebas_ortopedicas = ?,
-                pruebas_neurologicas = ?,
-                pruebas_estabilidad = ?
-            WHERE avaliacao_id = ?
-            ''', (
-                dados_formulario.get('Pruebas ortopédicas', ''),
-                dados_formulario.get('Pruebas neurológicas', ''),
-                dados_formulario.get('Pruebas de estabilidad', ''),
-                avaliacao_id
-            ))
-            
-            # 13. Atualizar escalas de dor
-            cursor.execute('''
-            UPDATE escalas_dolor SET
-                eva_valor = ?,
-                observaciones_dolor = ?
-            WHERE avaliacao_id = ?
-            ''', (
-                dados_formulario.get('escala_eva', 0),
-                dados_formulario.get('observaciones_dolor', ''),
-                avaliacao_id
-            ))
-            
-            # 14. Atualizar diagnósticos
-            cursor.execute('''
-            UPDATE diagnosticos SET
-                resumen_problema = ?,
-                objetivos_tratamiento = ?
-            WHERE avaliacao_id = ?
-            ''', (
-                dados_formulario.get('Resumen del problema', ''),
-                dados_formulario.get('Objetivos del tratamiento', ''),
-                avaliacao_id
-            ))
-            
-            # 15. Atualizar plano de tratamento
-            cursor.execute('''
-            UPDATE plan_tratamiento SET
-                sesiones_semana = ?,
-                duracion_sesion = ?,
-                obs_frecuencia = ?,
-                ejercicios_recomendados = ?
-            WHERE avaliacao_id = ?
-            ''', (
-                dados_formulario.get('sesiones_semana', ''),
-                dados_formulario.get('duracion_sesion', ''),
-                dados_formulario.get('obs_frecuencia', ''),
-                dados_formulario.get('Ejercicios recomendados', ''),
-                avaliacao_id
-            ))
-            
-            # 16. Atualizar seguimento
-            cursor.execute('''
-            UPDATE seguimiento SET
-                programacion_seguimiento = ?,
-                fecha_evaluacion = ?,
-                criterio_revision = ?,
-                criterios_adicionales = ?
-            WHERE avaliacao_id = ?
-            ''', (
-                dados_formulario.get('programacion_seguimiento', ''),
-                dados_formulario.get('fecha_evaluacion', ''),
-                dados_formulario.get('criterio_revision', ''),
-                dados_formulario.get('criterios_adicionales', ''),
-                avaliacao_id
-            ))
+            if not row:
+                return None
             
-            # Confirmar transação
-            self.conn.commit()
+            paciente_id = row['paciente_id']
             
-            return True
+            # Atualizar cada seção com alterações
+            for tabela, sql, valores in comandos:
+                ligacao = paciente_id if tabela == 'pacientes' else avaliacao_id
+                cursor.execute(sql, (*valores, ligacao))
             
-        except sqlite3.Error as e:
-            # Em caso de erro, reverter transação
-            self.conn.rollback()
-            print(f"Erro ao atualizar avaliação: {e}")
-            return False
+            # Os dados do paciente aparecem em todas as avaliações dele
+            if any(tabela == 'pacientes' for tabela, _, _ in comandos):
+                cursor.execute("SELECT id FROM avaliacoes WHERE paciente_id = ?", (paciente_id,))
+                return [row['id'] for row in cursor.fetchall()]
+            return [avaliacao_id]
         
         finally:
             cursor.close()
     
+    # Campos da linha do tempo do paciente (DetalhesPacienteWindow) quando nenhum é pedido
+    CAMPOS_HISTORICO = ('escala_eva', 'Fuerza Muscular', 'sesiones_semana', 'criterio_revision')
+    
+    def historico_paciente(self, paciente_id, campos=None):
+        """
+        Retorna a evolução de um paciente: os campos pedidos de todas as avaliações
+        dele, em ordem cronológica, com uma única consulta.
+        
+        Só as tabelas dos campos pedidos entram no JOIN, e as avaliações saem do
+        índice idx_avaliacoes_paciente_data já em ordem, então o custo depende só
+        da quantidade de avaliações do paciente.
+        
+        Args:
+            paciente_id (int): ID do paciente (chave 'paciente_id' de obter_avaliacao).
+            campos (iterable, opcional): Campos das seções, com os nomes do formulário
+                usados por obter_avaliacao (ex.: 'escala_eva'); padrão: CAMPOS_HISTORICO.
+            
+        Returns:
+            list: Um dicionário por avaliação com 'id', 'data_avaliacao' e os campos
+            pedidos ('Fuerza Muscular' montado a partir de grados_fuerza).
+            
+        Raises:
+            ValueError: Se algum campo não existir ou for do paciente (igual em
+                todas as avaliações).
+        """
+        campos = list(dict.fromkeys(campos or self.CAMPOS_HISTORICO))
+        selecao, juncoes, converter = _projecao_campos(campos, incluir_paciente=False, inicio=2)
+        
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            linhas = cursor.execute(f'''
+            SELECT a.id, a.data_avaliacao{selecao}
+            FROM avaliacoes a{juncoes}
+            WHERE a.paciente_id = ?
+            ORDER BY a.data_avaliacao, a.id
+            ''', (paciente_id,)).fetchall()
+            cursor.close()
+        
+        return [{'id': linha[0], 'data_avaliacao': linha[1], **converter(linha)} for linha in linhas]
+    
+    # Ids por comando em exclusões e consultas com IN (abaixo do limite de
+    # parâmetros de versões antigas do SQLite, que é 999)
+    TAMANHO_BLOCO_IDS = 500
+    
     def excluir_avaliacao(self, avaliacao_id):
         """
         Exclui uma avaliação do banco de dados.
@@ -1069,55 +1819,76 @@ class BancoDadosFisioterapia:
         Returns:
             bool: True se a exclusão foi bem-sucedida, False caso contrário.
         """
-        cursor = self._obter_cursor()
+        return self.excluir_avaliacoes([avaliacao_id]) == 1
+    
+    def excluir_avaliacoes(self, avaliacao_ids):
+        """
+        Exclui várias avaliações em uma única transação.
         
-        try:
-            # Iniciar transação
-            self.conn.execute("BEGIN TRANSACTION")
-            
-            # Obter o ID do paciente
-            cursor.execute("SELECT paciente_id FROM avaliacoes WHERE id = ?", (avaliacao_id,))
-            row = cursor.fetchone()
-            if not row:
-                return False
-                
-            paciente_id = row['paciente_id']
-            
-            # Excluir registros relacionados
-            tabelas = [
-                'historico_clinico', 'exame_fisico', 'inspeccion_palpacion',
-                'columna_vertebral', 'movilidad_articular', 'fuerza_muscular',
-                'evaluacion_neuromuscular', 'evaluacion_funcional', 'coordinacion',
-                'pruebas_especificas', 'escalas_dolor', 'diagnosticos',
-                'plan_tratamiento', 'seguimiento'
-            ]
-            
-            for tabela in tabelas:
-                cursor.execute(f"DELETE FROM {tabela} WHERE avaliacao_id = ?", (avaliacao_id,))
-            
-            # Excluir a avaliação
-            cursor.execute("DELETE FROM avaliacoes WHERE id = ?", (avaliacao_id,))
-            
-            # Excluir o paciente (opcional - pode querer manter para histórico)
-            cursor.execute("DELETE FROM pacientes WHERE id = ?", (paciente_id,))
-            
-            # Confirmar transação
-            self.conn.commit()
-            
-            return True
+        As seções são removidas pelo ON DELETE CASCADE das chaves estrangeiras,
+        então cada bloco de ids custa um único DELETE. Os pacientes que ficarem
+        sem nenhuma avaliação também são excluídos.
+        
+        Args:
+            avaliacao_ids (iterable): IDs das avaliações a excluir (ids inexistentes
+                são ignorados).
             
+        Returns:
+            int: Quantidade de avaliações excluídas (0 também em caso de erro).
+        """
+        ids = list(dict.fromkeys(int(avaliacao_id) for avaliacao_id in avaliacao_ids))
+        if not ids:
+            return 0
+        
+        try:
+            excluidas = self.executar_escrita(self._remover_avaliacoes, ids)
         except sqlite3.Error as e:
-            # Em caso de erro, reverter transação
-            self.conn.rollback()
-            print(f"Erro ao excluir avaliação: {e}")
-            return False
+            print(f"Erro ao excluir avaliações: {e}")
+            return 0
+        
+        if excluidas:
+            self.cache_avaliacoes.invalidar(*ids)
+        return excluidas
+    
+    def _remover_avaliacoes(self, conn, avaliacao_ids):
+        """Trabalho de escrita de excluir_avaliacoes. Retorna quantas avaliações foram excluídas."""
+        cursor = conn.cursor()
+        try:
+            excluidas = 0
+            for inicio in range(0, len(avaliacao_ids), self.TAMANHO_BLOCO_IDS):
+                bloco = avaliacao_ids[inicio:inicio + self.TAMANHO_BLOCO_IDS]
+                marcadores = ', '.join('?' * len(bloco))
+                
+                cursor.execute(
+                    f"SELECT DISTINCT paciente_id FROM avaliacoes WHERE id IN ({marcadores})", bloco
+                )
+                pacientes = [row['paciente_id'] for row in cursor.fetchall()
+                             if row['paciente_id'] is not None]
+                
+                # As seções saem junto, por ON DELETE CASCADE
+                cursor.execute(f"DELETE FROM avaliacoes WHERE id IN ({marcadores})", bloco)
+                excluidas += cursor.rowcount
+                
+                # Excluir o paciente só se não restar outra avaliação dele
+                # (excluí-lo removeria em cascata as demais)
+                if pacientes:
+                    cursor.execute(f'''
+                    DELETE FROM pacientes
+                    WHERE id IN ({', '.join('?' * len(pacientes))})
+                      AND NOT EXISTS (SELECT 1 FROM avaliacoes WHERE paciente_id = pacientes.id)
+                    ''', pacientes)
+            
+            return excluidas
         
         finally:
             cursor.close()
     
     def buscar_pacientes(self, termo_busca):
         """
-        Busca pacientes pelo nome ou contato.
+        Busca pacientes cujo nome ou contato começa com o termo.
+        
+        O nome é comparado pela chave normalizada (sem acentos e maiúsculas),
+        então "maria" encontra "María"; as duas condições usam índices.
         
         Args:
             termo_busca (str): Termo para busca.
@@ -1125,38 +1896,405 @@ class BancoDadosFisioterapia:
         Returns:
             list: Lista de dicionários com dados dos pacientes encontrados.
         """
-        cursor = self._obter_cursor()
+        intervalo = intervalo_prefixo(termo_busca)
+        termo_contato = (termo_busca or '').strip()
+        if not intervalo:
+            return []
         
-        try:
-            # Realizar busca
-            cursor.execute('''
-            SELECT * FROM pacientes 
-            WHERE nome LIKE ? OR contato LIKE ?
-            ORDER BY nome
-            ''', (f"%{termo_busca}%", f"%{termo_busca}%"))
-            
-            rows = cursor.fetchall()
-            
-            pacientes = []
-            for row in rows:
-                pacientes.append({
-                    'id': row['id'],
-                    'nome': row['nome'],
-                    'idade': row['idade'],
-                    'genero': row['genero'],
-                    'contato': row['contato'],
-                    'data_nascimento': row['data_nascimento']
-                })
-            
-            return pacientes
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+        
+            try:
+                # Realizar busca (UNION permite usar um índice para cada condição)
+                cursor.execute('''
+                SELECT * FROM pacientes WHERE nome_busca >= ? AND nome_busca < ?
+                UNION
+                SELECT * FROM pacientes WHERE contato >= ? AND contato < ?
+                ORDER BY nome_busca
+                ''', (*intervalo, termo_contato, termo_contato + '\U0010ffff'))
+            
+                rows = cursor.fetchall()
+            
+                pacientes = []
+                for row in rows:
+                    pacientes.append({
+                        'id': row['id'],
+                        'nome': row['nome'],
+                        'idade': row['idade'],
+                        'genero': row['genero'],
+                        'contato': row['contato'],
+                        'data_nascimento': row['data_nascimento']
+                    })
+            
+                return pacientes
+            
+            except sqlite3.Error as e:
+                print(f"Erro ao buscar pacientes: {e}")
+                return []
+        
+            finally:
+                cursor.close()
+    
+    # A relevância é calculada entre as N correspondências mais recentes; termos
+    # muito comuns ("dolor") casam com boa parte do banco e ordenar todas por
+    # bm25 custaria centenas de milissegundos
+    LIMITE_CANDIDATOS_BUSCA = 1000
+    
+    @staticmethod
+    def _expressao_busca_textual(termo):
+        """
+        Converte o texto digitado em uma expressão MATCH do FTS5.
+        
+        Cada palavra vira um prefixo entre aspas ("lumb"*), combinadas com AND,
+        para que a busca funcione enquanto o usuário digita e caracteres
+        especiais do FTS5 não causem erro de sintaxe.
+        """
+        palavras = [palavra.replace('"', '') for palavra in termo.split()]
+        return ' '.join(f'"{palavra}"*' for palavra in palavras if palavra)
+    
+    def buscar_texto(self, termo, limite=50):
+        """
+        Busca avaliações pelo nome/contato do paciente e pelo texto livre das
+        seções clínicas (motivo da consulta, antecedentes, diagnóstico, ...).
+        
+        Usa o índice FTS5 busca_avaliacoes; acentos e maiúsculas são ignorados.
+        
+        Args:
+            termo (str): Texto digitado pelo usuário.
+            limite (int): Número máximo de resultados.
             
-        except sqlite3.Error as e:
-            print(f"Erro ao buscar pacientes: {e}")
+        Returns:
+            list: Resumos das avaliações (mesmo formato de listar_avaliacoes) com
+                'trecho' (fragmento com os termos encontrados entre [ ]) e
+                'relevancia' (quanto menor, mais relevante), em ordem de relevância
+                entre as LIMITE_CANDIDATOS_BUSCA correspondências mais recentes.
+        """
+        expressao = self._expressao_busca_textual(termo or '')
+        if not expressao:
             return []
         
-        finally:
-            cursor.close()
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('''
+                SELECT r.id, r.data_avaliacao, r.nome, r.idade, r.genero, r.proxima_avaliacao,
+                    b.trecho, b.relevancia
+                FROM (
+                    SELECT rowid AS id, rank AS relevancia,
+                        snippet(busca_avaliacoes, -1, '[', ']', '…', 8) AS trecho
+                    FROM busca_avaliacoes
+                    WHERE busca_avaliacoes MATCH ?
+                    ORDER BY rowid DESC
+                    LIMIT ?
+                ) b
+                JOIN avaliacoes_resumo r ON r.id = b.id
+                ORDER BY b.relevancia
+                LIMIT ?
+                ''', (expressao, self.LIMITE_CANDIDATOS_BUSCA, int(limite)))
+                
+                resultados = []
+                for row in cursor.fetchall():
+                    resumo = self._resumo_avaliacao(row)
+                    resumo['trecho'] = row['trecho']
+                    resumo['relevancia'] = row['relevancia']
+                    resultados.append(resumo)
+                return resultados
+            
+            except sqlite3.Error as e:
+                print(f"Erro na busca textual: {e}")
+                return []
+            finally:
+                cursor.close()
+    
+    def reevaluaciones_entre(self, inicio, fim):
+        """
+        Lista as reavaliações agendadas (seguimiento.fecha_evaluacion) entre duas
+        datas, inclusive, em ordem cronológica. A consulta percorre apenas a
+        faixa do índice de fecha_evaluacion_iso.
+        
+        Args:
+            inicio (str|datetime.date): Primeira data ('dd/mm/YYYY', 'YYYY-MM-DD' ou date).
+            fim (str|datetime.date): Última data, no mesmo formato.
+            
+        Returns:
+            list: Dicionários com 'id' (da avaliação), 'fecha_evaluacion' ('YYYY-MM-DD'),
+                'nome', 'contato', 'programacion_seguimiento' e 'criterio_revision'.
+            
+        Raises:
+            ValueError: Se alguma das datas for vazia ou inválida.
+        """
+        inicio_iso = normalizar_data(inicio)
+        fim_iso = normalizar_data(fim)
+        if not inicio_iso or not fim_iso:
+            raise ValueError("Informe as datas inicial e final do intervalo")
+        
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('''
+                SELECT s.avaliacao_id AS id, s.fecha_evaluacion_iso AS fecha_evaluacion,
+                    p.nome, p.contato, s.programacion_seguimiento, s.criterio_revision
+                FROM seguimiento s
+                JOIN avaliacoes a ON a.id = s.avaliacao_id
+                JOIN pacientes p ON p.id = a.paciente_id
+                WHERE s.fecha_evaluacion_iso BETWEEN ? AND ?
+                ORDER BY s.fecha_evaluacion_iso, s.avaliacao_id
+                ''', (inicio_iso, fim_iso))
+                return [dict(row) for row in cursor.fetchall()]
+            
+            except sqlite3.Error as e:
+                print(f"Erro ao listar reavaliações: {e}")
+                return []
+            finally:
+                cursor.close()
+    
+    def avaliacoes_por_grado_fuerza(self, grado, grupo=None):
+        """
+        Lista as avaliações com um grau de força muscular, opcionalmente de um
+        grupo muscular ("cuádriceps grau 2"). Com o grupo, a consulta percorre
+        apenas a faixa do índice (grupo, grado) de grados_fuerza.
+        
+        Args:
+            grado (int): Grau de 0 a 5.
+            grupo (str, opcional): Grupo muscular, comparado sem acentos e
+                maiúsculas; '' são os graus marcados sem grupo (a opção do
+                formulário). Por padrão, qualquer grupo.
+        
+        Returns:
+            list: Dicionários com 'id' (da avaliação), 'data_avaliacao',
+                'paciente_id', 'nome', 'grupo' e 'descricao', em ordem de ID.
+        
+        Raises:
+            ValueError: Se o grau não for um inteiro de 0 a 5.
+        """
+        try:
+            grado = int(grado)
+        except (TypeError, ValueError):
+            grado = None
+        if grado is None or not 0 <= grado <= 5:
+            raise ValueError("O grau de força deve ser um inteiro de 0 a 5")
+        
+        condicao = "g.grado = ?"
+        parametros = [grado]
+        if grupo is not None:
+            condicao = "g.grupo = ? AND " + condicao
+            parametros.insert(0, normalizar_texto(grupo))
+        
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f'''
+                SELECT a.id, a.data_avaliacao, a.paciente_id, p.nome, g.grupo, g.descricao
+                FROM grados_fuerza g
+                JOIN avaliacoes a ON a.id = g.avaliacao_id
+                JOIN pacientes p ON p.id = a.paciente_id
+                WHERE {condicao}
+                ORDER BY a.id, g.posicao
+                ''', parametros)
+                return [dict(row) for row in cursor.fetchall()]
+            
+            except sqlite3.Error as e:
+                print(f"Erro ao buscar graus de força: {e}")
+                return []
+            finally:
+                cursor.close()
+    
+    # Operadores de comparação aceitos por consultar_coorte (além de 'entre',
+    # 'em', 'contem' e 'preenchido')
+    OPERADORES_COORTE = {'=': '=', '!=': '<>', '<': '<', '<=': '<=', '>': '>', '>=': '>='}
+    
+    @staticmethod
+    def _expressao_filtro(coluna, operador, valor, conversor=None):
+        """
+        Monta a condição de um filtro de consultar_coorte sobre uma coluna.
+        
+        Returns:
+            tuple: (condição SQL, parâmetros).
+        
+        Raises:
+            ValueError: Se o operador não existir ou o valor não servir para ele.
+        """
+        if operador == 'preenchido':
+            if valor:
+                return f"({coluna} IS NOT NULL AND {coluna} <> '')", []
+            return f"({coluna} IS NULL OR {coluna} = '')", []
+        
+        if operador == 'em':
+            if isinstance(valor, str) or not valor:
+                raise ValueError("O operador 'em' espera uma lista de valores")
+            valores = list(valor)
+        elif operador == 'entre':
+            if isinstance(valor, str) or len(valor) != 2:
+                raise ValueError("O operador 'entre' espera (mínimo, máximo)")
+            valores = list(valor)
+        elif operador == 'contem' or operador in BancoDadosFisioterapia.OPERADORES_COORTE:
+            valores = [valor]
+        else:
+            raise ValueError(f"Operador desconhecido: {operador!r}")
+        
+        if conversor:
+            valores = [conversor(item) for item in valores]
+        
+        if operador == 'contem':
+            texto = str(valores[0]).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            return f"{coluna} LIKE ? ESCAPE '\\'", [f"%{texto}%"]
+        
+        # Números comparados com uma coluna TEXT (ex.: sesiones_semana '3') pelo valor numérico
+        numerico = all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in valores)
+        if numerico and coluna not in _COLUNAS_INTEIRAS:
+            expressao = f"CAST({coluna} AS REAL)"
+            vazio = f"{coluna} <> '' AND "
+        else:
+            expressao = coluna
+            vazio = ''
+        
+        if operador == 'em':
+            return f"({vazio}{expressao} IN ({', '.join('?' * len(valores))}))", valores
+        if operador == 'entre':
+            return f"({vazio}{expressao} BETWEEN ? AND ?)", valores
+        return f"({vazio}{expressao} {BancoDadosFisioterapia.OPERADORES_COORTE[operador]} ?)", valores
+    
+    def _montar_coorte(self, filtros):
+        """
+        Traduz os filtros de consultar_coorte em condições sobre avaliacoes_resumo (r).
+        
+        Os filtros de uma mesma seção viram uma subconsulta "r.id IN (SELECT
+        avaliacao_id FROM seção WHERE ...)", que usa os índices da seção; os do
+        paciente passam por avaliacoes.paciente_id. Cada filtro de força muscular
+        tem a sua subconsulta, porque pode ser atendido por outro item da lista.
+        
+        Returns:
+            tuple: (condição WHERE, parâmetros).
+        
+        Raises:
+            ValueError: Se algum filtro for inválido.
+        """
+        por_tabela = {}
+        condicoes = []
+        parametros = []
+        for filtro in filtros:
+            try:
+                campo, operador, valor = filtro
+            except (TypeError, ValueError):
+                raise ValueError(f"Filtro inválido: {filtro!r} (use (campo, operador, valor))") from None
+        
+            if campo == 'data_avaliacao':
+                condicao, valores = self._expressao_filtro('r.data_avaliacao', operador, valor, normalizar_data)
+                condicoes.append(condicao)
+                parametros.extend(valores)
+        
+            elif campo == CAMPO_FORCA_MUSCULAR:
+                # valor é o grau ou (grupo, grau)
+                if operador not in self.OPERADORES_COORTE:
+                    raise ValueError(f"Use um operador de comparação com '{CAMPO_FORCA_MUSCULAR}'")
+                grupo, grado = valor if isinstance(valor, (list, tuple)) else (None, valor)
+                condicao, valores = self._expressao_filtro('grado', operador, int(grado))
+                if grupo is not None:
+                    condicao = f"grupo = ? AND {condicao}"
+                    valores.insert(0, normalizar_texto(grupo))
+                condicoes.append(f"r.id IN (SELECT avaliacao_id FROM grados_fuerza WHERE {condicao})")
+                parametros.extend(valores)
+        
+            elif campo in _COLUNAS_FILTRO:
+                tabela, coluna, conversor = _COLUNAS_FILTRO[campo]
+                condicao, valores = self._expressao_filtro(coluna, operador, valor, conversor)
+                por_tabela.setdefault(tabela, []).append((condicao, valores))
+        
+            else:
+                raise ValueError(f"Campo desconhecido: {campo!r}")
+        
+        for tabela, filtros_tabela in por_tabela.items():
+            condicao = ' AND '.join(condicao for condicao, _ in filtros_tabela)
+            if tabela == 'pacientes':
+                condicoes.append(
+                    "r.id IN (SELECT a.id FROM avaliacoes a WHERE a.paciente_id IN "
+                    f"(SELECT id FROM pacientes WHERE {condicao}))"
+                )
+            else:
+                condicoes.append(f"r.id IN (SELECT avaliacao_id FROM {tabela} WHERE {condicao})")
+            for _, valores in filtros_tabela:
+                parametros.extend(valores)
+        
+        return ' AND '.join(condicoes) or '1', parametros
+    
+    def consultar_coorte(self, filtros, tamanho_bloco=500):
+        """
+        Seleciona as avaliações que atendem a todos os filtros, como "escoliose,
+        EVA ≥ 7 e 3 ou mais sessões por semana":
+        
+            db.consultar_coorte([
+                ('Presencia de Escoliosis', 'preenchido', True),
+                ('escala_eva', '>=', 7),
+                ('sesiones_semana', '>=', 3),
+            ])
+        
+        Só os IDs e as colunas da listagem são lidos, em um único cursor percorrido
+        em blocos com fetchmany, então coortes grandes não ficam inteiras na memória.
+        
+        Args:
+            filtros (iterable): Tuplas (campo, operador, valor), combinadas com E.
+                campo é um campo do formulário (como nas chaves de obter_avaliacao)
+                ou 'data_avaliacao'. Nomes, contatos e datas são comparados pelas
+                colunas normalizadas (sem acentos; datas em qualquer formato de
+                normalizar_data). Operadores:
+                - '=', '!=', '<', '<=', '>', '>=': com um número, colunas de texto
+                  são comparadas pelo valor numérico;
+                - 'entre': valor (mínimo, máximo), inclusive;
+                - 'em': valor é uma lista;
+                - 'contem': trecho do texto (sem diferenciar maiúsculas);
+                - 'preenchido': valor True (campo preenchido) ou False (vazio).
+                Para 'Fuerza Muscular', valor é o grau (0 a 5) ou (grupo, grau),
+                com um operador de comparação.
+            tamanho_bloco (int): Linhas lidas por chamada a fetchmany.
+        
+        Returns:
+            generator: Dicionários no formato de listar_avaliacoes ('id', 'data',
+            'nome', 'idade', 'genero', 'fecha_evaluacion'), em ordem de ID. A
+            conexão fica emprestada até o gerador terminar (ou ser fechado).
+        
+        Raises:
+            ValueError: Se algum filtro for inválido (já na chamada, antes de
+                consultar o banco).
+        """
+        condicao, parametros = self._montar_coorte(filtros)
+        return self._iterar_coorte(f"{self._SQL_LISTAGEM} WHERE {condicao} ORDER BY r.id",
+                                   parametros, tamanho_bloco)
     
+    def _iterar_coorte(self, sql, parametros, tamanho_bloco):
+        """Gerador de consultar_coorte (separado para que os filtros sejam validados na chamada)."""
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql, parametros)
+                while True:
+                    linhas = cursor.fetchmany(tamanho_bloco)
+                    if not linhas:
+                        break
+                    for row in linhas:
+                        yield self._resumo_avaliacao(row)
+            finally:
+                cursor.close()
+    
+    def contar_coorte(self, filtros):
+        """
+        Conta as avaliações e os pacientes que atendem aos filtros de consultar_coorte.
+        
+        Returns:
+            dict: 'avaliacoes' e 'pacientes'.
+        
+        Raises:
+            ValueError: Se algum filtro for inválido.
+        """
+        condicao, parametros = self._montar_coorte(filtros)
+        with self.conexao() as conn:
+            row = conn.execute(f'''
+            SELECT COUNT(*), COUNT(DISTINCT a.paciente_id)
+            FROM avaliacoes_resumo r
+            JOIN avaliacoes a ON a.id = r.id
+            WHERE {condicao}
+            ''', parametros).fetchone()
+        return {'avaliacoes': row[0], 'pacientes': row[1]}
+
     def exportar_avaliacao_json(self, avaliacao_id, caminho_arquivo=None):
         """
         Exporta os dados de uma avaliação para um arquivo JSON.
@@ -1208,6 +2346,116 @@ class BancoDadosFisioterapia:
             print(f"Erro ao exportar para JSON: {e}")
             return False
     
+    def iterar_avaliacoes(self, filtro=None, tamanho_bloco=500):
+        """
+        Percorre todas as avaliações completas sem carregá-las de uma vez.
+        
+        Usa um único cursor lido em blocos com fetchmany, então a memória usada
+        não depende do tamanho do banco. A conexão fica emprestada até o gerador
+        terminar (ou ser fechado) e todas as linhas vêm do mesmo instante do banco.
+        
+        Args:
+            filtro (str, opcional): Início do nome do paciente (ignora acentos e maiúsculas).
+            tamanho_bloco (int): Linhas lidas por chamada a fetchmany.
+            
+        Yields:
+            dict: Avaliação no mesmo formato de obter_avaliacao, em ordem de ID.
+        """
+        sql = _SQL_AVALIACAO_COMPLETA
+        parametros = ()
+        # Mesma regra da listagem: filtro que normaliza para vazio não filtra
+        intervalo = intervalo_prefixo(filtro)
+        if intervalo:
+            sql += " WHERE pacientes.nome_busca >= ? AND pacientes.nome_busca < ?"
+            parametros = intervalo
+        sql += " ORDER BY a.id"
+        
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            try:
+                cursor.execute(sql, parametros)
+                while True:
+                    linhas = cursor.fetchmany(tamanho_bloco)
+                    if not linhas:
+                        break
+                    for row in linhas:
+                        yield _avaliacao_da_linha(row)
+            finally:
+                cursor.close()
+    
+    @staticmethod
+    def _linhas_ndjson(avaliacoes):
+        """Serializa cada avaliação como uma linha JSON."""
+        for dados in avaliacoes:
+            yield json.dumps(dados, ensure_ascii=False) + '\n'
+    
+    @staticmethod
+    def _linhas_csv(avaliacoes):
+        """Serializa as avaliações como CSV, com o cabeçalho tirado da primeira."""
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        colunas = None
+        for dados in avaliacoes:
+            if colunas is None:
+                colunas = list(dados)
+                escritor.writerow(colunas)
+            valores = dados.values()
+            escritor.writerow(
+                json.dumps(valor, ensure_ascii=False) if isinstance(valor, list) else valor
+                for valor in valores
+            )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    def exportar_todas(self, destino, formato='ndjson', filtro=None, compactar=None):
+        """
+        Exporta todas as avaliações (ou as filtradas) em NDJSON ou CSV.
+        
+        As avaliações são lidas, serializadas e gravadas uma a uma (ver
+        iterar_avaliacoes), então a memória usada não cresce com o banco.
+        
+        Args:
+            destino (str|file): Caminho do arquivo ou objeto de arquivo de texto aberto
+                (ex.: sys.stdout).
+            formato (str): 'ndjson' (uma avaliação JSON por linha) ou 'csv' (uma coluna
+                por campo do formulário; listas como 'Fuerza Muscular' viram JSON).
+            filtro (str, opcional): Início do nome do paciente.
+            compactar (bool, opcional): Gravar com gzip. Por padrão, compacta quando
+                o caminho termina em '.gz'; ignorado se destino for um objeto de arquivo.
+                
+        Returns:
+            int: Quantidade de avaliações exportadas.
+            
+        Raises:
+            ValueError: Se o formato não for 'ndjson' nem 'csv'.
+        """
+        serializadores = {'ndjson': self._linhas_ndjson, 'csv': self._linhas_csv}
+        if formato not in serializadores:
+            raise ValueError(f"Formato de exportação desconhecido: {formato!r} (use 'ndjson' ou 'csv')")
+        
+        total = 0
+        
+        def contar(avaliacoes):
+            nonlocal total
+            for dados in avaliacoes:
+                total += 1
+                yield dados
+        
+        linhas = serializadores[formato](contar(self.iterar_avaliacoes(filtro)))
+        
+        if not isinstance(destino, (str, os.PathLike)):
+            destino.writelines(linhas)
+            return total
+        
+        if compactar is None:
+            compactar = os.fspath(destino).endswith('.gz')
+        abrir = gzip.open if compactar else open
+        with abrir(destino, 'wt', encoding='utf-8', newline='') as arquivo:
+            arquivo.writelines(linhas)
+        return total
+    
     def importar_avaliacao_json(self, caminho_arquivo):
         """
         Importa uma avaliação de um arquivo JSON.
@@ -1234,125 +2482,215 @@ class BancoDadosFisioterapia:
         """
         Obtém estatísticas gerais do banco de dados.
         
+        Os valores vêm dos contadores mantidos por gatilhos (migração 6), então
+        a consulta não depende do número de pacientes ou avaliações.
+        
         Returns:
             dict: Dicionário com estatísticas.
         """
-        cursor = self._obter_cursor()
+        with self.conexao() as conn:
+            cursor = conn.cursor()
         
-        try:
-            stats = {}
+            try:
+                stats = {}
+            
+                # Totais de pacientes e avaliações
+                cursor.execute("SELECT chave, total FROM estatisticas_totais")
+                totais = {row['chave']: row['total'] for row in cursor.fetchall()}
+                stats['total_pacientes'] = totais.get('pacientes', 0)
+                stats['total_avaliacoes'] = totais.get('avaliacoes', 0)
+            
+                # Avaliações por mês (últimos 6 meses)
+                cursor.execute('''
+                SELECT mes, total 
+                FROM estatisticas_mes 
+                WHERE mes >= strftime('%Y-%m', 'now', '-6 months') AND total > 0 
+                ORDER BY mes DESC
+                ''')
+                stats['avaliacoes_por_mes'] = [dict(row) for row in cursor.fetchall()]
+            
+                # Distribuição por gênero
+                cursor.execute('''
+                SELECT genero, total 
+                FROM estatisticas_genero 
+                WHERE total > 0 
+                ORDER BY genero
+                ''')
+                stats['distribuicao_genero'] = [dict(row) for row in cursor.fetchall()]
+            
+                return stats
             
-            # Total de pacientes
-            cursor.execute("SELECT COUNT(*) as total FROM pacientes")
-            stats['total_pacientes'] = cursor.fetchone()['total']
+            except sqlite3.Error as e:
+                print(f"Erro ao obter estatísticas: {e}")
+                return {}
+        
+            finally:
+                cursor.close()
+    
+    def analise_desfechos(self, percentis=None):
+        """
+        Evolução da EVA por paciente, percentis mensais da EVA e melhora por
+        frequência de tratamento, calculados com o NumPy (ver server/analise.py).
+        
+        O resultado é reaproveitado enquanto o banco não mudar (PRAGMA data_version).
+        
+        Args:
+            percentis (tuple, opcional): Percentis mensais; padrão PERCENTIS_PADRAO.
+            
+        Returns:
+            dict: Resultado de analise.calcular_desfechos (arrays somente leitura).
             
-            # Total de avaliações
-            cursor.execute("SELECT COUNT(*) as total FROM avaliacoes")
-            stats['total_avaliacoes'] = cursor.fetchone()['total']
+        Raises:
+            ImportError: Se o NumPy não estiver instalado.
+        """
+        # Importado aqui para que o NumPy só seja exigido por quem usa a análise
+        from server.analise import obter_analise, PERCENTIS_PADRAO
+        return obter_analise(self.nome_db).resultados(percentis or PERCENTIS_PADRAO)
+    
+    def inscrever_alteracoes(self, callback):
+        """
+        Avisa callback(alteracoes) quando avaliações forem inseridas, alteradas ou
+        excluídas, por esta aplicação ou por outra estação que use o mesmo arquivo
+        (ver server/notificacoes.py).
+        
+        Args:
+            callback (callable): Chamado com a lista de notificacoes.Alteracao, na
+                thread do monitor (não na thread da interface).
             
-            # Avaliações por mês (últimos 6 meses)
+        Returns:
+            callable: Função sem argumentos que cancela a inscrição.
+        """
+        # Importado aqui: notificacoes depende deste módulo
+        from server.notificacoes import obter_monitor
+        return obter_monitor(self.nome_db).inscrever(callback)
+    
+    def reconstruir_estatisticas(self):
+        """
+        Recalcula os contadores de estatísticas a partir das tabelas de origem.
+        Só é necessário se os contadores divergirem (ex.: banco alterado com os
+        gatilhos desativados).
+        
+        Returns:
+            bool: True se os contadores foram reconstruídos.
+        """
+        try:
+            self.executar_escrita(lambda conn: recalcular_estatisticas(conn.cursor()))
+            return True
+        
+        except sqlite3.Error as e:
+            print(f"Erro ao reconstruir estatísticas: {e}")
+            return False
+
+    def mesclar_pacientes_duplicados(self):
+        """
+        Mescla os cadastros de um mesmo paciente criados antes do reaproveitamento
+        de cadastros em salvar_avaliacao (ou pela importação em lote).
+
+        Usa a mesma identidade de salvar_avaliacao (nome normalizado, data de
+        nascimento e contato normalizado; só o nome não basta). Em cada grupo fica
+        o cadastro mais recente, com a data de cadastro mais antiga do grupo, e as
+        avaliações dos demais passam para ele. Tudo roda em uma única transação.
+
+        Returns:
+            int: Quantidade de cadastros duplicados removidos.
+
+        Raises:
+            sqlite3.Error: Se a mesclagem falhar (nada é alterado).
+        """
+        removidos = self.executar_escrita(self._mesclar_pacientes)
+        if removidos:
+            self.cache_avaliacoes.limpar()
+        return removidos
+
+    def _mesclar_pacientes(self, conn):
+        """Trabalho de escrita de mesclar_pacientes_duplicados."""
+        cursor = conn.cursor()
+        try:
+            # Cadastro duplicado -> cadastro que fica (o agrupamento usa idx_pacientes_identidade)
             cursor.execute('''
-            SELECT strftime('%Y-%m', data_avaliacao) as mes, COUNT(*) as total 
-            FROM avaliacoes 
-            WHERE data_avaliacao >= date('now', '-6 months') 
-            GROUP BY mes 
-            ORDER BY mes DESC
+            CREATE TEMP TABLE mesclagem_pacientes (antigo INTEGER PRIMARY KEY, novo INTEGER NOT NULL)
             ''')
-            stats['avaliacoes_por_mes'] = [dict(row) for row in cursor.fetchall()]
-            
-            # Distribuição por gênero
             cursor.execute('''
-            SELECT genero, COUNT(*) as total 
-            FROM pacientes 
-            GROUP BY genero
+            INSERT INTO mesclagem_pacientes (antigo, novo)
+            SELECT p.id, g.novo
+            FROM (
+                SELECT nome_busca, data_nascimento_iso, contato_busca, MAX(id) AS novo
+                FROM pacientes
+                WHERE nome_busca <> '' AND (data_nascimento_iso IS NOT NULL OR contato_busca <> '')
+                GROUP BY nome_busca, data_nascimento_iso, contato_busca
+                HAVING COUNT(*) > 1
+            ) g
+            JOIN pacientes p
+              ON p.nome_busca = g.nome_busca
+             AND p.data_nascimento_iso IS g.data_nascimento_iso
+             AND p.contato_busca = g.contato_busca
+            WHERE p.id <> g.novo
             ''')
-            stats['distribuicao_genero'] = [dict(row) for row in cursor.fetchall()]
-            
-            return stats
-            
-        except sqlite3.Error as e:
-            print(f"Erro ao obter estatísticas: {e}")
-            return {}
-        
+            cursor.execute('CREATE INDEX temp.idx_mesclagem_pacientes_novo ON mesclagem_pacientes (novo)')
+
+            cursor.execute('''
+            UPDATE pacientes SET data_cadastro = (
+                SELECT MIN(p.data_cadastro) FROM pacientes p
+                WHERE p.id = pacientes.id
+                   OR p.id IN (SELECT antigo FROM mesclagem_pacientes WHERE novo = pacientes.id)
+            )
+            WHERE id IN (SELECT novo FROM mesclagem_pacientes)
+            ''')
+            # Os gatilhos atualizam o nome na busca textual e no resumo de cada avaliação
+            cursor.execute('''
+            UPDATE avaliacoes SET paciente_id = (
+                SELECT novo FROM mesclagem_pacientes WHERE antigo = avaliacoes.paciente_id
+            )
+            WHERE paciente_id IN (SELECT antigo FROM mesclagem_pacientes)
+            ''')
+            cursor.execute('DELETE FROM pacientes WHERE id IN (SELECT antigo FROM mesclagem_pacientes)')
+            removidos = cursor.rowcount
+
+            cursor.execute('DROP TABLE mesclagem_pacientes')
+            return removidos
+
         finally:
             cursor.close()
-    
+
     def carregar_dados_paciente_async(self, avaliacao_id, callback):
         """
         Carrega os dados do paciente de forma assíncrona e chama o callback quando pronto.
         
+        A leitura roda no pool fixo de obter_executor_leitura e o callback é chamado
+        nessa thread; para atualizar a interface, prefira AsyncBancoDados com a
+        PonteTkAsyncio (client/ui/ponte_asyncio.py).
+        
         Args:
             avaliacao_id (int): ID da avaliação a ser carregada.
             callback (function): Função a ser chamada com os dados carregados.
+            
+        Returns:
+            concurrent.futures.Future: Permite cancelar a leitura se ainda não começou.
         """
         def thread_func():
             try:
                 dados = self.obter_avaliacao(avaliacao_id)
-                callback(dados)
             except Exception as e:
                 print(f"Erro ao carregar dados: {e}")
-                callback(None)
+                dados = None
+            callback(dados)
         
-        thread = threading.Thread(target=thread_func)
-        thread.daemon = True
-        thread.start()
+        return obter_executor_leitura().submit(thread_func)
     
     def otimizar_banco_dados(self):
-        """Adiciona índices para melhorar o desempenho do banco de dados"""
+        """
+        Garante que os índices do banco existam.
+        
+        Os índices agora fazem parte das migrações do esquema e são criados uma
+        única vez ao abrir o banco; este método apenas aplica migrações pendentes.
+        """
         try:
-            cursor = self._obter_cursor()
-            
-            # Adicionar índices para busca por nome e data
-            cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_pacientes_nome ON pacientes (nome);
-            ''')
-            
-            cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_avaliacoes_data ON avaliacoes (data_avaliacao);
-            ''')
-            
-            cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_avaliacoes_paciente ON avaliacoes (paciente_id);
-            ''')
-            
-            cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_avaliacoes_id ON avaliacoes (id);
-            ''')
-            
-            # Adicionar índices para chaves estrangeiras nas tabelas relacionadas
-            tabelas_relacionadas = [
-                'historico_clinico', 'exame_fisico', 'inspeccion_palpacion',
-                'columna_vertebral', 'movilidad_articular', 'fuerza_muscular',
-                'evaluacion_neuromuscular', 'evaluacion_funcional', 'coordinacion',
-                'pruebas_especificas', 'escalas_dolor', 'diagnosticos',
-                'plan_tratamiento', 'seguimiento'
-            ]
-            
-            for tabela in tabelas_relacionadas:
-                cursor.execute(f'''
-                CREATE INDEX IF NOT EXISTS idx_{tabela}_avaliacao ON {tabela} (avaliacao_id);
-                ''')
-            
-            self.conn.commit()
-            cursor.close()
+            self._migrar()
             return True
         except Exception as e:
             print(f"Erro ao otimizar banco de dados: {e}")
             return False
 
-    def _conectar(self):
-        """Retorna a conexão existente ou cria uma nova"""
-        with self.lock:
-            try:
-                # Verificar se a conexão existe e está aberta
-                self.conn.execute("SELECT 1")
-                return self.conn, self.conn.cursor()
-            except (sqlite3.Error, AttributeError):
-                # Recriar a conexão se estiver fechada ou com erro
-                self.conn = sqlite3.connect(self.nome_db)
-                self.conn.row_factory = sqlite3.Row
-                return self.conn, self.conn.cursor()
-
 # Integração com o formulário
 
 def modificar_salvar_formulario(formulario_fisioterapia_instance):
@@ -1399,45 +2737,15 @@ def modificar_salvar_formulario(formulario_fisioterapia_instance):
             # Inicializar banco de dados
             db = BancoDadosFisioterapia()
             
-            # Salvar no banco de dados
-            avaliacao_id = db.salvar_avaliacao(dados)
-            
-            # Resetar flag de modificação
-            self.modificado = False
+            # Salvar no banco de dados (em edição, só os campos alterados)
+            avaliacao_id = self.gravar_avaliacao(db, dados)
             
-            # Se estivermos no contexto de uma aplicação integrada, atualizar a aba de clientes
+            # A aba de clientes atualiza a própria lista pelo aviso de alteração do
+            # banco; no contexto de uma aplicação integrada, basta exibi-la
             try:
-                # Obter acesso ao notebook
-                parent = self.frame.master
-                
-                # Procurar a aba de clientes
-                for index in range(parent.index('end')):
-                    tab_name = parent.tab(index, "text")
-                    if tab_name == "Clientes":
-                        # Encontrar a instância da AbaClientes
-                        aba_clientes_widget = None
-                        aba_clientes_frame = parent.winfo_children()[index]
-                        
-                        # Procurar o objeto AbaClientes dentro dos widgets
-                        for widget in aba_clientes_frame.winfo_children():
-                            if hasattr(widget, 'carregar_pacientes'):
-                                aba_clientes_widget = widget
-                                break
-                            elif hasattr(widget, 'winfo_children'):
-                                for child in widget.winfo_children():
-                                    if hasattr(child, 'carregar_pacientes'):
-                                        aba_clientes_widget = child
-                                        break
-                        
-                        # Se encontramos a aba, atualizamos ela
-                        if aba_clientes_widget:
-                            aba_clientes_widget.carregar_pacientes(forcar=True)
-                        
-                # Alterar para a aba de clientes
-                parent.select(0)  # Assumindo que a aba de clientes é a primeira
-                
+                self.frame.master.select(0)  # Assumindo que a aba de clientes é a primeira
             except Exception as e:
-                print(f"Aviso: Não foi possível atualizar a aba de clientes: {e}")
+                print(f"Aviso: Não foi possível exibir a aba de clientes: {e}")
             
             # Mostrar mensagem de sucesso
             import tkinter.messagebox as messagebox
@@ -0,0 +1,349 @@
+"""
+Importação em lote de avaliações exportadas em JSON (o mesmo formato de
+dados_pacientes/*.json e de exportar_avaliacao_json).
+
+Os arquivos são lidos e validados em um pool de processos; as linhas já
+montadas são gravadas pelo escritor do banco com executemany, milhares de
+avaliações por transação. Cada arquivo gravado fica registrado em
+arquivos_importados na mesma transação das suas linhas, então uma importação
+interrompida pode ser executada de novo e continua de onde parou.
+
+Uso:
+    python -m server.manutencao importar dados_pacientes/
+"""
+import collections
+import datetime
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.database import (
+    BancoDadosFisioterapia, ESQUEMA_AVALIACAO, INSERCOES, INSERCAO_GRADOS,
+    SQL_PACIENTE_POR_IDENTIDADE, valores_formulario, graus_formulario,
+    identidade_paciente, campos_novos_paciente
+)
+from server.migracoes import CAMPOS_BUSCA
+from server.normalizacao import normalizar_data
+
+# Arquivos lidos por tarefa do pool (menos troca de mensagens entre processos)
+ARQUIVOS_POR_TAREFA = 64
+
+
+def _montar_atualizacao_busca():
+    """
+    Gera o UPDATE que grava de uma vez o texto das seções em busca_avaliacoes e
+    as posições (índice da tabela em ESQUEMA_AVALIACAO, índice da coluna) de cada valor.
+    """
+    colunas = []
+    posicoes = []
+    for indice_tabela, (tabela, _, campos) in enumerate(ESQUEMA_AVALIACAO):
+        nomes = [coluna for coluna, _, _, _, _ in campos]
+        for coluna in CAMPOS_BUSCA.get(tabela, ()):
+            colunas.append(f"{coluna} = ?")
+            posicoes.append((indice_tabela, nomes.index(coluna)))
+    sql = f"UPDATE busca_avaliacoes SET {', '.join(colunas)} WHERE rowid = ?"
+    return sql, posicoes
+
+
+_ATUALIZACAO_BUSCA, _POSICOES_BUSCA = _montar_atualizacao_busca()
+
+
+def _data_avaliacao(valor):
+    """
+    Data da avaliação do arquivo exportado, em 'YYYY-MM-DD HH:MM:SS'.
+
+    Raises:
+        ValueError: Se o valor não for uma data válida.
+    """
+    texto = str(valor).strip()
+    try:
+        datetime.datetime.strptime(texto, '%Y-%m-%d %H:%M:%S')
+        return texto
+    except ValueError:
+        return f"{normalizar_data(texto)} 00:00:00"
+
+
+def ler_arquivo_avaliacao(caminho):
+    """
+    Lê e valida um arquivo de avaliação, montando os valores de cada tabela.
+
+    Executada nos processos do pool, por isso não acessa o banco.
+
+    Args:
+        caminho (str): Caminho do arquivo JSON.
+
+    Returns:
+        tuple: (caminho, linhas, erro). linhas é (data_avaliacao, valores por
+        tabela na ordem de ESQUEMA_AVALIACAO, linhas de grados_fuerza) ou None se o arquivo
+        for inválido; nesse caso erro descreve o problema.
+    """
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+    except (OSError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        return caminho, None, f"Não foi possível ler o arquivo: {e}"
+
+    if not isinstance(dados, dict):
+        return caminho, None, "O conteúdo não é um objeto JSON"
+
+    try:
+        data_avaliacao = _data_avaliacao(dados['data_avaliacao']) if dados.get('data_avaliacao') else None
+
+        forca = dados.get('Fuerza Muscular', [])
+        if forca and not isinstance(forca, (list, str)):
+            raise ValueError("'Fuerza Muscular' deve ser uma lista ou um texto")
+        int(dados.get('escala_eva', 0) or 0)
+
+        valores = valores_formulario(dados)
+        graus = graus_formulario(dados)
+    except (TypeError, ValueError) as e:
+        return caminho, None, str(e)
+
+    return caminho, (data_avaliacao, valores, graus), None
+
+
+def _ler_arquivos(caminhos):
+    """Lê um grupo de arquivos (uma tarefa do pool de processos)."""
+    return [ler_arquivo_avaliacao(caminho) for caminho in caminhos]
+
+
+def _proximo_id(cursor, tabela):
+    """Primeiro id livre de uma tabela AUTOINCREMENT (chamar com o lock de escrita)."""
+    cursor.execute(f'''
+    SELECT MAX(
+        IFNULL((SELECT seq FROM sqlite_sequence WHERE name = ?), 0),
+        IFNULL((SELECT MAX(id) FROM {tabela}), 0)
+    ) + 1
+    ''', (tabela,))
+    return cursor.fetchone()[0]
+
+
+def _pacientes_do_lote(cursor, lote):
+    """
+    Decide o paciente de cada arquivo do lote, reaproveitando cadastros como
+    salvar_avaliacao: o mais recente com a mesma identidade no banco ou um já
+    criado para um arquivo anterior do lote. Só os pacientes novos recebem id.
+    
+    Arquivos posteriores do mesmo paciente preenchem os campos que vieram vazios
+    nos anteriores e substituem os demais, como se fossem salvos em sequência.
+    
+    Returns:
+        tuple: (ids, novos, atualizacoes): o id do paciente de cada arquivo, na
+        ordem do lote; {id: valores} dos cadastros a inserir; e {id: {coluna: valor}}
+        dos cadastros existentes que recebem dados novos.
+    """
+    proximo_id = _proximo_id(cursor, 'pacientes')
+    ids = []
+    novos = {}
+    existentes = {}  # id -> cadastro gravado no banco
+    atualizacoes = {}
+    por_identidade = {}
+    
+    for _, (_, valores, _) in lote:
+        valores_paciente = valores[0]
+        identidade = identidade_paciente(valores_paciente)
+        paciente_id = por_identidade.get(identidade) if identidade is not None else None
+        
+        if paciente_id is None and identidade is not None:
+            cursor.execute(SQL_PACIENTE_POR_IDENTIDADE, identidade)
+            existente = cursor.fetchone()
+            if existente is not None:
+                paciente_id = existente['id']
+                existentes[paciente_id] = existente
+                atualizacoes[paciente_id] = {}
+        
+        if paciente_id is None:
+            paciente_id = proximo_id
+            proximo_id += 1
+            novos[paciente_id] = list(valores_paciente)
+        elif paciente_id in novos:
+            linha = novos[paciente_id]
+            for indice, valor in enumerate(valores_paciente):
+                if valor not in ('', None):
+                    linha[indice] = valor
+        else:
+            atual = {**dict(existentes[paciente_id]), **atualizacoes[paciente_id]}
+            atualizacoes[paciente_id].update(campos_novos_paciente(atual, valores_paciente))
+        
+        if identidade is not None:
+            por_identidade[identidade] = paciente_id
+        ids.append(paciente_id)
+    
+    return ids, novos, {paciente_id: campos for paciente_id, campos in atualizacoes.items() if campos}
+
+
+def _gravar_lote(conn, lote):
+    """
+    Trabalho de escrita: grava um lote de arquivos lidos com um executemany por tabela.
+
+    Os ids de pacientes e avaliações são reservados aqui, dentro da transação do
+    escritor, para que as seções possam ser inseridas em massa já ligadas à avaliação.
+    Pacientes já cadastrados (ou repetidos no lote) são reaproveitados pela
+    identidade, como em salvar_avaliacao; só os novos recebem um id.
+    
+    Gravar as seções uma a uma faria os gatilhos reescreverem a linha da avaliação
+    no índice FTS uma vez por seção (o custo dominante da importação). Por isso as
+    seções entram antes das avaliações, quando os gatilhos não encontram a linha
+    do índice, e o texto de todas elas é gravado no índice com um único UPDATE.
+    A exceção é seguimiento, que precisa da avaliação para atualizar avaliacoes_resumo.
+
+    Returns:
+        int: Quantidade de avaliações gravadas.
+    """
+    cursor = conn.cursor()
+    try:
+        agora = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        pacientes, novos, atualizacoes = _pacientes_do_lote(cursor, lote)
+        primeira_avaliacao = _proximo_id(cursor, 'avaliacoes')
+
+        linhas = {tabela: [] for tabela, _, _ in ESQUEMA_AVALIACAO}
+        avaliacoes = []
+        graus = []
+        busca = []
+        arquivos = []
+        for i, (caminho, (data_avaliacao, valores, graus_arquivo)) in enumerate(lote):
+            paciente_id = pacientes[i]
+            avaliacao_id = primeira_avaliacao + i
+            avaliacoes.append((avaliacao_id, paciente_id, data_avaliacao or agora))
+            graus.extend((*grau, avaliacao_id) for grau in graus_arquivo)
+            busca.append((*(valores[t][c] for t, c in _POSICOES_BUSCA), avaliacao_id))
+            arquivos.append((caminho, avaliacao_id, agora))
+            for (tabela, _, _), valores_tabela in zip(ESQUEMA_AVALIACAO, valores):
+                if tabela != 'pacientes':
+                    linhas[tabela].append((avaliacao_id, *valores_tabela))
+        linhas['pacientes'] = [(paciente_id, *valores_paciente, agora)
+                               for paciente_id, valores_paciente in novos.items()]
+
+        # As seções são gravadas antes da avaliação a que pertencem; as chaves
+        # estrangeiras só são conferidas no commit
+        cursor.execute("PRAGMA defer_foreign_keys = ON")
+        
+        cursor.executemany(INSERCOES['pacientes'], linhas['pacientes'])
+        for paciente_id, campos in atualizacoes.items():
+            cursor.execute(
+                f"UPDATE pacientes SET {', '.join(f'{coluna} = ?' for coluna in campos)} WHERE id = ?",
+                (*campos.values(), paciente_id)
+            )
+        for tabela, _, _ in ESQUEMA_AVALIACAO:
+            if tabela not in ('pacientes', 'seguimiento'):
+                cursor.executemany(INSERCOES[tabela], linhas[tabela])
+        cursor.executemany('''
+        INSERT INTO avaliacoes (id, paciente_id, data_avaliacao, fisioterapeuta, observacoes)
+        VALUES (?, ?, ?, '', '')
+        ''', avaliacoes)
+        cursor.executemany(INSERCAO_GRADOS, graus)
+        cursor.executemany(INSERCOES['seguimiento'], linhas['seguimiento'])
+        cursor.executemany(_ATUALIZACAO_BUSCA, busca)
+        cursor.executemany(
+            "INSERT INTO arquivos_importados (caminho, avaliacao_id, importado_em) VALUES (?, ?, ?)",
+            arquivos
+        )
+        return len(lote)
+
+    finally:
+        cursor.close()
+
+
+def listar_arquivos_json(diretorio):
+    """Retorna os caminhos absolutos dos arquivos .json do diretório e subdiretórios, ordenados."""
+    caminhos = []
+    for raiz, _, arquivos in os.walk(diretorio):
+        for nome in arquivos:
+            if nome.lower().endswith('.json'):
+                caminhos.append(os.path.abspath(os.path.join(raiz, nome)))
+    caminhos.sort()
+    return caminhos
+
+
+def importar_diretorio(diretorio, nome_db="fisioterapia.db", processos=None,
+                       tamanho_lote=2000, progresso=None):
+    """
+    Importa todos os arquivos JSON de avaliação de um diretório.
+
+    Arquivos já registrados em arquivos_importados são ignorados, então a
+    função pode ser chamada de novo após uma interrupção. Um arquivo inválido
+    não interrompe a importação; ele é listado em 'erros' e não é registrado,
+    podendo ser corrigido e importado depois.
+
+    Args:
+        diretorio (str): Diretório com os arquivos (subdiretórios incluídos).
+        nome_db (str): Caminho do arquivo do banco de dados.
+        processos (int, opcional): Processos que leem os arquivos (padrão: núcleos da CPU).
+        tamanho_lote (int): Avaliações gravadas por transação.
+        progresso (callable, opcional): Chamado como progresso(processados, total)
+            a cada grupo de arquivos lido, contando só os arquivos pendentes.
+
+    Returns:
+        dict: 'total' (arquivos encontrados), 'ja_importados', 'importados' e
+        'erros' (lista de (caminho, mensagem)).
+    """
+    db = BancoDadosFisioterapia(nome_db)
+    caminhos = listar_arquivos_json(diretorio)
+
+    with db.conexao() as conn:
+        registrados = {linha[0] for linha in conn.execute("SELECT caminho FROM arquivos_importados")}
+    pendentes = [caminho for caminho in caminhos if caminho not in registrados]
+
+    resultado = {
+        'total': len(caminhos),
+        'ja_importados': len(caminhos) - len(pendentes),
+        'importados': 0,
+        'erros': [],
+    }
+    if not pendentes:
+        return resultado
+
+    processos = processos or os.cpu_count() or 1
+    grupos = [pendentes[i:i + ARQUIVOS_POR_TAREFA] for i in range(0, len(pendentes), ARQUIVOS_POR_TAREFA)]
+    processados = 0
+    lote = []
+    gravacao = None  # Lote sendo gravado pelo escritor enquanto os processos leem o próximo
+
+    def aguardar_gravacao():
+        nonlocal gravacao
+        if gravacao is not None:
+            resultado['importados'] += gravacao.result()
+            gravacao = None
+
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        # Poucas tarefas em andamento por vez, para não acumular arquivos lidos na memória
+        em_andamento = collections.deque()
+        proximos = iter(grupos)
+        for grupo in proximos:
+            em_andamento.append(executor.submit(_ler_arquivos, grupo))
+            if len(em_andamento) >= processos * 2:
+                break
+
+        while em_andamento:
+            lidos = em_andamento.popleft().result()
+            grupo = next(proximos, None)
+            if grupo is not None:
+                em_andamento.append(executor.submit(_ler_arquivos, grupo))
+
+            for caminho, linhas, erro in lidos:
+                if erro:
+                    resultado['erros'].append((caminho, erro))
+                else:
+                    lote.append((caminho, linhas))
+            processados += len(lidos)
+            if progresso:
+                progresso(processados, len(pendentes))
+
+            if len(lote) >= tamanho_lote:
+                aguardar_gravacao()
+                gravacao = db.enviar_escrita(_gravar_lote, lote)
+                lote = []
+
+    aguardar_gravacao()
+    if lote:
+        gravacao = db.enviar_escrita(_gravar_lote, lote)
+        aguardar_gravacao()
+
+    # Cadastros reaproveitados podem ter recebido dados novos, que aparecem nas
+    # avaliações já existentes desses pacientes
+    if resultado['importados']:
+        db.cache_avaliacoes.limpar()
+    return resultado
@@ -0,0 +1,134 @@
+"""
+Comandos de manutenção do banco de dados de fisioterapia.
+
+Uso:
+    python -m server.manutencao [--db fisioterapia.db] reconstruir-estatisticas
+    python -m server.manutencao [--db fisioterapia.db] importar DIRETORIO [--processos N] [--lote N]
+    python -m server.manutencao [--db fisioterapia.db] exportar DESTINO [--formato ndjson|csv] [--filtro NOME] [--gzip]
+    python -m server.manutencao [--db fisioterapia.db] mesclar-pacientes
+    python -m server.manutencao [--db fisioterapia.db] analise
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.database import BancoDadosFisioterapia
+from server.importacao import importar_diretorio
+
+
+def _reconstruir_estatisticas(args):
+    db = BancoDadosFisioterapia(args.db)
+    if not db.reconstruir_estatisticas():
+        return 1
+    stats = db.estatisticas_gerais()
+    print(f"Estatísticas reconstruídas: {stats.get('total_pacientes', 0)} pacientes, "
+          f"{stats.get('total_avaliacoes', 0)} avaliações")
+    return 0
+
+
+def _importar(args):
+    exibiu_progresso = False
+    
+    def mostrar_progresso(processados, total):
+        nonlocal exibiu_progresso
+        exibiu_progresso = True
+        print(f"\r{processados}/{total} arquivos processados", end='', flush=True)
+    
+    resultado = importar_diretorio(args.diretorio, args.db, processos=args.processos,
+                                   tamanho_lote=args.lote, progresso=mostrar_progresso)
+    if exibiu_progresso:
+        print()
+    
+    for caminho, erro in resultado['erros']:
+        print(f"{caminho}: {erro}", file=sys.stderr)
+    print(f"{resultado['importados']} avaliações importadas, "
+          f"{resultado['ja_importados']} arquivos já importados antes, "
+          f"{len(resultado['erros'])} arquivos com erro")
+    return 1 if resultado['erros'] else 0
+
+
+def _exportar(args):
+    db = BancoDadosFisioterapia(args.db)
+    if args.destino == '-':
+        total = db.exportar_todas(sys.stdout, args.formato, args.filtro)
+    else:
+        total = db.exportar_todas(args.destino, args.formato, args.filtro,
+                                  compactar=True if args.gzip else None)
+    print(f"{total} avaliações exportadas", file=sys.stderr)
+    return 0
+
+
+def _mesclar_pacientes(args):
+    db = BancoDadosFisioterapia(args.db)
+    antes = db.estatisticas_gerais().get('total_pacientes', 0)
+    removidos = db.mesclar_pacientes_duplicados()
+    print(f"{removidos} cadastros duplicados mesclados: {antes} -> {antes - removidos} pacientes")
+    return 0
+
+
+def _analise(args):
+    db = BancoDadosFisioterapia(args.db)
+    try:
+        resultados = db.analise_desfechos()
+    except ImportError as e:
+        print(e, file=sys.stderr)
+        return 1
+    
+    evolucao = resultados['evolucao_eva']
+    print(f"{resultados['avaliacoes']} avaliações, {len(evolucao['paciente_id'])} pacientes reavaliados")
+    if len(evolucao['paciente_id']):
+        print(f"Variação média da EVA: {evolucao['variacao'].mean():+.2f}")
+    
+    mensais = resultados['percentis_mensais']
+    print("EVA por mês (" + ", ".join(f"p{p}" for p in mensais['percentis']) + "):")
+    for mes, total, valores in zip(mensais['meses'][-12:], mensais['avaliacoes'][-12:], mensais['valores'][-12:]):
+        print(f"  {mes}  {' '.join(f'{valor:5.1f}' for valor in valores)}  ({total} avaliações)")
+    
+    frequencia = resultados['melhora_por_frequencia']
+    print("Melhora da EVA por sessões semanais:")
+    for sesiones, pacientes, media, taxa in zip(frequencia['sesiones_semana'], frequencia['pacientes'],
+                                                frequencia['melhora_media'], frequencia['taxa_melhora']):
+        print(f"  {sesiones:g}x/semana  {media:+.2f} pontos, {taxa:.0%} melhoraram ({pacientes} pacientes)")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manutenção do banco de dados de fisioterapia")
+    parser.add_argument('--db', default="fisioterapia.db", help="Caminho do banco de dados")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    reconstruir = comandos.add_parser('reconstruir-estatisticas',
+                                      help="Recalcula os contadores de estatísticas gerais")
+    reconstruir.set_defaults(executar=_reconstruir_estatisticas)
+    
+    importar = comandos.add_parser('importar',
+                                   help="Importa em lote os arquivos JSON de avaliação de um diretório")
+    importar.add_argument('diretorio', help="Diretório com os arquivos .json (inclui subdiretórios)")
+    importar.add_argument('--processos', type=int, default=None,
+                          help="Processos que leem os arquivos (padrão: núcleos da CPU)")
+    importar.add_argument('--lote', type=int, default=2000, help="Avaliações gravadas por transação")
+    importar.set_defaults(executar=_importar)
+    
+    exportar = comandos.add_parser('exportar', help="Exporta todas as avaliações em NDJSON ou CSV")
+    exportar.add_argument('destino', help="Arquivo de saída ('-' para a saída padrão; '.gz' compacta)")
+    exportar.add_argument('--formato', choices=('ndjson', 'csv'), default='ndjson')
+    exportar.add_argument('--filtro', default=None, help="Início do nome do paciente")
+    exportar.add_argument('--gzip', action='store_true', help="Compactar com gzip mesmo sem '.gz' no nome")
+    exportar.set_defaults(executar=_exportar)
+    
+    mesclar = comandos.add_parser('mesclar-pacientes',
+                                  help="Mescla cadastros duplicados do mesmo paciente")
+    mesclar.set_defaults(executar=_mesclar_pacientes)
+    
+    analise = comandos.add_parser('analise',
+                                  help="Evolução da EVA e melhora por frequência de tratamento (requer NumPy)")
+    analise.set_defaults(executar=_analise)
+
+    args = parser.parse_args(argv)
+    return args.executar(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
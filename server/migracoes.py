@@ -0,0 +1,976 @@
+"""
+Migrações versionadas do esquema do banco de dados de fisioterapia.
+
+A versão do esquema fica gravada em PRAGMA user_version. Ao abrir um banco,
+apenas as migrações com número maior que essa versão são aplicadas, todas em
+uma única transação; um banco já atualizado custa somente a leitura do pragma.
+
+Para alterar o esquema, adicione uma nova função ao final da lista MIGRACOES
+com o próximo número. Nunca altere uma migração que já foi distribuída.
+"""
+import json
+import re
+import sqlite3
+
+from server.normalizacao import (
+    normalizar_texto, normalizar_data_tolerante, normalizar_contato, itens_forca_muscular
+)
+
+# Tabelas de seções da avaliação (uma linha por avaliação em cada uma)
+TABELAS_SECOES = [
+    'historico_clinico', 'exame_fisico', 'inspeccion_palpacion',
+    'columna_vertebral', 'movilidad_articular', 'fuerza_muscular',
+    'evaluacion_neuromuscular', 'evaluacion_funcional', 'coordinacion',
+    'pruebas_especificas', 'escalas_dolor', 'diagnosticos',
+    'plan_tratamiento', 'seguimiento'
+]
+
+
+def _migracao_001_tabelas(cursor):
+    """
+    Cria as tabelas da aplicação.
+    
+    A estrutura inclui:
+    - pacientes: Informações básicas do paciente
+    - avaliacoes: Dados da avaliação fisioterapêutica
+    - historico_clinico: Histórico clínico do paciente
+    - exame_fisico, inspeccion_palpacion, ...: Seções da avaliação física
+    - escalas_dolor: Escalas de dor
+    - diagnosticos: Diagnóstico fisioterapêutico
+    - plan_tratamiento: Plano de tratamento
+    - seguimiento: Informações de acompanhamento e reavaliação
+    
+    Usa IF NOT EXISTS para adotar bancos criados antes do controle de versão.
+    """
+    # Tabela de Usuários
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS usuarios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        senha TEXT NOT NULL,
+        perfil TEXT NOT NULL,
+        ultimo_acesso TEXT,
+        data_criacao TEXT
+    )
+    ''')
+    
+    # Tabela de Pacientes (dados básicos)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS pacientes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome TEXT,
+        idade TEXT,
+        genero TEXT,
+        contato TEXT,
+        data_nascimento TEXT,
+        area_consulta TEXT,
+        alergias TEXT,
+        data_cadastro TEXT
+    )
+    ''')
+    
+    # Tabela de Avaliações (principal)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS avaliacoes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        paciente_id INTEGER,
+        data_avaliacao TEXT,
+        fisioterapeuta TEXT,
+        observacoes TEXT,
+        FOREIGN KEY (paciente_id) REFERENCES pacientes (id)
+    )
+    ''')
+    
+    # Tabela de Histórico Clínico
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS historico_clinico (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        avaliacao_id INTEGER,
+        motivo_consulta TEXT,
+        antecedentes TEXT,
+        enfermedad_actual TEXT,
+        cirugias_previas TEXT,
+        medicamentos_actuales TEXT,
+        FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
+    )
+    ''')
+    
+    # Tabela de Avaliação Física (exame físico básico)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS exame_fisico (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        avaliacao_id INTEGER,
+        pa TEXT,
+        pulso TEXT,
+        talla TEXT,
+        peso TEXT,
+        temperatura TEXT,
+        fr TEXT,
+        sat_o2 TEXT,
+        idx TEXT,
+        conducta TEXT,
+        FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
+    )
+    ''')
+    
+    # Tabela de Inspeção e Palpação
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS inspeccion_palpacion (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        avaliacao_id INTEGER,
+        postura TEXT,
+        simetria_corporal TEXT,
+        deformidades_aparentes TEXT,
+        puntos_dolorosos TEXT,
+        tension_muscular TEXT,
+        FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
+    )
+    ''')
+    
+    # Tabela de Coluna Vertebral
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS columna_vertebral (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        avaliacao_id INTEGER,
+        curvas_fisiologicas TEXT,
+        escoliosis TEXT,
+        cifosis_lordosis TEXT,
+        FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
+    )
+    ''')
+    
+    # Tabela de Mobilidade Articular
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS movilidad_articular (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        avaliacao_id INTEGER,
+        movimiento_activo TEXT,
+        movimiento_pasivo TEXT,
+        evaluacion_articulaciones TEXT,
+        FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
+    )
+    ''')
+    
+    # Tabela de Força Muscular
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS fuerza_muscular (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        avaliacao_id INTEGER,
+        evaluacion_grupos_musculares TEXT,
+        grados_fuerza TEXT,
+        FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
+    )
+    ''')
+    
+    # Tabela de Avaliação Neuromuscular
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS evaluacion_neuromuscular (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        avaliacao_id INTEGER,
+        reflejos TEXT,
+        coordinacion_motora TEXT,
+        equilibrio TEXT,
+        FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
+    )
+    ''')
+    
+    # Tabela de Avaliação Funcional
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS evaluacion_funcional (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        avaliacao_id INTEGER,
+        capacidad_actividades_diarias TEXT,
+        limitaciones_dificultades TEXT,
+        FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
+    )
+    ''')
+    
+    # Tabela de Coordenação
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS coordinacion (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        avaliacao_id INTEGER,
+        ejercicios_dedos TEXT,
+        precision_movimientos TEXT,
+        marcha TEXT,
+        equilibrio_dinamico TEXT,
+        FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
+    )
+    ''')
+    
+    # Tabela de Provas Específicas
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS pruebas_especificas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        avaliacao_id INTEGER,
+        pruebas_ortopedicas TEXT,
+        pruebas_neurologicas TEXT,
+        pruebas_estabilidad TEXT,
+        FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
+    )
+    ''')
+    
+    # Tabela de Escalas de Dor
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS escalas_dolor (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        avaliacao_id INTEGER,
+        eva_valor INTEGER,
+        observaciones_dolor TEXT,
+        FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
+    )
+    ''')
+    
+    # Tabela de Diagnósticos
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS diagnosticos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        avaliacao_id INTEGER,
+        resumen_problema TEXT,
+        objetivos_tratamiento TEXT,
+        FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
+    )
+    ''')
+    
+    # Tabela de Plano de Tratamento
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS plan_tratamiento (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        avaliacao_id INTEGER,
+        sesiones_semana TEXT,
+        duracion_sesion TEXT,
+        obs_frecuencia TEXT,
+        ejercicios_recomendados TEXT,
+        FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
+    )
+    ''')
+    
+    # Tabela de Seguimento
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS seguimiento (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        avaliacao_id INTEGER,
+        programacion_seguimiento TEXT,
+        fecha_evaluacion TEXT,
+        criterio_revision TEXT,
+        criterios_adicionales TEXT,
+        FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes (id)
+    )
+    ''')
+
+
+def _migracao_002_indices(cursor):
+    """Cria os índices de busca por nome/data e das chaves estrangeiras das seções."""
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pacientes_nome ON pacientes (nome)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_avaliacoes_data ON avaliacoes (data_avaliacao)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_avaliacoes_paciente ON avaliacoes (paciente_id)')
+    
+    # avaliacoes.id é INTEGER PRIMARY KEY (alias do rowid), não precisa de índice próprio
+    cursor.execute('DROP INDEX IF EXISTS idx_avaliacoes_id')
+    
+    for tabela in TABELAS_SECOES:
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS idx_{tabela}_avaliacao ON {tabela} (avaliacao_id)'
+        )
+
+
+# Colunas de texto livre de cada seção indexadas pela busca textual (migração 3)
+_CAMPOS_BUSCA_V3 = {
+    'historico_clinico': ['motivo_consulta', 'antecedentes', 'enfermedad_actual',
+                          'cirugias_previas', 'medicamentos_actuales'],
+    'exame_fisico': ['idx', 'conducta'],
+    'inspeccion_palpacion': ['postura', 'deformidades_aparentes', 'puntos_dolorosos'],
+    'evaluacion_funcional': ['limitaciones_dificultades'],
+    'pruebas_especificas': ['pruebas_ortopedicas', 'pruebas_neurologicas'],
+    'escalas_dolor': ['observaciones_dolor'],
+    'diagnosticos': ['resumen_problema', 'objetivos_tratamiento'],
+    'plan_tratamiento': ['ejercicios_recomendados', 'obs_frecuencia'],
+    'seguimiento': ['criterios_adicionales'],
+}
+
+
+def _migracao_003_busca_textual(cursor):
+    """
+    Cria o índice FTS5 busca_avaliacoes, com uma linha por avaliação (rowid = id
+    da avaliação) contendo o nome e contato do paciente e o texto livre das seções.
+    
+    Gatilhos mantêm o índice sincronizado; o tokenizador remove acentos, então
+    "maria" encontra "María". O índice de prefixos acelera buscas parciais.
+    """
+    colunas_secoes = [coluna for colunas in _CAMPOS_BUSCA_V3.values() for coluna in colunas]
+    
+    cursor.execute(f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS busca_avaliacoes USING fts5(
+        nome, contato, {', '.join(colunas_secoes)},
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    ''')
+    
+    # Avaliação nova: criar a linha com os dados do paciente
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_busca_avaliacoes_ai AFTER INSERT ON avaliacoes BEGIN
+        INSERT INTO busca_avaliacoes (rowid, nome, contato) VALUES (
+            NEW.id,
+            (SELECT nome FROM pacientes WHERE id = NEW.paciente_id),
+            (SELECT contato FROM pacientes WHERE id = NEW.paciente_id)
+        );
+    END
+    ''')
+    
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_busca_avaliacoes_au AFTER UPDATE OF paciente_id ON avaliacoes BEGIN
+        UPDATE busca_avaliacoes SET
+            nome = (SELECT nome FROM pacientes WHERE id = NEW.paciente_id),
+            contato = (SELECT contato FROM pacientes WHERE id = NEW.paciente_id)
+        WHERE rowid = NEW.id;
+    END
+    ''')
+    
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_busca_avaliacoes_ad AFTER DELETE ON avaliacoes BEGIN
+        DELETE FROM busca_avaliacoes WHERE rowid = OLD.id;
+    END
+    ''')
+    
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_busca_pacientes_au AFTER UPDATE OF nome, contato ON pacientes BEGIN
+        UPDATE busca_avaliacoes SET nome = NEW.nome, contato = NEW.contato
+        WHERE rowid IN (SELECT id FROM avaliacoes WHERE paciente_id = NEW.id);
+    END
+    ''')
+    
+    # Seções: copiar as colunas de texto para a linha da avaliação
+    for tabela, colunas in _CAMPOS_BUSCA_V3.items():
+        novos = ', '.join(f'{coluna} = NEW.{coluna}' for coluna in colunas)
+        nulos = ', '.join(f'{coluna} = NULL' for coluna in colunas)
+        for evento, sufixo in (('INSERT', 'ai'), ('UPDATE', 'au')):
+            cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_busca_{tabela}_{sufixo} AFTER {evento} ON {tabela} BEGIN
+                UPDATE busca_avaliacoes SET {novos} WHERE rowid = NEW.avaliacao_id;
+            END
+            ''')
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_busca_{tabela}_ad AFTER DELETE ON {tabela} BEGIN
+            UPDATE busca_avaliacoes SET {nulos} WHERE rowid = OLD.avaliacao_id;
+        END
+        ''')
+    
+    # Preencher o índice com as avaliações existentes
+    selecoes = ', '.join(f'{tabela}.{coluna}'
+                         for tabela, colunas in _CAMPOS_BUSCA_V3.items() for coluna in colunas)
+    juncoes = ' '.join(f'LEFT JOIN {tabela} ON {tabela}.avaliacao_id = a.id'
+                       for tabela in _CAMPOS_BUSCA_V3)
+    cursor.execute('DELETE FROM busca_avaliacoes')
+    cursor.execute(f'''
+    INSERT INTO busca_avaliacoes (rowid, nome, contato, {', '.join(colunas_secoes)})
+    SELECT a.id, p.nome, p.contato, {selecoes}
+    FROM avaliacoes a
+    LEFT JOIN pacientes p ON p.id = a.paciente_id
+    {juncoes}
+    ''')
+
+
+def _migracao_004_nome_busca(cursor):
+    """
+    Adiciona pacientes.nome_busca, o nome sem acentos e em minúsculas, e o
+    índice que permite buscar por prefixo do nome sem varrer a tabela.
+    A coluna é mantida pelo código que grava pacientes (normalizar_texto).
+    """
+    colunas = [linha[1] for linha in cursor.execute('PRAGMA table_info(pacientes)').fetchall()]
+    if 'nome_busca' not in colunas:
+        cursor.execute('ALTER TABLE pacientes ADD COLUMN nome_busca TEXT')
+    
+    pacientes = cursor.execute('SELECT id, nome FROM pacientes').fetchall()
+    cursor.executemany(
+        'UPDATE pacientes SET nome_busca = ? WHERE id = ?',
+        [(normalizar_texto(nome), paciente_id) for paciente_id, nome in pacientes]
+    )
+    
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pacientes_nome_busca ON pacientes (nome_busca)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pacientes_contato ON pacientes (contato)')
+
+
+def _sql_data_iso(expressao):
+    """
+    Expressão SQL que converte uma data em texto para 'YYYY-MM-DD'.
+    
+    Aceita 'dd/mm/YYYY' (formato dos campos de data do formulário) e
+    'YYYY-MM-DD[ HH:MM:SS]'; qualquer outro valor vira NULL.
+    """
+    return f"""CASE
+        WHEN {expressao} GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]*'
+            THEN substr({expressao}, 7, 4) || '-' || substr({expressao}, 4, 2) || '-' || substr({expressao}, 1, 2)
+        WHEN {expressao} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'
+            THEN substr({expressao}, 1, 10)
+        ELSE NULL
+    END"""
+
+
+def _migracao_005_resumo(cursor):
+    """
+    Cria avaliacoes_resumo, a tabela desnormalizada com exatamente o que a
+    lista de pacientes exibe. Gatilhos a mantêm atualizada, com as datas já
+    em formato ISO, e a listagem vira uma leitura por faixa de índice sem JOIN.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS avaliacoes_resumo (
+        id INTEGER PRIMARY KEY,
+        data_avaliacao TEXT,
+        nome TEXT,
+        nome_busca TEXT,
+        idade TEXT,
+        genero TEXT,
+        proxima_avaliacao TEXT
+    )
+    ''')
+    # Busca por prefixo do nome já na ordem da listagem (id decrescente)
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_avaliacoes_resumo_nome_busca
+    ON avaliacoes_resumo (nome_busca, id)
+    ''')
+    
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_avaliacoes_ai AFTER INSERT ON avaliacoes BEGIN
+        INSERT OR REPLACE INTO avaliacoes_resumo (id, data_avaliacao, nome, nome_busca, idade, genero)
+        SELECT NEW.id, {_sql_data_iso('NEW.data_avaliacao')}, p.nome, p.nome_busca, p.idade, p.genero
+        FROM (SELECT NEW.paciente_id AS paciente_id) n
+        LEFT JOIN pacientes p ON p.id = n.paciente_id;
+    END
+    ''')
+    
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_avaliacoes_au
+    AFTER UPDATE OF paciente_id, data_avaliacao ON avaliacoes BEGIN
+        UPDATE avaliacoes_resumo SET
+            data_avaliacao = {_sql_data_iso('NEW.data_avaliacao')},
+            nome = (SELECT nome FROM pacientes WHERE id = NEW.paciente_id),
+            nome_busca = (SELECT nome_busca FROM pacientes WHERE id = NEW.paciente_id),
+            idade = (SELECT idade FROM pacientes WHERE id = NEW.paciente_id),
+            genero = (SELECT genero FROM pacientes WHERE id = NEW.paciente_id)
+        WHERE id = NEW.id;
+    END
+    ''')
+    
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_avaliacoes_ad AFTER DELETE ON avaliacoes BEGIN
+        DELETE FROM avaliacoes_resumo WHERE id = OLD.id;
+    END
+    ''')
+    
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_pacientes_au
+    AFTER UPDATE OF nome, nome_busca, idade, genero ON pacientes BEGIN
+        UPDATE avaliacoes_resumo SET
+            nome = NEW.nome, nome_busca = NEW.nome_busca, idade = NEW.idade, genero = NEW.genero
+        WHERE id IN (SELECT id FROM avaliacoes WHERE paciente_id = NEW.id);
+    END
+    ''')
+    
+    for evento, sufixo in (('INSERT', 'ai'), ('UPDATE OF fecha_evaluacion', 'au')):
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_resumo_seguimiento_{sufixo} AFTER {evento} ON seguimiento BEGIN
+            UPDATE avaliacoes_resumo SET proxima_avaliacao = {_sql_data_iso('NEW.fecha_evaluacion')}
+            WHERE id = NEW.avaliacao_id;
+        END
+        ''')
+    
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_seguimiento_ad AFTER DELETE ON seguimiento BEGIN
+        UPDATE avaliacoes_resumo SET proxima_avaliacao = NULL WHERE id = OLD.avaliacao_id;
+    END
+    ''')
+    
+    # Preencher com as avaliações existentes
+    cursor.execute('DELETE FROM avaliacoes_resumo')
+    cursor.execute(f'''
+    INSERT INTO avaliacoes_resumo (id, data_avaliacao, nome, nome_busca, idade, genero, proxima_avaliacao)
+    SELECT a.id, {_sql_data_iso('a.data_avaliacao')}, p.nome, p.nome_busca, p.idade, p.genero,
+        {_sql_data_iso('s.fecha_evaluacion')}
+    FROM avaliacoes a
+    LEFT JOIN pacientes p ON p.id = a.paciente_id
+    LEFT JOIN seguimiento s ON s.avaliacao_id = a.id
+    ''')
+
+
+def recalcular_estatisticas(cursor):
+    """
+    Recalcula do zero as tabelas de estatísticas a partir de pacientes e
+    avaliacoes. Usado pela migração 6 e para corrigir contadores divergentes.
+    """
+    cursor.execute('DELETE FROM estatisticas_totais')
+    cursor.execute('DELETE FROM estatisticas_mes')
+    cursor.execute('DELETE FROM estatisticas_genero')
+    cursor.execute('''
+    INSERT INTO estatisticas_totais (chave, total)
+    SELECT 'pacientes', COUNT(*) FROM pacientes
+    UNION ALL
+    SELECT 'avaliacoes', COUNT(*) FROM avaliacoes
+    ''')
+    cursor.execute('''
+    INSERT INTO estatisticas_mes (mes, total)
+    SELECT IFNULL(strftime('%Y-%m', data_avaliacao), ''), COUNT(*) FROM avaliacoes GROUP BY 1
+    ''')
+    cursor.execute('''
+    INSERT INTO estatisticas_genero (genero, total)
+    SELECT IFNULL(genero, ''), COUNT(*) FROM pacientes GROUP BY 1
+    ''')
+
+
+def _migracao_006_estatisticas(cursor):
+    """
+    Cria os contadores usados por estatisticas_gerais: totais, avaliações por
+    mês e pacientes por gênero. Gatilhos os atualizam a cada inserção,
+    exclusão ou alteração, então consultar as estatísticas não varre tabelas.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS estatisticas_totais (
+        chave TEXT PRIMARY KEY,
+        total INTEGER NOT NULL DEFAULT 0
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS estatisticas_mes (
+        mes TEXT PRIMARY KEY,
+        total INTEGER NOT NULL DEFAULT 0
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS estatisticas_genero (
+        genero TEXT PRIMARY KEY,
+        total INTEGER NOT NULL DEFAULT 0
+    )
+    ''')
+    
+    def contar(tabela, coluna, valor, delta):
+        return (f"INSERT INTO {tabela} ({coluna}, total) VALUES ({valor}, {delta}) "
+                f"ON CONFLICT({coluna}) DO UPDATE SET total = total + ({delta});")
+    
+    mes_novo = "IFNULL(strftime('%Y-%m', NEW.data_avaliacao), '')"
+    mes_antigo = "IFNULL(strftime('%Y-%m', OLD.data_avaliacao), '')"
+    
+    gatilhos = {
+        'trg_estatisticas_pacientes_ai': ('AFTER INSERT ON pacientes', [
+            contar('estatisticas_totais', 'chave', "'pacientes'", 1),
+            contar('estatisticas_genero', 'genero', "IFNULL(NEW.genero, '')", 1),
+        ]),
+        'trg_estatisticas_pacientes_ad': ('AFTER DELETE ON pacientes', [
+            contar('estatisticas_totais', 'chave', "'pacientes'", -1),
+            contar('estatisticas_genero', 'genero', "IFNULL(OLD.genero, '')", -1),
+        ]),
+        'trg_estatisticas_pacientes_au': ('AFTER UPDATE OF genero ON pacientes', [
+            contar('estatisticas_genero', 'genero', "IFNULL(OLD.genero, '')", -1),
+            contar('estatisticas_genero', 'genero', "IFNULL(NEW.genero, '')", 1),
+        ]),
+        'trg_estatisticas_avaliacoes_ai': ('AFTER INSERT ON avaliacoes', [
+            contar('estatisticas_totais', 'chave', "'avaliacoes'", 1),
+            contar('estatisticas_mes', 'mes', mes_novo, 1),
+        ]),
+        'trg_estatisticas_avaliacoes_ad': ('AFTER DELETE ON avaliacoes', [
+            contar('estatisticas_totais', 'chave', "'avaliacoes'", -1),
+            contar('estatisticas_mes', 'mes', mes_antigo, -1),
+        ]),
+        'trg_estatisticas_avaliacoes_au': ('AFTER UPDATE OF data_avaliacao ON avaliacoes', [
+            contar('estatisticas_mes', 'mes', mes_antigo, -1),
+            contar('estatisticas_mes', 'mes', mes_novo, 1),
+        ]),
+    }
+    for nome, (evento, comandos) in gatilhos.items():
+        corpo = '\n        '.join(comandos)
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {nome} {evento} BEGIN
+            {corpo}
+        END
+        ''')
+    
+    recalcular_estatisticas(cursor)
+
+
+def _migracao_007_datas_iso(cursor):
+    """
+    Adiciona pacientes.data_nascimento_iso e seguimiento.fecha_evaluacion_iso,
+    cópias em 'YYYY-MM-DD' das datas que o formulário grava como 'dd/mm/YYYY',
+    e os índices que permitem consultar por intervalo de datas. As colunas são
+    mantidas pelo código que grava as avaliações (normalizar_data); datas
+    antigas que não puderem ser interpretadas ficam NULL.
+    """
+    for tabela, coluna_origem in (('pacientes', 'data_nascimento'), ('seguimiento', 'fecha_evaluacion')):
+        coluna_iso = f'{coluna_origem}_iso'
+        colunas = [linha[1] for linha in cursor.execute(f'PRAGMA table_info({tabela})').fetchall()]
+        if coluna_iso not in colunas:
+            cursor.execute(f'ALTER TABLE {tabela} ADD COLUMN {coluna_iso} TEXT')
+        
+        linhas = cursor.execute(f'SELECT id, {coluna_origem} FROM {tabela}').fetchall()
+        cursor.executemany(
+            f'UPDATE {tabela} SET {coluna_iso} = ? WHERE id = ?',
+            [(normalizar_data_tolerante(valor), linha_id) for linha_id, valor in linhas]
+        )
+    
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_seguimiento_fecha_evaluacion_iso
+    ON seguimiento (fecha_evaluacion_iso, avaliacao_id)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_pacientes_data_nascimento_iso
+    ON pacientes (data_nascimento_iso)
+    ''')
+
+
+def _migracao_008_gatilhos_busca_por_coluna(cursor):
+    """
+    Restringe os gatilhos de UPDATE das seções às colunas indexadas em
+    busca_avaliacoes. Antes, alterar um campo fora do índice (ex.: a escala
+    EVA) também regravava a linha do FTS, gerando páginas extras no WAL.
+    """
+    for tabela, colunas in _CAMPOS_BUSCA_V3.items():
+        novos = ', '.join(f'{coluna} = NEW.{coluna}' for coluna in colunas)
+        cursor.execute(f'DROP TRIGGER IF EXISTS trg_busca_{tabela}_au')
+        cursor.execute(f'''
+        CREATE TRIGGER trg_busca_{tabela}_au AFTER UPDATE OF {', '.join(colunas)} ON {tabela} BEGIN
+            UPDATE busca_avaliacoes SET {novos} WHERE rowid = NEW.avaliacao_id;
+        END
+        ''')
+
+
+def _migracao_009_arquivos_importados(cursor):
+    """
+    Cria arquivos_importados, o registro dos arquivos JSON já gravados pela
+    importação em lote. Cada arquivo é registrado na mesma transação que as
+    suas linhas, então uma importação interrompida pode ser retomada sem
+    duplicar avaliações.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS arquivos_importados (
+        caminho TEXT PRIMARY KEY,
+        avaliacao_id INTEGER,
+        importado_em TEXT
+    )
+    ''')
+
+
+def _reconstruir_com_cascata(cursor, tabela):
+    """
+    Reconstrói uma tabela com ON DELETE CASCADE nas suas chaves estrangeiras.
+
+    O SQLite não altera restrições de uma tabela existente, então a tabela é
+    recriada a partir do próprio SQL guardado em sqlite_master (que já inclui as
+    colunas adicionadas por migrações anteriores), os dados são copiados e os
+    índices e gatilhos, que somem junto com a tabela antiga, são recriados.
+    Deve rodar com PRAGMA foreign_keys desligado (ver aplicar_migracoes).
+    """
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (tabela,))
+    sql_tabela = cursor.fetchone()[0]
+    cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') "
+        "AND sql IS NOT NULL", (tabela,)
+    )
+    objetos = [linha[0] for linha in cursor.fetchall()]
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (tabela,))
+    sequencia = cursor.fetchone()
+
+    nova = f"{tabela}_nova"
+    sql_nova = re.sub(
+        r'(REFERENCES\s+\w+\s*\(\s*\w+\s*\))(?!\s*ON\s+DELETE)',
+        r'\1 ON DELETE CASCADE',
+        sql_tabela.replace(f"CREATE TABLE {tabela}", f"CREATE TABLE {nova}", 1),
+        flags=re.IGNORECASE
+    )
+    cursor.execute(sql_nova)
+
+    cursor.execute(f"PRAGMA table_info({tabela})")
+    colunas = ', '.join(linha[1] for linha in cursor.fetchall())
+    cursor.execute(f"INSERT INTO {nova} ({colunas}) SELECT {colunas} FROM {tabela}")
+    cursor.execute(f"DROP TABLE {tabela}")
+    cursor.execute(f"ALTER TABLE {nova} RENAME TO {tabela}")
+
+    # A cópia com ids explícitos leva a sequência só até o maior id restante;
+    # manter a original para que ids de linhas excluídas não sejam reutilizados
+    if sequencia is not None:
+        cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?",
+                       (sequencia[0], tabela))
+
+    for sql in objetos:
+        cursor.execute(sql)
+
+
+def _migracao_010_exclusao_em_cascata(cursor):
+    """
+    Recria avaliacoes e as tabelas de seções com ON DELETE CASCADE.
+
+    Excluir uma avaliação passa a remover as suas seções, e excluir um paciente,
+    as suas avaliações. Linhas de seção cuja avaliação já não existe (possíveis
+    enquanto as chaves estrangeiras não eram respeitadas) são removidas, e
+    avaliações de pacientes inexistentes ficam com paciente_id NULL.
+    """
+    for tabela in TABELAS_SECOES:
+        cursor.execute(f'''
+        DELETE FROM {tabela}
+        WHERE avaliacao_id IS NOT NULL
+          AND avaliacao_id NOT IN (SELECT id FROM avaliacoes)
+        ''')
+    cursor.execute('''
+    UPDATE avaliacoes SET paciente_id = NULL
+    WHERE paciente_id IS NOT NULL
+      AND paciente_id NOT IN (SELECT id FROM pacientes)
+    ''')
+
+    # Com legacy_alter_table o RENAME não revalida os gatilhos de outras tabelas
+    # que citam a tabela em reconstrução (ela não existe entre o DROP e o RENAME)
+    cursor.execute('PRAGMA legacy_alter_table = ON')
+    try:
+        for tabela in ['avaliacoes'] + TABELAS_SECOES:
+            _reconstruir_com_cascata(cursor, tabela)
+    finally:
+        cursor.execute('PRAGMA legacy_alter_table = OFF')
+
+    cursor.execute('PRAGMA foreign_key_check')
+    violacao = cursor.fetchone()
+    if violacao is not None:
+        raise sqlite3.IntegrityError(
+            f"Chave estrangeira inválida após a migração: tabela {violacao[0]}, linha {violacao[1]}"
+        )
+
+
+def _migracao_011_identidade_paciente(cursor):
+    """
+    Adiciona pacientes.contato_busca (normalizar_contato) e o índice de
+    identidade (nome_busca, data_nascimento_iso, contato_busca), usado para
+    reaproveitar o cadastro de um paciente que volta para nova avaliação.
+
+    O índice começa por nome_busca, então também atende às buscas por prefixo
+    do nome e substitui idx_pacientes_nome_busca. Os cadastros duplicados já
+    existentes não são mesclados aqui (ver mesclar_pacientes_duplicados).
+    """
+    colunas = [linha[1] for linha in cursor.execute('PRAGMA table_info(pacientes)').fetchall()]
+    if 'contato_busca' not in colunas:
+        cursor.execute('ALTER TABLE pacientes ADD COLUMN contato_busca TEXT')
+
+    pacientes = cursor.execute('SELECT id, contato FROM pacientes').fetchall()
+    cursor.executemany(
+        'UPDATE pacientes SET contato_busca = ? WHERE id = ?',
+        [(normalizar_contato(contato), paciente_id) for paciente_id, contato in pacientes]
+    )
+
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_pacientes_identidade
+    ON pacientes (nome_busca, data_nascimento_iso, contato_busca)
+    ''')
+    cursor.execute('DROP INDEX IF EXISTS idx_pacientes_nome_busca')
+
+
+def _migracao_012_historico_paciente(cursor):
+    """
+    Troca idx_avaliacoes_paciente por (paciente_id, data_avaliacao): o histórico
+    de um paciente sai do índice já em ordem cronológica. Só com paciente_id,
+    o SQLite preferia percorrer idx_avaliacoes_data inteiro para não ordenar.
+    """
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_avaliacoes_paciente_data
+    ON avaliacoes (paciente_id, data_avaliacao)
+    ''')
+    cursor.execute('DROP INDEX IF EXISTS idx_avaliacoes_paciente')
+
+
+
+def _migracao_013_grados_fuerza(cursor):
+    """
+    Move os graus de força de fuerza_muscular.grados_fuerza (texto JSON) para a
+    tabela grados_fuerza, uma linha por item, com índice em (grupo, grado) para
+    consultar avaliações por grau sem ler o JSON de cada linha.
+    
+    A coluna antiga é esvaziada e deixa de ser usada.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS grados_fuerza (
+        avaliacao_id INTEGER NOT NULL REFERENCES avaliacoes (id) ON DELETE CASCADE,
+        posicao INTEGER NOT NULL,
+        grupo TEXT NOT NULL DEFAULT '',
+        grado INTEGER,
+        descricao TEXT NOT NULL,
+        PRIMARY KEY (avaliacao_id, posicao)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_grados_fuerza_grupo_grado
+    ON grados_fuerza (grupo, grado)
+    ''')
+    
+    cursor.execute('''
+    SELECT avaliacao_id, grados_fuerza FROM fuerza_muscular
+    WHERE grados_fuerza IS NOT NULL AND grados_fuerza <> ''
+    ''')
+    linhas = []
+    for avaliacao_id, texto in cursor.fetchall():
+        try:
+            valor = json.loads(texto)
+        except json.JSONDecodeError:
+            valor = texto  # Gravado sem JSON: preservado como um item
+        for posicao, (grupo, grado, descricao) in enumerate(itens_forca_muscular(valor)):
+            linhas.append((avaliacao_id, posicao, grupo, grado, descricao))
+    cursor.executemany(
+        "INSERT OR IGNORE INTO grados_fuerza (avaliacao_id, posicao, grupo, grado, descricao) "
+        "VALUES (?, ?, ?, ?, ?)",
+        linhas
+    )
+    cursor.execute("UPDATE fuerza_muscular SET grados_fuerza = NULL WHERE grados_fuerza IS NOT NULL")
+
+
+def _migracao_014_indices_coorte(cursor):
+    """
+    Índices dos filtros numéricos mais comuns de consultar_coorte: a EVA e as
+    sessões por semana. sesiones_semana é TEXT ('3'), então o índice é da
+    expressão CAST(... AS REAL), a mesma que a consulta usa para comparar números.
+    """
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_escalas_dolor_eva
+    ON escalas_dolor (eva_valor)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_plan_tratamiento_sesiones
+    ON plan_tratamiento (CAST(sesiones_semana AS REAL))
+    ''')
+
+
+def _migracao_015_alteracoes(cursor):
+    """
+    Registro das avaliações inseridas, alteradas e excluídas, lido pelo
+    MonitorAlteracoes (server/notificacoes.py) para atualizar só as linhas
+    afetadas da lista, inclusive quando outra estação grava no mesmo arquivo.
+    
+    Gatilhos gravam uma linha por evento; seq cresce a cada commit (AUTOINCREMENT
+    nunca reaproveita números). O registro guarda só os últimos ~10000 eventos:
+    a cada 1000, os mais antigos que isso são apagados, e quem ficou para trás
+    recarrega tudo.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS alteracoes_avaliacoes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        avaliacao_id INTEGER NOT NULL,
+        operacao TEXT NOT NULL
+    )
+    ''')
+    
+    def registrar(operacao, avaliacao_id):
+        return (f"INSERT INTO alteracoes_avaliacoes (avaliacao_id, operacao) "
+                f"VALUES ({avaliacao_id}, '{operacao}');")
+    
+    gatilhos = {
+        'trg_alteracoes_avaliacoes_ai': ('AFTER INSERT ON avaliacoes', registrar('inserida', 'NEW.id')),
+        'trg_alteracoes_avaliacoes_au': ('AFTER UPDATE ON avaliacoes', registrar('atualizada', 'NEW.id')),
+        'trg_alteracoes_avaliacoes_ad': ('AFTER DELETE ON avaliacoes', registrar('excluida', 'OLD.id')),
+        # Os dados do paciente aparecem em todas as avaliações dele
+        'trg_alteracoes_pacientes_au': ('AFTER UPDATE ON pacientes', (
+            "INSERT INTO alteracoes_avaliacoes (avaliacao_id, operacao) "
+            "SELECT id, 'atualizada' FROM avaliacoes WHERE paciente_id = NEW.id;")),
+        # Os graus são regravados por inteiro: um evento por avaliação, não por item
+        'trg_alteracoes_grados_fuerza_ai': ('AFTER INSERT ON grados_fuerza WHEN NEW.posicao = 0',
+                                            registrar('atualizada', 'NEW.avaliacao_id')),
+        'trg_alteracoes_grados_fuerza_ad': ('AFTER DELETE ON grados_fuerza WHEN OLD.posicao = 0',
+                                            registrar('atualizada', 'OLD.avaliacao_id')),
+        'trg_alteracoes_limpeza': ('AFTER INSERT ON alteracoes_avaliacoes WHEN NEW.seq % 1000 = 0',
+                                   "DELETE FROM alteracoes_avaliacoes WHERE seq <= NEW.seq - 10000;"),
+    }
+    # Só UPDATE nas seções: elas são inseridas junto com a avaliação e excluídas em cascata
+    for tabela in TABELAS_SECOES:
+        gatilhos[f'trg_alteracoes_{tabela}_au'] = (f'AFTER UPDATE ON {tabela}',
+                                                   registrar('atualizada', 'NEW.avaliacao_id'))
+    
+    for nome, (evento, comando) in gatilhos.items():
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {nome} {evento} BEGIN
+            {comando}
+        END
+        ''')
+
+
+def _migracao_016_alteracoes_sem_avaliacao(cursor):
+    """
+    Os gatilhos de alteração das seções (migração 15) falhavam com NOT NULL ao
+    alterar uma linha de seção sem avaliacao_id (o esquema permite), travando a
+    gravação. Recriados para ignorar essas linhas, que não aparecem em nenhuma lista.
+    """
+    for tabela in TABELAS_SECOES:
+        cursor.execute(f'DROP TRIGGER IF EXISTS trg_alteracoes_{tabela}_au')
+        cursor.execute(f'''
+        CREATE TRIGGER trg_alteracoes_{tabela}_au AFTER UPDATE ON {tabela}
+        WHEN NEW.avaliacao_id IS NOT NULL BEGIN
+            INSERT INTO alteracoes_avaliacoes (avaliacao_id, operacao) VALUES (NEW.avaliacao_id, 'atualizada');
+        END
+        ''')
+
+
+# Colunas de cada seção presentes hoje em busca_avaliacoes (para quem grava o índice
+# diretamente, como a importação em lote); atualizar junto com uma migração que as altere
+CAMPOS_BUSCA = _CAMPOS_BUSCA_V3
+
+# (versão, descrição, função) em ordem crescente de versão
+MIGRACOES = [
+    (1, "Tabelas iniciais", _migracao_001_tabelas),
+    (2, "Índices de busca e das seções", _migracao_002_indices),
+    (3, "Índice de busca textual (FTS5)", _migracao_003_busca_textual),
+    (4, "Chave de busca normalizada do nome do paciente", _migracao_004_nome_busca),
+    (5, "Tabela de resumo da lista de avaliações", _migracao_005_resumo),
+    (6, "Contadores incrementais de estatísticas", _migracao_006_estatisticas),
+    (7, "Colunas de datas em formato ISO", _migracao_007_datas_iso),
+    (8, "Gatilhos da busca textual restritos às colunas indexadas", _migracao_008_gatilhos_busca_por_coluna),
+    (9, "Registro de arquivos da importação em lote", _migracao_009_arquivos_importados),
+    (10, "Exclusão em cascata nas chaves estrangeiras", _migracao_010_exclusao_em_cascata),
+    (11, "Identidade do paciente para reaproveitar cadastros", _migracao_011_identidade_paciente),
+    (12, "Índice do histórico do paciente em ordem cronológica", _migracao_012_historico_paciente),
+    (13, "Graus de força muscular em tabela própria", _migracao_013_grados_fuerza),
+    (14, "Índices dos filtros numéricos de coortes", _migracao_014_indices_coorte),
+    (15, "Registro de alterações das avaliações", _migracao_015_alteracoes),
+    (16, "Gatilhos de alteração ignoram seções sem avaliação", _migracao_016_alteracoes_sem_avaliacao),
+]
+
+VERSAO_ATUAL = MIGRACOES[-1][0]
+
+
+def versao_esquema(conn):
+    """Retorna a versão do esquema gravada no banco (PRAGMA user_version)."""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def aplicar_migracoes(conn):
+    """
+    Aplica as migrações pendentes no banco.
+    
+    Args:
+        conn (sqlite3.Connection): Conexão com o banco a ser migrado.
+        
+    Returns:
+        list: Números das migrações aplicadas (vazia se o banco já estava atualizado).
+    """
+    if versao_esquema(conn) >= VERSAO_ATUAL:
+        return []
+    
+    # journal_mode é persistente no arquivo e não pode mudar dentro de uma transação
+    conn.execute('PRAGMA journal_mode = WAL')
+    
+    # Migrações que reconstroem tabelas precisam das chaves estrangeiras desligadas
+    # (o DROP da tabela antiga dispararia as exclusões em cascata), e o pragma não
+    # muda dentro de uma transação; cada migração confere as chaves que altera
+    chaves_estrangeiras = conn.execute('PRAGMA foreign_keys').fetchone()[0]
+    conn.execute('PRAGMA foreign_keys = OFF')
+    
+    # BEGIN IMMEDIATE garante que só um processo migre por vez
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # Reler a versão: outro processo pode ter migrado enquanto esperávamos o lock
+        versao = versao_esquema(conn)
+        cursor = conn.cursor()
+        aplicadas = []
+        for numero, descricao, funcao in MIGRACOES:
+            if numero <= versao:
+                continue
+            funcao(cursor)
+            cursor.execute(f'PRAGMA user_version = {int(numero)}')
+            aplicadas.append(numero)
+        conn.commit()
+        cursor.close()
+        return aplicadas
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute(f'PRAGMA foreign_keys = {int(chaves_estrangeiras)}')
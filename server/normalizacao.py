@@ -0,0 +1,155 @@
+"""
+Funções de normalização dos dados gravados no banco de fisioterapia.
+
+Mantidas em um módulo próprio porque são usadas tanto pelas migrações
+(para preencher colunas existentes) quanto pelo BancoDadosFisioterapia
+(para manter essas colunas a cada gravação e montar as buscas).
+"""
+import datetime
+import re
+import unicodedata
+
+# Maior caractere Unicode: em comparação binária de UTF-8 fica depois de
+# qualquer texto válido, então "prefixo + LIMITE" fecha o intervalo do prefixo
+_LIMITE_UNICODE = '\U0010ffff'
+
+
+def normalizar_texto(texto):
+    """
+    Gera a chave de busca de um texto: sem acentos, em minúsculas e com os
+    espaços colapsados ("  María  Rodríguez " -> "maria rodriguez").
+
+    Args:
+        texto (str): Texto original (None é tratado como vazio).
+
+    Returns:
+        str: Texto normalizado.
+    """
+    if not texto:
+        return ''
+    decomposto = unicodedata.normalize('NFKD', str(texto))
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(sem_acentos.casefold().split())
+
+
+def normalizar_contato(contato):
+    """
+    Gera a chave de comparação de um contato: só os dígitos de um telefone
+    ("(09) 1234-5678" -> "0912345678"); contatos sem dígitos, como e-mails,
+    passam por normalizar_texto.
+
+    Args:
+        contato (str): Contato original (None é tratado como vazio).
+
+    Returns:
+        str: Contato normalizado.
+    """
+    if not contato:
+        return ''
+    digitos = ''.join(c for c in str(contato) if c.isdigit())
+    return digitos or normalizar_texto(contato)
+
+
+def intervalo_prefixo(texto):
+    """
+    Retorna (inicio, fim) para buscar chaves que começam com o texto usando
+    "coluna >= inicio AND coluna < fim", condição que o SQLite resolve com índice.
+
+    Args:
+        texto (str): Prefixo digitado pelo usuário (é normalizado aqui).
+
+    Returns:
+        tuple: (inicio, fim) ou None se o texto normalizado for vazio.
+    """
+    prefixo = normalizar_texto(texto)
+    if not prefixo:
+        return None
+    return prefixo, prefixo + _LIMITE_UNICODE
+
+
+# Formatos aceitos na entrada de datas; o formulário usa 'dd/mm/yyyy'
+_FORMATOS_DATA = ('%d/%m/%Y', '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d-%m-%Y')
+
+
+def normalizar_data(valor):
+    """
+    Converte uma data para o formato ISO 'YYYY-MM-DD', usado nas colunas
+    *_iso para permitir consultas por intervalo com índice.
+
+    Args:
+        valor (str|datetime.date): Data em 'dd/mm/YYYY', 'YYYY-MM-DD' (com ou
+            sem hora) ou objeto date/datetime. None ou texto vazio é aceito.
+
+    Returns:
+        str: Data em 'YYYY-MM-DD' ou None se o valor estiver vazio.
+
+    Raises:
+        ValueError: Se o valor não for uma data válida.
+    """
+    if isinstance(valor, datetime.datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, datetime.date):
+        return valor.isoformat()
+    if valor is None or not str(valor).strip():
+        return None
+
+    texto = str(valor).strip()
+    for formato in _FORMATOS_DATA:
+        try:
+            return datetime.datetime.strptime(texto, formato).date().isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f"Data inválida: {texto!r} (use o formato dd/mm/aaaa)")
+
+
+def normalizar_data_tolerante(valor):
+    """
+    Igual a normalizar_data, mas retorna None em vez de falhar. Usado ao
+    migrar linhas antigas, que foram gravadas sem validação.
+
+    Args:
+        valor (str|datetime.date): Data em qualquer formato aceito.
+
+    Returns:
+        str: Data em 'YYYY-MM-DD' ou None se vazia ou inválida.
+    """
+    try:
+        return normalizar_data(valor)
+    except ValueError:
+        return None
+
+
+# Opção do formulário ("Grado 3: Movimiento activo ...") ou grau de um grupo
+# muscular ("Cuádriceps: Grado 2")
+_PADRAO_GRADO = re.compile(r'^\s*(?:(?P<grupo>[^:]*?)\s*:\s*)?grado\s*(?P<grado>[0-5])(?!\d)', re.IGNORECASE)
+
+
+def itens_forca_muscular(valor):
+    """
+    Separa a força muscular do formulário nos itens gravados em grados_fuerza.
+
+    Args:
+        valor (str|list): Opção marcada no formulário ou lista de opções, como
+            "Grado 3: ..." ou "Cuádriceps: Grado 2". None ou vazio é aceito.
+
+    Returns:
+        list: Tuplas (grupo, grado, descricao): o grupo passa por normalizar_texto
+        ('' se o item não citar grupo), grado é um int de 0 a 5 (None se o texto
+        não tiver grau) e descricao é o texto original do item.
+    """
+    if not valor:
+        return []
+    if not isinstance(valor, (list, tuple)):
+        valor = [valor]
+
+    itens = []
+    for item in valor:
+        descricao = str(item)
+        if not descricao.strip():
+            continue
+        encontrado = _PADRAO_GRADO.match(descricao)
+        if encontrado:
+            itens.append((normalizar_texto(encontrado.group('grupo')), int(encontrado.group('grado')), descricao))
+        else:
+            itens.append(('', None, descricao))
+    return itens
@@ -0,0 +1,288 @@
+"""
+Avisos de alteração das avaliações, para atualizar a interface sem recarregar tudo.
+
+Gatilhos gravam cada inserção, alteração e exclusão em alteracoes_avaliacoes
+(migração 15). O MonitorAlteracoes consulta o PRAGMA data_version da sua conexão,
+que só muda quando outra conexão confirma uma transação; enquanto ele não muda,
+verificar custa um único pragma. Quando muda, lê os eventos novos do registro e
+os entrega aos inscritos, já consolidados por avaliação.
+
+Como o registro fica no próprio arquivo, as gravações de outra estação que usa o
+mesmo banco também chegam, na verificação seguinte, e o monitor tira as avaliações
+alteradas do cache de obter_avaliacao (as escritas locais já fazem isso). As da
+própria aplicação chegam logo após o commit: o monitor é acordado pelo EscritorBanco.
+
+Uso:
+    cancelar = obter_monitor("fisioterapia.db").inscrever(aplicar_alteracoes)
+"""
+import collections
+import os
+import sqlite3
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.database import abrir_conexao, obter_cache_avaliacoes, obter_escritor
+
+
+# Operações de um evento; RECARREGAR (sem avaliacao_id) pede que a lista seja lida
+# de novo: eventos se perderam ou são tantos que atualizar linha a linha não compensa
+INSERIDA = 'inserida'
+ATUALIZADA = 'atualizada'
+EXCLUIDA = 'excluida'
+RECARREGAR = 'recarregar'
+
+Alteracao = collections.namedtuple('Alteracao', 'operacao avaliacao_id')
+
+# Acima de tantas avaliações alteradas de uma vez (ex.: importação em lote), os
+# inscritos recebem só RECARREGAR
+LIMITE_EVENTOS = 500
+
+_monitores = {}
+_avisos_commit = {}  # arquivo -> função registrada no ao_confirmar do escritor
+_monitores_lock = threading.Lock()
+
+
+def consolidar(linhas, limite=LIMITE_EVENTOS):
+    """
+    Reduz os eventos do registro a um por avaliação.
+
+    Os ids de avaliações não são reaproveitados, então a exclusão é definitiva, e
+    uma avaliação inserida e alterada entre duas verificações é só inserida.
+
+    Args:
+        linhas (iterable): (avaliacao_id, operacao) em ordem de seq.
+        limite (int): Máximo de avaliações antes de devolver só RECARREGAR.
+
+    Returns:
+        list: Alteracao na ordem do primeiro evento de cada avaliação.
+    """
+    operacoes = {}
+    for avaliacao_id, operacao in linhas:
+        anterior = operacoes.get(avaliacao_id)
+        if anterior == EXCLUIDA or (anterior == INSERIDA and operacao == ATUALIZADA):
+            continue
+        operacoes[avaliacao_id] = operacao
+
+    if len(operacoes) > limite:
+        return [Alteracao(RECARREGAR, None)]
+    return [Alteracao(operacao, avaliacao_id) for avaliacao_id, operacao in operacoes.items()]
+
+
+class MonitorAlteracoes:
+    """
+    Acompanha o registro de alterações de um arquivo de banco e avisa os inscritos.
+
+    Com algum inscrito, uma thread chama verificar a cada intervalo segundos (ou
+    quando acordada) e entrega a lista de Alteracao a cada callback, nessa thread;
+    na interface Tk, repasse com PonteTkAsyncio.chamar_na_interface.
+    """
+
+    def __init__(self, nome_db, intervalo=0.5):
+        """
+        Args:
+            nome_db (str): Caminho do arquivo do banco de dados.
+            intervalo (float): Segundos entre as verificações da thread; é o atraso
+                máximo para as gravações de outra estação.
+        """
+        self.nome_db = nome_db
+        self.intervalo = intervalo
+        self.fechado = False
+
+        self._conn = None
+        self._lock = threading.Lock()
+        self._versao = None
+        self._ultimo_seq = None
+        self._inscritos = []
+        self._acordar = threading.Event()
+        self._thread = None
+
+    def _conexao(self):
+        """Conexão do monitor, aberta no primeiro uso (chamar com o lock adquirido)."""
+        if self._conn is None:
+            self._conn = abrir_conexao(self.nome_db, somente_leitura=True)
+        return self._conn
+
+    def verificar(self):
+        """
+        Lê os eventos gravados desde a verificação anterior.
+
+        A primeira chamada só marca a posição atual do registro. O data_version é
+        lido antes dos eventos: um commit entre as duas leituras só faz a próxima
+        verificação consultar o registro de novo.
+
+        Returns:
+            list: Alteracao consolidadas (vazia se nada mudou).
+
+        Raises:
+            sqlite3.ProgrammingError: Se o monitor já tiver sido fechado.
+        """
+        with self._lock:
+            if self.fechado:
+                raise sqlite3.ProgrammingError("Monitor de alterações fechado")
+            conn = self._conexao()
+
+            versao = conn.execute('PRAGMA data_version').fetchone()[0]
+            if versao == self._versao:
+                return []
+            self._versao = versao
+
+            if self._ultimo_seq is None:
+                self._ultimo_seq = self._maior_seq(conn)
+                return []
+
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            try:
+                linhas = cursor.execute('''
+                SELECT seq, avaliacao_id, operacao FROM alteracoes_avaliacoes
+                WHERE seq > ? ORDER BY seq
+                ''', (self._ultimo_seq,)).fetchall()
+            finally:
+                cursor.close()
+
+            if not linhas:
+                # Registro atrás da posição lida: o arquivo foi substituído (ex.: backup restaurado)
+                maior = self._maior_seq(conn)
+                if maior >= self._ultimo_seq:
+                    return []
+                self._ultimo_seq = maior
+                alteracoes = [Alteracao(RECARREGAR, None)]
+            elif linhas[0][0] != self._ultimo_seq + 1:
+                # seq não tem lacunas; uma lacuna logo após a posição lida são
+                # eventos já apagados pela limpeza do registro
+                self._ultimo_seq = linhas[-1][0]
+                alteracoes = [Alteracao(RECARREGAR, None)]
+            else:
+                self._ultimo_seq = linhas[-1][0]
+                alteracoes = consolidar((avaliacao_id, operacao) for _, avaliacao_id, operacao in linhas)
+
+        cache = obter_cache_avaliacoes(self.nome_db)
+        if alteracoes[0].operacao == RECARREGAR:
+            cache.limpar()
+        else:
+            cache.invalidar(*(alteracao.avaliacao_id for alteracao in alteracoes))
+        return alteracoes
+
+    @staticmethod
+    def _maior_seq(conn):
+        """Último seq gravado no registro (0 se estiver vazio)."""
+        return conn.execute('SELECT IFNULL(MAX(seq), 0) FROM alteracoes_avaliacoes').fetchone()[0]
+
+    def inscrever(self, callback):
+        """
+        Passa a avisar callback(alteracoes) a cada verificação com eventos,
+        iniciando a thread do monitor se for o primeiro inscrito.
+
+        Args:
+            callback (callable): Chamado com a lista de Alteracao, na thread do monitor.
+
+        Returns:
+            callable: Função sem argumentos que cancela a inscrição.
+
+        Raises:
+            sqlite3.ProgrammingError: Se o monitor já tiver sido fechado.
+        """
+        with self._lock:
+            if self.fechado:
+                raise sqlite3.ProgrammingError("Monitor de alterações fechado")
+            self._inscritos.append(callback)
+            iniciar = self._thread is None
+            if iniciar:
+                self._thread = threading.Thread(
+                    target=self._executar, name=f"MonitorAlteracoes-{os.path.basename(self.nome_db)}",
+                    daemon=True
+                )
+
+        if iniciar:
+            # Marcar a posição antes de voltar: nada gravado depois da inscrição se perde
+            self.verificar()
+            self._thread.start()
+
+        def cancelar():
+            with self._lock:
+                if callback in self._inscritos:
+                    self._inscritos.remove(callback)
+
+        return cancelar
+
+    def acordar(self):
+        """Faz a thread verificar agora, sem esperar o intervalo (seguro em qualquer thread)."""
+        self._acordar.set()
+
+    def _executar(self):
+        """Laço da thread: verifica e avisa os inscritos até fechar()."""
+        while True:
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            if self.fechado:
+                return
+
+            try:
+                alteracoes = self.verificar()
+            except sqlite3.ProgrammingError:
+                return
+            except sqlite3.Error as e:
+                # Ex.: banco travado por uma migração; tentar de novo no próximo intervalo
+                print(f"Erro ao verificar alterações: {e}")
+                continue
+
+            if not alteracoes:
+                continue
+            with self._lock:
+                inscritos = list(self._inscritos)
+            for callback in inscritos:
+                try:
+                    callback(alteracoes)
+                except Exception as e:
+                    print(f"Erro ao avisar alterações: {e}")
+
+    def fechar(self):
+        """Encerra a thread e fecha a conexão do monitor."""
+        with self._lock:
+            if self.fechado:
+                return
+            self.fechado = True
+            self._inscritos.clear()
+
+        self._acordar.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _acordar_monitor(chave):
+    """Acorda o monitor atual do arquivo, se houver (chamada pelo escritor após cada commit)."""
+    monitor = _monitores.get(chave)
+    if monitor is not None and not monitor.fechado:
+        monitor.acordar()
+
+
+def obter_monitor(nome_db="fisioterapia.db"):
+    """
+    Retorna o monitor de alterações do arquivo informado, criando-o se necessário.
+
+    O escritor do arquivo acorda o monitor a cada commit por uma única função por
+    arquivo, que procura o monitor atual: recriar o monitor não acumula avisos no
+    escritor, e um escritor recriado (depois de fechar_pools) volta a avisar na
+    próxima chamada. Até lá, as gravações locais chegam pela verificação periódica.
+    """
+    chave = os.path.abspath(nome_db)
+    with _monitores_lock:
+        monitor = _monitores.get(chave)
+        if monitor is None or monitor.fechado:
+            monitor = MonitorAlteracoes(nome_db)
+            _monitores[chave] = monitor
+
+        aviso = _avisos_commit.get(chave)
+        if aviso is None:
+            aviso = _avisos_commit[chave] = lambda: _acordar_monitor(chave)
+        escritor = obter_escritor(nome_db)
+        if aviso not in escritor.ao_confirmar:
+            escritor.ao_confirmar.append(aviso)
+        return monitor